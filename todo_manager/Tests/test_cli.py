@@ -0,0 +1,82 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CLI = os.path.join(APP_DIR, "cli.py")
+
+class TestBatchCLI(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.env = dict(os.environ, TODO_DATA_DIR=self.tmp.name, TODO_BCRYPT_ROUNDS="4", TODO_PASSWORD="secret")
+        self.run_python(f"from user import User; u = User(); u.storage.add('bob', {{'password': u.hash_password('secret')}})")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def run_python(self, code):
+        subprocess.run([sys.executable, "-c", code], cwd=APP_DIR, env=self.env, check=True)
+
+    def cli(self, *args, stdin=""):
+        return subprocess.run([sys.executable, CLI, "--user", "bob", *args], input=stdin,
+                              env=self.env, capture_output=True, text=True)
+
+    def test_batch_add_complete_delete(self):
+        self.assertEqual(self.cli("add", "-", stdin="Homework\nPay gas bill\n\nClean fridge\n").returncode, 0)
+        self.assertEqual(self.cli("add", "Call mum", "--priority", "High").returncode, 0)
+        self.assertEqual(self.cli("complete", "1", "3").returncode, 0)
+        result = self.cli("list", "--todo")
+        self.assertEqual(result.stdout.splitlines(), ["2\ttodo\t-\tPay gas bill", "4\ttodo\tHigh\tCall mum"])
+        self.assertEqual(self.cli("delete", "--completed").returncode, 0)
+        tasks = json.loads(self.cli("export").stdout)
+        self.assertEqual([task["title"] for task in tasks], ["Pay gas bill", "Call mum"])
+
+    def test_bad_numbers_change_nothing(self):
+        self.cli("add", "Homework", "Pay gas bill")
+        result = self.cli("delete", "1", "7")
+        self.assertEqual(result.returncode, 2)
+        self.assertIn("7", result.stderr)
+        self.assertEqual(len(json.loads(self.cli("export").stdout)), 2)
+
+    def test_changes_by_id(self):
+        self.cli("add", "Homework", "Pay gas bill")
+        ids = [task["id"] for task in json.loads(self.cli("list", "--json").stdout)]
+        self.assertEqual(self.cli("complete", "--id", ids[1]).stdout, "Completed 1 tasks\n")
+        result = self.cli("delete", "--id", ids[0], "0123456789abcdef")
+        self.assertEqual((result.returncode, result.stderr), (2, "todo: No task with ID 0123456789abcdef\n"))
+        result = self.cli("complete", "--id", ids[0], "0123456789abcdef")
+        self.assertEqual(result.returncode, 2)
+        self.assertEqual([task["completed"] for task in json.loads(self.cli("list", "--json").stdout)], [False, True])
+        self.assertEqual(self.cli("delete", "--id", ids[0], ids[0]).stdout, "Deleted 1 tasks\n")
+
+    def test_nothing_to_change_is_a_usage_error(self):
+        for args in (["complete"], ["complete", "--id"], ["delete"], ["delete", "--id"]):
+            result = self.cli(*args)
+            self.assertEqual(result.returncode, 2)
+            self.assertIn("usage:", result.stderr)
+
+    def test_wrong_password(self):
+        self.env["TODO_PASSWORD"] = "nope"
+        self.assertEqual(self.cli("list").returncode, 1)
+
+    def test_import_export_round_trip(self):
+        records = [{"title": "Homework", "completed": True, "type": "Task"},
+                   {"title": "Pay gas bill", "completed": False, "type": "PriorityTask", "priority": "Low"}]
+        self.assertEqual(self.cli("import", "-", stdin=json.dumps(records)).returncode, 0)
+        exported = json.loads(self.cli("export", "-").stdout)
+        self.assertEqual([{key: value for key, value in record.items() if key != "id"} for record in exported], records)
+
+    def test_csv_and_jsonl_files(self):
+        self.cli("add", "Homework", "Pay gas bill", "--priority", "Low")
+        archive = os.path.join(self.tmp.name, "archive.jsonl")
+        self.assertEqual(self.cli("export", archive).returncode, 0)
+        self.assertEqual(self.cli("import", archive).returncode, 0)
+        csv_text = self.cli("export", "--format", "csv").stdout
+        self.assertEqual(csv_text.splitlines()[0], "title,completed,type,priority")
+        self.assertEqual(len(csv_text.splitlines()), 5)
+
+if __name__ == '__main__':
+    unittest.main()
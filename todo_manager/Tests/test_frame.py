@@ -0,0 +1,45 @@
+import io
+import unittest
+from unittest import mock
+from todo_manager import frame, styling
+from todo_manager.frame import FrameRenderer, CLEAR
+
+class Terminal(io.StringIO):
+    """Records each write, like a terminal on the other end of a slow connection."""
+    def __init__(self):
+        super().__init__()
+        self.writes = []
+
+    def write(self, text):
+        self.writes.append(text)
+        return super().write(text)
+
+class TestFrameRenderer(unittest.TestCase):
+    def test_screen_and_question_are_one_write(self):
+        terminal = Terminal()
+        with FrameRenderer(diff=False, stream=terminal) as renderer, \
+                mock.patch("builtins.input", return_value="2") as typed:
+            print("1. Add a new task")
+            styling.print_info("2. See all my tasks")
+            self.assertEqual(terminal.writes, [])
+            self.assertEqual(frame.ask("\nWhat would you like to do? (1-6): "), "2")
+            typed.assert_called_once_with()
+            print("Bye!")
+        self.assertEqual(terminal.writes, ["1. Add a new task\n2. See all my tasks\n\nWhat would you like to do? (1-6): ",
+                                           "Bye!\n"])
+        self.assertEqual(renderer.frames, 2)
+        self.assertIsNone(frame._active)
+
+    def test_diff_only_redraws_changed_lines(self):
+        renderer = FrameRenderer(diff=True)
+        with mock.patch("shutil.get_terminal_size", return_value=(80, 24)):
+            first = CLEAR + "TO DO.\n1. Add\nChoice: "
+            self.assertEqual(renderer.render(first), first) # Nothing to compare with yet
+            self.assertEqual(renderer.render(CLEAR + "TO DO.\nNot a number!\n1. Add\nChoice: "),
+                             "\x1b[2;1HNot a number!\x1b[K\x1b[3;1H1. Add\x1b[K\x1b[4;1HChoice: \x1b[J")
+
+            tall = CLEAR + "\n".join(["task"] * 30)
+            self.assertEqual(renderer.render(tall), tall) # Would scroll, so drawn in full
+
+if __name__ == "__main__":
+    unittest.main()
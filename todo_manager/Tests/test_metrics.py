@@ -0,0 +1,49 @@
+import json
+import os
+import tempfile
+import unittest
+from todo_manager import storage
+from todo_manager.hashing import PasswordHasher
+
+metrics = storage.metrics # The metrics module the app's own files record to
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        metrics.reset()
+        metrics.enable()
+
+    def tearDown(self):
+        metrics.disable()
+        metrics.reset()
+        self.tmp.cleanup()
+
+    def test_records_calls_time_and_bytes_only_while_enabled(self):
+        path = os.path.join(self.tmp.name, "bob_tasks.json")
+        storage.JSONTaskStorage(path).save([{"title": "Homework", "completed": False, "type": "Task"}])
+        with metrics.timer("custom"):
+            pass
+        metrics.disable()
+        storage.JSONTaskStorage(path).save([])
+        PasswordHasher(rounds=4).hash("secret")
+
+        stats = metrics.snapshot()
+        self.assertEqual(stats["storage.write"]["calls"], 1)
+        self.assertEqual(stats["storage.write"]["bytes"], os.path.getsize(path + ".bak"))
+        self.assertGreater(stats["storage.write"]["seconds"], 0)
+        self.assertEqual(stats["custom"]["calls"], 1)
+        self.assertNotIn("bcrypt.hash", stats)
+
+    def test_dump_json_and_prometheus(self):
+        PasswordHasher(rounds=4).check("secret", PasswordHasher(rounds=4).hash("secret"))
+        with open(metrics.dump(os.path.join(self.tmp.name, "metrics.json"))) as file:
+            saved = json.load(file)
+        self.assertEqual(saved["bcrypt.check"]["calls"], 1)
+
+        with open(metrics.dump(os.path.join(self.tmp.name, "metrics.prom"))) as file:
+            text = file.read()
+        self.assertIn("# TYPE todo_operation_calls_total counter", text)
+        self.assertIn('todo_operation_calls_total{operation="bcrypt.hash"} 1', text)
+
+if __name__ == "__main__":
+    unittest.main()
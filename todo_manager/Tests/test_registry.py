@@ -0,0 +1,54 @@
+import json
+import os
+import tempfile
+import unittest
+from todo_manager.registry import TaskListRegistry, estimate_bytes
+from todo_manager.tasks import TaskList, Task
+from todo_manager.storage import JSONTaskStorage
+
+class TestTaskListRegistry(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.opened = []
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def task_file(self, username):
+        return os.path.join(self.tmp.name, f"{username}_tasks.json")
+
+    def open_task_list(self, username):
+        self.opened.append(username)
+        return TaskList(username, storage=JSONTaskStorage(self.task_file(username)), flush_interval=60)
+
+    def test_hits_misses_and_lru_eviction(self):
+        registry = TaskListRegistry(max_lists=2, max_bytes=0, open_task_list=self.open_task_list)
+        bob = registry.get("bob")
+        bob.add_task(Task("Homework")) # Waiting to be saved (long flush interval)
+        self.assertFalse(os.path.exists(self.task_file("bob")))
+        self.assertIs(registry.get("bob"), bob)
+        registry.get("amy")
+        registry.get("bob") # bob is now the most recently used
+        registry.get("cat") # amy is dropped
+
+        self.assertEqual(self.opened, ["bob", "amy", "cat"])
+        self.assertEqual(registry.stats()["hits"], 2)
+        self.assertEqual(registry.stats()["misses"], 3)
+        self.assertEqual(registry.evictions, 1)
+        registry.get("dan") # bob is dropped and written back
+        with open(self.task_file("bob")) as file:
+            self.assertEqual([task["title"] for task in json.load(file)], ["Homework"])
+        registry.close_all()
+
+    def test_evicts_by_memory(self):
+        registry = TaskListRegistry(max_lists=10, max_bytes=1, open_task_list=self.open_task_list)
+        big = registry.get("bob")
+        big.add_tasks([Task(f"Task {i}") for i in range(100)])
+        self.assertGreater(estimate_bytes(big), 100 * 50)
+        registry.get("amy") # Always keeps the newest list, however big
+        self.assertEqual(registry.stats()["lists"], 1)
+        self.assertEqual(registry.evictions, 1)
+        registry.close_all()
+
+if __name__ == "__main__":
+    unittest.main()
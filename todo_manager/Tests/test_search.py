@@ -0,0 +1,49 @@
+import contextlib
+import io
+import unittest
+from unittest import mock
+from todo_manager import utils
+from todo_manager.tasks import TaskList, Task, PriorityTask
+from todo_manager.storage import MemoryTaskStorage
+
+class TestTaskSearch(unittest.TestCase):
+    def setUp(self):
+        self.task_list = TaskList("bob", storage=MemoryTaskStorage())
+        self.task_list.add_tasks([Task("Pay gas bill"), PriorityTask("Pay rent", "High"), Task("Buy milk"),
+                                  PriorityTask("Pay phone bills", "Low")])
+
+    def test_words_filters_and_sort(self):
+        search = self.task_list.search
+        self.assertEqual(search("pay"), [0, 1, 3])
+        self.assertEqual(search("BILL pay"), [0])
+        self.assertEqual(search("bill pay", substring=True), [0, 3])
+        self.assertEqual(search("pay", priority="High"), [1])
+        self.assertEqual(search("pay", by_priority=True), [1, 3, 0])
+        self.assertEqual(search("walk the dog"), [])
+        self.task_list.complete_tasks([2])
+        self.assertEqual(search(completed=True), [2])
+        self.assertEqual(search(completed=False), [0, 1, 3])
+
+    def test_index_follows_changes(self):
+        search = self.task_list.search
+        self.assertEqual(search("milk"), [2])
+        self.task_list.delete_tasks([0, 1]) # Later tasks move up
+        self.assertEqual(search("milk"), [0])
+        self.assertEqual(search("rent"), [])
+        self.task_list.add_tasks([Task("More milk")])
+        self.assertEqual(search("milk"), [0, 2])
+        self.task_list.delete_completed()
+        self.task_list.complete_all()
+        self.assertEqual(search("milk", completed=False), [])
+
+    def test_search_menu_shows_brackets_in_query(self): # rich would read "[/x]" in the table title as a closing tag
+        self.task_list.add_tasks([Task("Fix [/x] tag")])
+        answers = iter(["[/x]", "", "", "n"])
+        output = io.StringIO()
+        with mock.patch.object(utils, "ask", side_effect=lambda prompt: next(answers)), \
+                contextlib.redirect_stdout(output):
+            utils.search_tasks(self.task_list)
+        self.assertIn("1 task found for '[/x]'", output.getvalue())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,148 @@
+import asyncio
+import contextlib
+import http.client
+import io
+import json
+import os
+import socket
+import tempfile
+import threading
+import unittest
+from unittest import mock
+from todo_manager.server import TodoServer
+from todo_manager.user import User
+from todo_manager.hashing import PasswordHasher
+from todo_manager.tasks import TaskList, Task
+from todo_manager.storage import JSONTaskStorage
+from todo_manager.sqlite_storage import SQLiteTaskStorage, SQLiteUserStorage
+
+class TestTodoServer(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        users = User(os.path.join(self.tmp.name, "users.json"), storage=self.user_storage(),
+                     hasher=PasswordHasher(rounds=4, workers=2))
+        self.opened = []
+
+        def open_task_list(username):
+            self.opened.append(username)
+            return TaskList(username, storage=self.task_storage(username))
+        self.server = TodoServer(users, open_task_list)
+
+        self.loop = asyncio.new_event_loop()
+        self.listener = self.loop.run_until_complete(self.server.start("127.0.0.1", 0))
+        self.port = self.listener.sockets[0].getsockname()[1]
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+
+    def tearDown(self):
+        self.listener.close()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        pending = asyncio.all_tasks(self.loop) # Connection handlers finish once the client has hung up
+        self.loop.run_until_complete(asyncio.wait(pending, timeout=5) if pending else asyncio.sleep(0))
+        self.loop.close()
+        self.tmp.cleanup()
+
+    def user_storage(self):
+        return None # users.json
+
+    def task_storage(self, username):
+        return JSONTaskStorage(self.task_file(username))
+
+    def task_file(self, username):
+        return os.path.join(self.tmp.name, f"{username}_tasks.json")
+
+    def saved_tasks(self, username):
+        return self.task_storage(username).load()
+
+    def request(self, method, path, body=None, token=None, connection=None):
+        single = connection is None
+        connection = connection or http.client.HTTPConnection("127.0.0.1", self.port, timeout=10)
+        headers = {"Authorization": f"Bearer {token}"} if token else {}
+        try:
+            connection.request(method, path, json.dumps(body) if body is not None else None, headers)
+            response = connection.getresponse()
+            return response.status, json.loads(response.read())
+        finally:
+            if single:
+                connection.close()
+
+    def test_signup_add_complete_delete(self):
+        status, body = self.request("POST", "/signup", {"username": "bob", "password": "secret"})
+        self.assertEqual(status, 201)
+        token = body["token"]
+        self.assertEqual(self.request("POST", "/signup", {"username": "bob", "password": "other"})[0], 409)
+
+        connection = http.client.HTTPConnection("127.0.0.1", self.port, timeout=10) # Keep-alive across requests
+        status, body = self.request("POST", "/tasks", {"tasks": [{"title": "Homework"},
+                                                                  {"title": "Pay rent", "priority": "High"}]},
+                                    token, connection)
+        self.assertEqual((status, body["added"], len(body["ids"])), (201, 2, 2))
+        ids = body["ids"]
+        self.assertEqual(self.request("POST", "/tasks/1/complete", token=token, connection=connection),
+                         (200, {"completed": 1}))
+        status, body = self.request("GET", "/tasks?completed=false", token=token, connection=connection)
+        self.assertEqual([(task["number"], task["title"]) for task in body["tasks"]], [(2, "Pay rent")])
+        self.assertEqual(self.request("DELETE", "/tasks?completed=true", token=token, connection=connection),
+                         (200, {"deleted": 1}))
+        self.assertEqual(self.request("DELETE", "/tasks/5", token=token, connection=connection)[0], 400)
+        self.assertEqual(self.request("POST", f"/tasks/id/{ids[1]}/complete", token=token, connection=connection),
+                         (200, {"completed": 1}))
+        self.assertEqual(self.request("DELETE", f"/tasks/id/{ids[0]}", token=token, connection=connection)[0], 404)
+        connection.close()
+
+        self.assertEqual([(task["title"], task["id"]) for task in self.saved_tasks("bob")], [("Pay rent", ids[1])])
+        self.assertEqual(self.opened, ["bob"]) # Loaded once, then kept in memory
+
+    def test_login_and_errors(self):
+        self.request("POST", "/signup", {"username": "bob", "password": "secret"})
+        self.assertEqual(self.request("POST", "/login", {"username": "bob", "password": "wrong"})[0], 401)
+        status, body = self.request("POST", "/login", {"username": "bob", "password": "secret"})
+        self.assertEqual(status, 200)
+        self.assertEqual(self.request("GET", "/tasks")[0], 401)
+        self.assertEqual(self.request("GET", "/nowhere", token=body["token"])[0], 404)
+        self.assertEqual(self.request("PUT", "/tasks", {}, body["token"])[0], 405)
+        self.assertEqual(self.request("POST", "/tasks", {"title": "x", "priority": "Urgent"}, body["token"])[0], 400)
+        self.assertEqual(self.request("POST", "/logout", token=body["token"])[0], 200)
+        self.assertEqual(self.request("GET", "/tasks", token=body["token"])[0], 401)
+
+    def test_bad_requests(self):
+        token = self.request("POST", "/signup", {"username": "bob", "password": "secret"})[1]["token"]
+        for body in ({"tasks": ["Homework"]}, {"tasks": "Homework"}):
+            self.assertEqual(self.request("POST", "/tasks", body, token)[0], 400)
+        for numbers in ("12", [1, "2"], [True]):
+            self.assertEqual(self.request("POST", "/tasks/complete", {"numbers": numbers}, token)[0], 400)
+
+        with socket.create_connection(("127.0.0.1", self.port), timeout=10) as client:
+            client.sendall(b"POST /login HTTP/1.1\r\nContent-Length: lots\r\n\r\n")
+            self.assertTrue(client.makefile("rb").readline().startswith(b"HTTP/1.1 400"))
+
+        log = io.StringIO()
+        with mock.patch.object(self.server.task_lists, "get", side_effect=RuntimeError("disk on fire")), \
+                contextlib.redirect_stderr(log):
+            self.assertEqual(self.request("GET", "/tasks", token=token),
+                             (500, {"error": "Something went wrong on the server"}))
+        self.assertIn("disk on fire", log.getvalue())
+        self.assertEqual(self.request("GET", "/tasks", token=token), (200, {"tasks": []})) # Still answering
+
+    def test_picks_up_changes_from_another_session(self):
+        token = self.request("POST", "/signup", {"username": "bob", "password": "secret"})[1]["token"]
+        self.request("POST", "/tasks", {"title": "Homework"}, token)
+        TaskList("bob", storage=self.task_storage("bob")).add_tasks([Task("Pay rent")]) # e.g. cli.py
+        status, body = self.request("GET", "/tasks", token=token)
+        self.assertEqual([task["title"] for task in body["tasks"]], ["Homework", "Pay rent"])
+
+class TestTodoServerSQLite(TestTodoServer):
+    """The same requests with TODO_TASK_STORAGE=sqlite and TODO_USER_STORAGE=sqlite: tasks are loaded and saved on
+    worker threads, not the thread that opened the database."""
+    def database(self):
+        return os.path.join(self.tmp.name, "todo.db")
+
+    def user_storage(self):
+        return SQLiteUserStorage(self.database())
+
+    def task_storage(self, username):
+        return SQLiteTaskStorage(username, self.database())
+
+if __name__ == "__main__":
+    unittest.main()
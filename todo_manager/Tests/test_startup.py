@@ -0,0 +1,11 @@
+import unittest
+from todo_manager.startup_check import measure_import
+
+class TestStartup(unittest.TestCase):
+    def test_heavy_libraries_load_lazily(self): # rich, pyfiglet, bcrypt... only load when first used
+        took_ms, heavy = measure_import("main")
+        self.assertGreater(took_ms, 0)
+        self.assertEqual(heavy, [])
+
+if __name__ == '__main__':
+    unittest.main()
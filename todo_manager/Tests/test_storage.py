@@ -0,0 +1,401 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+from todo_manager.storage import JournalTaskStorage, JSONTaskStorage, JSONUserStorage, write_atomic
+from todo_manager.tasks import TaskList, Task, PriorityTask, Priority
+from todo_manager.mapped import MappedTaskStorage, MappedTasks
+from todo_manager.sqlite_storage import SQLiteTaskStorage, SQLiteUserStorage, migrate_json_to_sqlite
+from todo_manager.sharded_users import ShardedUserStorage, reshard, read_shard_count
+
+def without_ids(records):
+    return [{key: value for key, value in record.items() if key != "id"} for record in records]
+
+class TestJournalTaskStorage(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.tmp.name, "bob_tasks.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_replays_journal_on_load(self):
+        records = [{"title": "Homework", "completed": False, "type": "Task"}]
+        storage = JournalTaskStorage(self.filename)
+        storage.save(records)
+        records.append({"title": "Pay gas bill", "completed": False, "type": "Task"})
+        storage.record({"op": "add", "task": records[-1]}, lambda: records)
+        storage.record({"op": "complete", "index": 1}, lambda: records)
+        storage.record({"op": "delete", "index": 0}, lambda: records)
+
+        loaded = JournalTaskStorage(self.filename).load()
+        self.assertEqual(loaded, [{"title": "Pay gas bill", "completed": True, "type": "Task"}])
+
+    def test_compacts_into_snapshot(self):
+        records = []
+        storage = JournalTaskStorage(self.filename, compact_every=2)
+        for title in ["a", "b", "c", "d"]:
+            records.append({"title": title, "completed": False, "type": "Task"})
+            storage.record({"op": "add", "task": records[-1]}, lambda: records)
+        self.assertLess(storage.pending_ops, 2)
+        self.assertEqual([r["title"] for r in JournalTaskStorage(self.filename).load()], ["a", "b", "c", "d"])
+
+    def test_ignores_unfinished_last_change(self):
+        storage = JournalTaskStorage(self.filename)
+        storage.save([])
+        with open(storage.journal_file, "a") as journal:
+            journal.write('{"op": "add", "task": {"tit')  # crash mid-append
+        self.assertEqual(JournalTaskStorage(self.filename).load(), [])
+
+    def test_replays_journal_after_copy_with_new_modified_times(self): # e.g. cp without -p, or a backup restore
+        records = [{"title": "Homework", "completed": False, "type": "Task"}]
+        storage = JournalTaskStorage(self.filename)
+        storage.save(records)
+        storage.record({"op": "complete", "index": 0}, lambda: records)
+        copy = os.path.join(self.tmp.name, "copy")
+        os.makedirs(copy)
+        for path in (self.filename, storage.journal_file):
+            shutil.copyfile(path, os.path.join(copy, os.path.basename(path)))
+            os.utime(os.path.join(copy, os.path.basename(path)), ns=(1, 1))
+        self.assertEqual(JournalTaskStorage(os.path.join(copy, "bob_tasks.json")).load(),
+                         [{"title": "Homework", "completed": True, "type": "Task"}])
+
+    def test_journal_replayed_on_backup_it_belongs_to(self): # Crash mid-compaction, then the new snapshot is damaged
+        records = [{"title": "Homework", "completed": False, "type": "Task"}]
+        storage = JournalTaskStorage(self.filename)
+        storage.save(records)
+        storage.record({"op": "complete", "index": 0}, lambda: records)
+        JSONTaskStorage.save(storage, [{"generation": "0123456789abcdef"}]) # Snapshot swapped in, journal not reset
+        with open(self.filename, "w") as file:
+            file.write('[{"title": "Hom')
+        loaded = JournalTaskStorage(self.filename)
+        self.assertEqual(loaded.load(), [{"title": "Homework", "completed": True, "type": "Task"}])
+        self.assertEqual(loaded.recovered_from, self.filename + ".bak")
+
+    def test_reads_journal_saved_before_generations(self):
+        storage = JournalTaskStorage(self.filename)
+        JSONTaskStorage(self.filename).save([{"title": "Homework", "completed": False, "type": "Task"}])
+        with open(storage.journal_file, "w") as journal:
+            journal.write(json.dumps({"base": list(storage.snapshot_id())}) + "\n")
+            journal.write(json.dumps({"op": "complete", "index": 0}) + "\n")
+        self.assertTrue(JournalTaskStorage(self.filename).load()[0]["completed"])
+        self.assertEqual(JSONTaskStorage(self.filename).load()[0]["title"], "Homework")
+
+class TestAtomicWrites(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.tmp.name, "bob_tasks.json")
+        self.first = [{"title": "Homework", "completed": False, "type": "Task"}]
+        self.second = self.first + [{"title": "Pay rent", "completed": True, "type": "Task"}]
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_crash_mid_write_keeps_old_file(self):
+        storage = JSONTaskStorage(self.filename)
+        storage.save(self.first)
+
+        def crash(records):
+            yield self.second[0]
+            raise KeyboardInterrupt # e.g. killed half way through writing
+        with self.assertRaises(KeyboardInterrupt):
+            storage.save(crash(self.second))
+        self.assertEqual(JSONTaskStorage(self.filename).load(), self.first)
+        self.assertEqual(sorted(os.listdir(self.tmp.name)), ["bob_tasks.json"]) # Temp file cleaned up
+
+    def test_rolling_backups(self):
+        storage = JSONTaskStorage(self.filename)
+        with mock.patch("todo_manager.storage.config.BACKUP_COUNT", 2):
+            for records in (self.first, self.second, []):
+                storage.save(records)
+        self.assertEqual(JSONTaskStorage(self.filename + ".bak").load(), self.second)
+        self.assertEqual(JSONTaskStorage(self.filename + ".bak2").load(), self.first)
+        self.assertFalse(os.path.exists(self.filename + ".bak3"))
+
+    def test_damaged_file_recovers_from_backup(self):
+        storage = JSONTaskStorage(self.filename)
+        storage.save(self.first)
+        storage.save(self.second)
+        with open(self.filename, "w") as file:
+            file.write('[{"title": "Homework", "comp') # Damaged (e.g. disk error)
+        task_list = TaskList("bob", storage=JSONTaskStorage(self.filename))
+        self.assertEqual(without_ids(task_list.task_records()), self.first)
+        self.assertEqual(task_list.storage.recovered_from, self.filename + ".bak")
+
+    def test_damaged_users_file_recovers_from_backup(self):
+        users_file = os.path.join(self.tmp.name, "users.json")
+        storage = JSONUserStorage(users_file)
+        storage.save({"bob": {"password": b"$2b$04$hash"}})
+        storage.save({"bob": {"password": b"$2b$04$hash"}, "amy": {"password": b"$2b$04$other"}})
+        write_atomic(users_file, lambda file: file.write("{"))
+        self.assertEqual(JSONUserStorage(users_file).get("bob"), {"password": b"$2b$04$hash"})
+
+class TestTaskFileFormats(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.tmp.name, "bob_tasks.json")
+        self.records = [{"title": "Homework", "completed": False, "type": "Task"},
+                        {"title": "Pay rent", "completed": True, "type": "PriorityTask", "priority": "High"}]
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_every_format_reads_back(self):
+        for fmt in ("json", "compact", "msgpack"): # msgpack saves as compact if it isn't installed
+            with mock.patch("todo_manager.storage.config.TASK_FORMAT", fmt):
+                JSONTaskStorage(self.filename).save(iter(self.records))
+            self.assertEqual(JSONTaskStorage(self.filename).load(), self.records)
+
+    def test_reads_legacy_pretty_file(self):
+        with open(self.filename, "w") as file:
+            json.dump(self.records, file, indent=2) # As saved by older versions
+        task_list = TaskList("bob", storage=JSONTaskStorage(self.filename))
+        self.assertEqual(without_ids(task_list.task_records()), self.records)
+        with mock.patch("todo_manager.storage.config.TASK_FORMAT", "compact"):
+            task_list.add_tasks([Task("Buy milk")])
+        with open(self.filename) as file:
+            self.assertEqual(len(file.read().splitlines()), 1) # Saved compact from now on
+        self.assertEqual(len(JSONTaskStorage(self.filename).load()), 3)
+
+class TestMappedTaskStorage(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.tmp.name, "bob_tasks.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_view_until_first_change(self):
+        TaskList("bob", storage=MappedTaskStorage(self.filename)).add_tasks(
+            [Task("Homework"), PriorityTask("Pay rent", "High"), Task("Café ☕")])
+        task_list = TaskList("bob", storage=MappedTaskStorage(self.filename))
+        self.assertIsInstance(task_list.tasks, MappedTasks)
+        self.assertEqual(task_list.tasks[2].title, "Café ☕")
+        self.assertTrue(task_list.tasks[1].is_high_priority())
+        self.assertEqual(task_list.count_by_priority()[Priority.HIGH], 1)
+
+        view = task_list.tasks
+        task_list.complete_tasks([0])
+        self.assertIsInstance(task_list.tasks, list)
+        self.assertTrue(view._mm.closed) # Unmapped once decoded
+        reopened = TaskList("bob", storage=MappedTaskStorage(self.filename))
+        self.assertTrue(reopened.tasks[0].completed)
+        self.assertEqual(len(reopened.get_tasks()), 3)
+
+    def test_rebuilds_index_after_outside_change(self):
+        MappedTaskStorage(self.filename).save([{"title": "Homework", "completed": False, "type": "Task"}])
+        JSONTaskStorage(self.filename).save([{"title": "Pay rent", "completed": True, "type": "Task"}])
+        task_list = TaskList("bob", storage=MappedTaskStorage(self.filename))
+        self.assertEqual(without_ids(task_list.task_records()), [{"title": "Pay rent", "completed": True, "type": "Task"}])
+
+    def test_reload_closes_old_view(self):
+        MappedTaskStorage(self.filename).save([{"title": "Homework", "completed": False, "type": "Task"}])
+        task_list = TaskList("bob", storage=MappedTaskStorage(self.filename))
+        view = task_list.tasks
+        task_list.load_tasks()
+        self.assertTrue(view._mm.closed)
+        self.assertEqual(task_list.tasks[0].title, "Homework")
+
+class TestConcurrentSessions(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.tmp.name, "bob_tasks.json")
+        JSONTaskStorage(self.filename).save([{"title": f"Task {i}", "completed": False, "type": "Task"} for i in range(3)])
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_second_writer_merges_instead_of_overwriting(self):
+        for storage_class in (JSONTaskStorage, JournalTaskStorage):
+            first = TaskList("bob", storage=storage_class(self.filename))
+            second = TaskList("bob", storage=storage_class(self.filename))
+            first.delete_tasks([0])             # Task 1 moves to index 0 on disk
+            first.add_tasks([Task("From first")])
+            second.complete_tasks([1])          # Task 1, as second session saw it
+            saved = storage_class(self.filename).load()
+            self.assertEqual([(r["title"], r["completed"]) for r in saved],
+                             [("Task 1", True), ("Task 2", False), ("From first", False)])
+            self.assertEqual(second.task_records(), saved)
+            JSONTaskStorage(self.filename).save([{"title": f"Task {i}", "completed": False, "type": "Task"} for i in range(3)])
+
+    def test_many_processes_adding(self):
+        app_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        code = ("import sys; from tasks import TaskList, Task; from storage import JSONTaskStorage\n"
+                "for i in range(20):\n"
+                "    TaskList('bob', storage=JSONTaskStorage(sys.argv[1])).add_tasks([Task(sys.argv[2] + str(i))])")
+        workers = [subprocess.Popen([sys.executable, "-c", code, self.filename, f"w{n}-"], cwd=app_dir)
+                   for n in range(4)]
+        for worker in workers:
+            self.assertEqual(worker.wait(), 0)
+        self.assertEqual(len(JSONTaskStorage(self.filename).load()), 3 + 4 * 20)
+
+    def test_signup_race(self):
+        users_file = os.path.join(self.tmp.name, "users.json")
+        first, second = JSONUserStorage(users_file), JSONUserStorage(users_file)
+        self.assertIsNone(second.get("amy")) # Second session checked before the first saved
+        self.assertTrue(first.create("amy", {"password": b"first"}))
+        self.assertFalse(second.create("amy", {"password": b"second"}))
+        self.assertEqual(JSONUserStorage(users_file).get("amy"), {"password": b"first"})
+
+class TestJSONUserStorage(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.users_file = os.path.join(self.tmp.name, "users.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_signup_appends_without_rewriting(self):
+        storage = JSONUserStorage(self.users_file)
+        storage.save({"alice": {"password": b"hash-a"}})
+        before = os.stat(self.users_file).st_mtime_ns
+        storage.add("bob", {"password": b"hash-b"})
+        self.assertEqual(os.stat(self.users_file).st_mtime_ns, before)
+        self.assertEqual(JSONUserStorage(self.users_file).get("bob"), {"password": b"hash-b"})
+        self.assertIsNone(storage.get("carol"))
+
+    def test_reloads_when_file_changes(self):
+        storage = JSONUserStorage(self.users_file)
+        storage.save({"alice": {"password": b"hash-a"}})
+        self.assertIsNotNone(storage.get("alice"))
+        JSONUserStorage(self.users_file).add("bob", {"password": b"hash-b"})  # another session signs up
+        self.assertEqual(storage.get("bob"), {"password": b"hash-b"})
+
+    def test_compacts_journal_into_users_file(self):
+        storage = JSONUserStorage(self.users_file, compact_every=1)
+        storage.add("alice", {"password": b"hash-a"})
+        storage.add("bob", {"password": b"hash-b"})
+        self.assertFalse(os.path.exists(storage.journal_file))
+        self.assertEqual(sorted(JSONUserStorage(self.users_file).load()), ["alice", "bob"])
+
+class TestShardedUserStorage(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.folder = os.path.join(self.tmp.name, "users")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_login_and_signup_touch_one_shard(self):
+        ShardedUserStorage(self.folder, shards=8).save({f"user{i}": {"password": b"hash"} for i in range(200)})
+        storage = ShardedUserStorage(self.folder, shards=2) # An existing store keeps its own shard count
+        self.assertEqual(storage.get("user42"), {"password": b"hash"})
+        self.assertIsNone(storage.get("nobody"))
+        self.assertEqual((storage.shard_count(), len(storage._shards)), (8, 2))
+
+        self.assertTrue(storage.create("amy", {"password": b"hash-a"}))
+        self.assertFalse(ShardedUserStorage(self.folder).create("amy", {"password": b"other"}))
+        journals = [name for name in os.listdir(self.folder) if name.endswith(".journal")]
+        self.assertEqual(journals, [os.path.basename(os.path.splitext(storage.shard_for("amy").users_file)[0])
+                                    + ".journal"])
+        self.assertEqual(len(ShardedUserStorage(self.folder).load()), 201)
+
+    def test_reshard_keeps_every_account(self):
+        users_file = os.path.join(self.tmp.name, "users.json")
+        JSONUserStorage(users_file).save({f"user{i}": {"password": b"hash"} for i in range(50)})
+        self.assertEqual(reshard(self.folder, 4, source=users_file), 50)
+        storage = ShardedUserStorage(self.folder)
+        storage.add("amy", {"password": b"hash-a"})
+
+        self.assertEqual(reshard(self.folder, 3), 51)
+        self.assertEqual(read_shard_count(self.folder), 3)
+        self.assertFalse([name for name in os.listdir(self.folder) if "-of-0004" in name]) # Old shards removed
+        self.assertEqual(storage.get("amy"), {"password": b"hash-a"}) # Running sessions follow the new layout
+        storage.add("bob", {"password": b"hash-b"})
+        self.assertEqual(len(ShardedUserStorage(self.folder).load()), 52)
+
+class TestSQLiteStorage(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_file = os.path.join(self.tmp.name, "todo.db")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_task_changes_and_filters(self):
+        storage = SQLiteTaskStorage("bob", self.db_file)
+        storage.save([{"title": "Homework", "completed": False, "type": "Task"}])
+        storage.record({"op": "add", "task": {"title": "Pay gas bill", "completed": False,
+                                              "type": "PriorityTask", "priority": "High"}}, None)
+        storage.record({"op": "complete", "index": 0}, None)
+        self.assertEqual(storage.count(completed=True), 1)
+        self.assertEqual([r["title"] for r in storage.query(priority="High")], ["Pay gas bill"])
+        storage.record({"op": "delete", "index": 0}, None)
+        self.assertEqual([r["title"] for r in storage.load()], ["Pay gas bill"])
+        self.assertEqual(SQLiteTaskStorage("alice", self.db_file).load(), [])
+
+    def test_list_filters_and_counts_use_the_database(self):
+        storage = SQLiteTaskStorage("bob", self.db_file)
+        task_list = TaskList("bob", storage=storage)
+        task_list.add_task(PriorityTask("Pay gas bill", "High"))
+        task_list.add_task(Task("Homework"))
+        task_list.add_task(PriorityTask("Book dentist", "High"))
+        task_list.mark_complete(0)
+        with mock.patch.object(storage, "query", wraps=storage.query) as query:
+            matches = task_list.filter_tasks(completed=False, priority="high")
+        query.assert_called_once_with(False, "High", numbered=True)
+        self.assertEqual([(r["number"], r["title"]) for r in matches], [(3, "Book dentist")])
+        self.assertEqual(task_list.count_by_priority(),
+                         {Priority.HIGH: 2, Priority.MEDIUM: 0, Priority.LOW: 0, None: 1})
+        with task_list.batch(): # Not saved yet, so the list answers
+            task_list.add_task(PriorityTask("Pay rent", "High"))
+            self.assertEqual(len(task_list.filter_tasks(priority=Priority.HIGH)), 3)
+        self.assertEqual([r["number"] for r in task_list.filter_tasks(priority="High")], [1, 3, 4])
+        self.assertTrue(task_list.close())
+
+    def test_users_lock_separately(self):
+        with mock.patch("todo_manager.sqlite_storage.file_lock") as file_lock:
+            for user in ("bob", "alice", "carol", "bob"):
+                SQLiteTaskStorage(user, self.db_file).lock()
+        paths = [call.args[0] for call in file_lock.call_args_list]
+        self.assertEqual(paths[0], paths[3])
+        self.assertEqual(len(set(paths)), 3)
+
+    def test_migrate_from_json(self):
+        JSONUserStorage(os.path.join(self.tmp.name, "users.json")).add("bob", {"password": b"$2b$12$hash"})
+        JournalTaskStorage(os.path.join(self.tmp.name, "bob_tasks.json")).save(
+            [{"title": "Homework", "completed": True, "type": "Task"}])
+        self.assertEqual(migrate_json_to_sqlite(self.tmp.name, self.db_file), (1, 1))
+        self.assertEqual(SQLiteUserStorage(self.db_file).get("bob"), {"password": b"$2b$12$hash"})
+        self.assertEqual(SQLiteTaskStorage("bob", self.db_file).load(),
+                         [{"title": "Homework", "completed": True, "type": "Task"}])
+
+    def test_background_flush(self): # The flusher saves on its timer thread, not the thread that opened the database
+        task_list = TaskList("bob", storage=SQLiteTaskStorage("bob", self.db_file), flush_interval=0.05)
+        task_list.add_task(Task("Homework"))
+        task_list.add_task(Task("Pay rent"))
+        time.sleep(0.3)
+        self.assertEqual([r["title"] for r in SQLiteTaskStorage("bob", self.db_file).load()], ["Homework", "Pay rent"])
+        task_list.mark_complete(1)
+        self.assertTrue(task_list.close())
+        self.assertTrue(SQLiteTaskStorage("bob", self.db_file).load()[1]["completed"])
+
+    def test_failed_flush_is_kept_for_close(self):
+        storage = SQLiteTaskStorage("bob", self.db_file)
+        task_list = TaskList("bob", storage=storage, flush_interval=0.05)
+        with mock.patch.object(storage, "record", side_effect=OSError("disk full")), \
+                mock.patch("builtins.print"):
+            task_list.add_task(Task("Homework"))
+            time.sleep(0.3)
+            self.assertFalse(task_list.close())
+        self.assertEqual(storage.load(), [])
+        self.assertTrue(task_list.close()) # Still queued, saved on the next try
+        self.assertEqual([r["title"] for r in storage.load()], ["Homework"])
+
+    def test_version_changes_across_threads(self):
+        storage = SQLiteTaskStorage("bob", self.db_file)
+        before = storage.etag()
+        thread = threading.Thread(target=storage.save, args=([{"title": "Homework", "completed": False, "type": "Task"}],))
+        thread.start()
+        thread.join()
+        self.assertNotEqual(storage.etag(), before)
+        self.assertEqual(SQLiteTaskStorage("alice", self.db_file).etag(), 0)
+
+if __name__ == '__main__':
+    unittest.main()
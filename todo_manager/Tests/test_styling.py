@@ -0,0 +1,35 @@
+import io
+import unittest
+from contextlib import redirect_stdout
+from todo_manager import styling
+from todo_manager.styling import render_rainbow_text
+
+class TestRainbowText(unittest.TestCase):
+    def test_banner_is_cached(self):
+        first = render_rainbow_text("TO DO.", width=80)
+        self.assertIs(render_rainbow_text("TO DO.", width=80), first)
+        self.assertIsNot(render_rainbow_text("TO DO.", width=120), first)
+
+    def test_every_char_coloured(self):
+        banner = render_rainbow_text("HI", width=80)
+        lines = banner.plain.split("\n")
+        art_chars = sum(len(line.rstrip()) - 4 for line in lines[2:-1] if line.strip())
+        self.assertGreaterEqual(len(banner.spans), art_chars)
+        self.assertTrue(all(span.style.startswith("bold #") for span in banner.spans))
+
+class TestClearScreen(unittest.TestCase):
+    def test_no_clear_when_not_a_terminal(self):
+        out = io.StringIO()
+        with redirect_stdout(out):
+            styling.clear_screen()
+        self.assertEqual(out.getvalue(), "")
+
+    def test_headless_toggle(self):
+        styling.set_headless(True)
+        try:
+            self.assertTrue(styling.is_headless())
+        finally:
+            styling.set_headless(False)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,40 @@
+import io
+import json
+import unittest
+from todo_manager.task_io import (read_json_array, write_json_array, read_jsonl, write_jsonl,
+                                  read_csv, write_csv, format_for)
+
+RECORDS = [{"title": "Homework", "completed": True, "type": "Task"},
+           {"title": "Pay \"gas\" bill, today\n", "completed": False, "type": "PriorityTask", "priority": "High"}]
+
+class TestStreamingTaskFiles(unittest.TestCase):
+    def test_json_list_matches_json_dump(self):
+        for records in ([], RECORDS[:1], RECORDS):
+            file = io.StringIO()
+            write_json_array(iter(records), file)
+            self.assertEqual(file.getvalue(), json.dumps(records, indent=2))
+
+    def test_json_list_read_in_tiny_chunks(self):
+        text = json.dumps(RECORDS * 50, indent=2)
+        for chunk_size in (1, 7, 4096):
+            self.assertEqual(list(read_json_array(io.StringIO(text), chunk_size)), RECORDS * 50)
+        self.assertEqual(list(read_json_array(io.StringIO(""))), [])
+        with self.assertRaises(json.JSONDecodeError):
+            list(read_json_array(io.StringIO('[{"title": "Homework"'), 4))
+
+    def test_jsonl_and_csv_round_trip(self):
+        for write, read in ((write_jsonl, read_jsonl), (write_csv, read_csv)):
+            file = io.StringIO(newline="")
+            self.assertEqual(write((record for record in RECORDS), file), 2)
+            self.assertEqual(list(read(io.StringIO(file.getvalue(), newline=""))), RECORDS)
+
+    def test_format_from_extension(self):
+        self.assertEqual(format_for("archive.JSONL"), "jsonl")
+        self.assertEqual(format_for("tasks.csv"), "csv")
+        self.assertEqual(format_for("-"), "json")
+        self.assertEqual(format_for("tasks.csv", "jsonl"), "jsonl")
+        with self.assertRaises(ValueError):
+            format_for("tasks.txt", "xml")
+
+if __name__ == '__main__':
+    unittest.main()
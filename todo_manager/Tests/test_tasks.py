@@ -1,5 +1,10 @@
+import os
+import tempfile
+import time
 import unittest
-from todo_manager.tasks import Task
+from unittest import mock
+from todo_manager.tasks import Task, PriorityTask, TaskList, Priority
+from todo_manager.storage import JournalTaskStorage, MemoryTaskStorage
 
 class TestTask(unittest.TestCase):
     def test_task_creation(self):
@@ -25,5 +30,214 @@ class TestTask(unittest.TestCase):
         self.assertFalse(med_task.is_high_priority())
         self.assertFalse(low_task.is_high_priority())
         
+    def test_priority_is_enum_backed(self):
+        from todo_manager.tasks import PriorityTask, Priority, task_from_dict
+        task = PriorityTask("Pay gas bill", "High")
+        self.assertIs(task.level, Priority.HIGH)
+        self.assertEqual(task.priority, "High")
+        self.assertFalse(hasattr(task, "__dict__")) # slotted, no per-task dict
+        record = task.to_dict()
+        self.assertEqual(record, {"title": "Pay gas bill", "completed": False, "type": "PriorityTask", "id": task.id,
+                                  "priority": "High"})
+        self.assertEqual(task_from_dict(record).level, Priority.HIGH)
+        with self.assertRaises(ValueError):
+            PriorityTask("Homework", "Urgent")
+
+class TestBulkOperations(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.tmp.name, "bob_tasks.json")
+        JournalTaskStorage(self.filename).save([
+            {"title": "Pay gas bill", "completed": False, "type": "PriorityTask", "priority": "High"},
+            {"title": "Homework", "completed": True, "type": "Task"},
+            {"title": "Pay rent", "completed": False, "type": "PriorityTask", "priority": "High"},
+            {"title": "Clean fridge", "completed": False, "type": "PriorityTask", "priority": "Low"},
+        ])
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def check_bulk(self, columnar, use_numpy=True):
+        task_list = TaskList("bob", storage=JournalTaskStorage(self.filename), columnar=columnar)
+        if columnar:
+            task_list.tasks.use_numpy = use_numpy
+        self.assertEqual(task_list.count_by_priority(), {Priority.HIGH: 2, Priority.MEDIUM: 0, Priority.LOW: 1, None: 1})
+        self.assertEqual(task_list.complete_all("High"), 2)
+        self.assertEqual(task_list.delete_completed(), 3)
+        self.assertEqual([task.title for task in task_list.get_tasks()], ["Clean fridge"])
+        reloaded = TaskList("bob", storage=JournalTaskStorage(self.filename))
+        self.assertEqual(reloaded.task_records(), task_list.task_records())
+
+    def test_bulk_operations_list(self):
+        self.check_bulk(columnar=False)
+
+    def test_bulk_operations_columnar(self):
+        self.check_bulk(columnar=True)
+
+    def test_bulk_operations_columnar_without_numpy(self):
+        self.check_bulk(columnar=True, use_numpy=False)
+
+    def test_columnar_tasks_act_like_list(self):
+        task_list = TaskList("bob", storage=JournalTaskStorage(self.filename), columnar=True)
+        self.assertIsInstance(task_list.tasks[0], PriorityTask)
+        task_list.mark_complete(3)
+        self.assertTrue(task_list.tasks[3].completed)
+        task_list.delete_task(0)
+        self.assertEqual(len(task_list.get_tasks()), 3)
+        self.assertEqual(task_list.task_records()[0],
+                         {"title": "Homework", "completed": True, "type": "Task", "id": task_list.tasks[0].id})
+
+class CountingJournal(JournalTaskStorage):
+    def __init__(self, filename):
+        super().__init__(filename)
+        self.writes = 0
+
+    def record(self, op, snapshot):
+        self.writes += 1
+        super().record(op, snapshot)
+
+    def record_many(self, ops, snapshot):
+        self.writes += 1
+        super().record_many(ops, snapshot)
+
+class TestWriteBatching(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.tmp.name, "bob_tasks.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def saved_titles(self):
+        return [record["title"] for record in JournalTaskStorage(self.filename).load()]
+
+    def test_batch_saves_once(self):
+        storage = CountingJournal(self.filename)
+        task_list = TaskList("bob", storage=storage)
+        with task_list.batch():
+            for i in range(100):
+                task_list.add_task(Task(f"Task {i}"))
+            task_list.mark_complete(0)
+            self.assertEqual(self.saved_titles(), [])
+        self.assertEqual(storage.writes, 1)
+        self.assertEqual(len(self.saved_titles()), 100)
+        self.assertTrue(JournalTaskStorage(self.filename).load()[0]["completed"])
+
+    def test_batch_saves_on_error(self):
+        task_list = TaskList("bob", storage=JournalTaskStorage(self.filename))
+        with self.assertRaises(RuntimeError):
+            with task_list.batch():
+                task_list.add_task(Task("Homework"))
+                raise RuntimeError("boom")
+        self.assertEqual(self.saved_titles(), ["Homework"])
+
+    def test_background_flush_after_burst(self):
+        storage = CountingJournal(self.filename)
+        task_list = TaskList("bob", storage=storage, flush_interval=0.05)
+        for title in ("Homework", "Pay rent", "Clean fridge"):
+            task_list.add_task(Task(title))
+        task_list.delete_completed() # Nothing completed - no change
+        time.sleep(0.3)
+        self.assertEqual(storage.writes, 1)
+        self.assertEqual(self.saved_titles(), ["Homework", "Pay rent", "Clean fridge"])
+        task_list.delete_task(1)
+        task_list.close()
+        self.assertEqual(self.saved_titles(), ["Homework", "Clean fridge"])
+
+    def test_flusher_restarts_after_close(self): # The registry keeps using lists it has closed
+        task_list = TaskList("bob", storage=JournalTaskStorage(self.filename), flush_interval=0.05)
+        task_list.add_task(Task("Homework"))
+        self.assertTrue(task_list.close())
+        task_list.add_task(Task("Pay rent"))
+        time.sleep(0.3)
+        self.assertEqual(self.saved_titles(), ["Homework", "Pay rent"])
+        task_list.close()
+
+    def test_changes_during_background_flushes(self):
+        task_list = TaskList("bob", storage=JournalTaskStorage(self.filename), flush_interval=0.001)
+        with mock.patch("builtins.print"):
+            for number in range(300):
+                task_list.add_task(Task(f"Task {number}"))
+                if number % 3 == 2:
+                    task_list.delete_task(len(task_list.tasks) - 2)
+        self.assertTrue(task_list.close())
+        self.assertEqual(self.saved_titles(), [task.title for task in task_list.tasks])
+        self.assertEqual(len(task_list.tasks), 200)
+
+class TestTaskIds(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.tmp.name, "bob_tasks.json")
+        self.save_without_ids()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def save_without_ids(self): # As saved before tasks had IDs, with two tasks of the same title
+        JournalTaskStorage(self.filename).save(
+            [{"title": title, "completed": False, "type": "Task"} for title in ("Homework", "Pay rent", "Homework")])
+
+    def open(self, columnar=False):
+        return TaskList("bob", storage=JournalTaskStorage(self.filename), columnar=columnar)
+
+    def test_ids_are_saved_and_survive_deletes(self):
+        for columnar in (False, True):
+            task_list = self.open(columnar)
+            ids = [task.id for task in task_list.get_tasks()]
+            self.assertEqual([task.id for task in self.open().get_tasks()], ids) # New IDs were saved on load
+            self.assertEqual(task_list.position_of(ids[2]), 2)
+            task_list.delete_by_id(ids[0])
+            self.assertEqual(task_list.position_of(ids[2]), 1)
+            self.assertTrue(task_list.complete_by_id(ids[2]))
+            self.assertFalse(task_list.complete_by_id(ids[2]))
+            with self.assertRaises(KeyError):
+                task_list.delete_by_id(ids[0])
+            reloaded = self.open()
+            self.assertEqual([(task.id, task.completed) for task in reloaded.get_tasks()], [(ids[1], False), (ids[2], True)])
+            self.save_without_ids()
+
+    def test_other_session_deletes_first(self):
+        first, second = self.open(), self.open()
+        last_homework = second.tasks[2].id
+        first.delete_task(0) # The other "Homework" - the title alone can't tell them apart
+        second.complete_by_id(last_homework)
+        saved = self.open().task_records()
+        self.assertEqual([(record["id"], record["completed"]) for record in saved],
+                         [(second.tasks[0].id, False), (last_homework, True)])
+
+    def test_id_index_compacts_after_many_deletes(self):
+        task_list = TaskList("bob", storage=MemoryTaskStorage())
+        task_list.add_tasks(Task(f"Task {i}") for i in range(2000))
+        ids = [task.id for task in task_list.get_tasks()]
+        task_list.position_of(ids[0])
+        with task_list.batch():
+            for task_id in ids[:1500:2]: # Every other task in the first 1500
+                task_list.delete_by_id(task_id)
+        self.assertEqual(task_list.position_of(ids[1499]), 749)
+        self.assertEqual(task_list.position_of(ids[1999]), 1249)
+        self.assertIsNone(task_list.position_of(ids[0]))
+
+class TestPagination(unittest.TestCase):
+    def setUp(self):
+        self.task_list = TaskList("bob", storage=MemoryTaskStorage())
+        for i in range(45):
+            self.task_list.tasks.append(Task(f"Task {i + 1}"))
+
+    def test_only_visible_page_is_formatted(self):
+        self.assertEqual(self.task_list.page_count(20), 3)
+        self.task_list.display_tasks(page=2, page_size=20)
+        formatted = [i for i, row in enumerate(self.task_list._row_cache) if row is not None]
+        self.assertEqual(formatted, list(range(20, 40)))
+        self.task_list.display_tasks(page=9, page_size=20) # past the end - shows the last page
+        self.assertEqual(self.task_list.page, 3)
+
+    def test_changed_task_row_is_formatted_again(self):
+        self.task_list.display_tasks(page=2, page_size=20)
+        cached = self.task_list._row_cache[21]
+        self.task_list.mark_complete(25)
+        self.assertIsNone(self.task_list._row_cache[25])
+        self.assertIs(self.task_list.task_row(21), cached)
+        self.assertEqual(self.task_list.task_row(25)[0], "Task 26")
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
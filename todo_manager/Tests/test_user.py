@@ -1,10 +1,72 @@
+import asyncio
+import os
+import tempfile
+import threading
 import unittest
+from unittest import mock
 from todo_manager.user import User
+from todo_manager.hashing import PasswordHasher
 
 class TestUser(unittest.TestCase):
     def test_create_user(self):
         user = User()
         self.assertIsNone(user.get_current_user())
 
+class TestPasswordHashing(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.users_file = os.path.join(self.tmp.name, "users.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_rehash_on_login_when_cost_changes(self):
+        old = User(self.users_file, hasher=PasswordHasher(rounds=4))
+        old.storage.add("bob", {"password": old.hash_password("secret")})
+
+        user = User(self.users_file, hasher=PasswordHasher(rounds=5))
+        self.assertFalse(user.verify_login("bob", "wrong"))
+        self.assertEqual(user.hasher.cost_of(user.find_user("bob")["password"]), 4)
+        self.assertTrue(user.verify_login("bob", "secret"))
+        self.assertEqual(user.hasher.cost_of(user.find_user("bob")["password"]), 5)
+
+    def test_async_login(self):
+        hasher = PasswordHasher(rounds=4, workers=2)
+        user = User(self.users_file, hasher=hasher)
+        user.storage.add("bob", {"password": user.hash_password("secret")})
+
+        async def logins():
+            return await asyncio.gather(user.verify_login_async("bob", "secret"),
+                                        user.verify_login_async("bob", "nope"),
+                                        user.verify_login_async("nobody", "secret"))
+        self.assertEqual(asyncio.run(logins()), [True, False, False])
+        hasher.shutdown()
+
+    def test_async_login_keeps_storage_off_the_event_loop(self):
+        User(self.users_file, hasher=PasswordHasher(rounds=4)).storage.add(
+            "bob", {"password": PasswordHasher(rounds=4).hash("secret")})
+        hasher = PasswordHasher(rounds=5, workers=1)
+        user = User(self.users_file, hasher=hasher)
+        threads = []
+        for name in ("get", "add"):
+            method = getattr(user.storage, name)
+            setattr(user.storage, name, lambda *args, method=method: (threads.append(threading.get_ident()),
+                                                                      method(*args))[1])
+
+        async def login():
+            return await user.verify_login_async("bob", "secret"), threading.get_ident()
+        logged_in, loop_thread = asyncio.run(login())
+        self.assertTrue(logged_in)
+        self.assertEqual(len(threads), 2) # Looked up, then saved again with the new cost
+        self.assertNotIn(loop_thread, threads)
+        self.assertEqual(user.hasher.cost_of(user.find_user("bob")["password"]), 5)
+
+        user.storage.add = mock.Mock(side_effect=OSError("disk full")) # A failed rehash doesn't fail the login
+        user.hasher = PasswordHasher(rounds=6, workers=1)
+        with mock.patch("builtins.print"):
+            self.assertTrue(asyncio.run(user.verify_login_async("bob", "secret")))
+        hasher.shutdown()
+        user.hasher.shutdown()
+
 if __name__ == '__main__':
-    unittest.main()
\ No newline at end of file
+    unittest.main()
@@ -0,0 +1,8 @@
+"""benchmarks: scripts that measure how fast TO DO. is and how much memory it uses.
+
+Run them from inside the todo_manager folder (so the app's modules can be imported), e.g.:
+    cd todo_manager
+    python3 -m benchmarks.task_memory
+
+benchmarks.suite runs all the hot paths at once and saves the results as JSON; compare two runs (e.g. before
+and after a change) with python3 -m benchmarks.suite --compare before.json after.json."""
@@ -0,0 +1,76 @@
+"""atomic_write.py: measures what crash-safe saving costs per write.
+
+Imports:
+- os: Makes a temporary data folder and sets the fsync setting for each run.
+- statistics: Median time per write.
+- sys: Reads the task counts from the command line.
+- tempfile: A throwaway folder so real data isn't touched.
+- time: perf_counter for timing each save.
+- config: Custom file with app settings (FSYNC_WRITES, changed for each run).
+- storage: Custom file with write_atomic and the JSON task format being measured.
+- task_io: Custom file that writes the tasks as a JSON list.
+
+For each task count, saves the same tasks repeatedly with:
+  plain        open(..., 'w') and write (the old way - not crash-safe)
+  atomic       temp file + os.replace, no fsync
+  atomic+fsync temp file + fsync + os.replace + folder fsync (the default)
+  +backup      as above, also keeping a .bak of the previous version
+Run with: python3 -m benchmarks.atomic_write [task counts...]
+Note: fsync cost depends heavily on the disk (and is much lower on tmpfs), so run it on the disk that holds data/."""
+
+import os
+import statistics
+import sys
+import tempfile
+import time
+import config
+from storage import write_atomic
+from task_io import write_json_array
+
+def make_records(count: int) -> list:
+    """Returns: list[dict]: count task records, every third one with a priority."""
+    return [{"title": f"Task number {i}", "completed": i % 2 == 0, "type": "PriorityTask", "priority": "High"}
+            if i % 3 == 0 else {"title": f"Task number {i}", "completed": False, "type": "Task"}
+            for i in range(count)]
+
+def time_writes(save, repeats: int) -> float:
+    """Call save() repeats times.
+    Returns: float: Median milliseconds per call."""
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        save()
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+def main(counts: list = None) -> None:
+    """Print the median time per save for each way of saving, at each task count.
+    Parameters: counts (list[int]): Numbers of tasks to save (default 10, 1,000 and 100,000).
+    Returns: None"""
+    counts = counts or [10, 1_000, 100_000]
+    fsync_setting = config.FSYNC_WRITES
+    with tempfile.TemporaryDirectory(dir=config.DATA_DIR if os.path.isdir(config.DATA_DIR) else None) as folder:
+        path = os.path.join(folder, "bench_tasks.json")
+        print(f"{'tasks':>9} {'plain':>10} {'atomic':>10} {'atomic+fsync':>13} {'+backup':>10}   (ms per save)")
+        for count in counts:
+            records = make_records(count)
+            repeats = max(5, min(200, 200_000 // count))
+
+            def plain():
+                with open(path, 'w') as file:
+                    write_json_array(records, file)
+
+            def atomic(backups=0):
+                write_atomic(path, lambda file: write_json_array(records, file), backups=backups)
+
+            results = [time_writes(plain, repeats)]
+            config.FSYNC_WRITES = False
+            results.append(time_writes(atomic, repeats))
+            config.FSYNC_WRITES = True
+            results.append(time_writes(atomic, repeats))
+            results.append(time_writes(lambda: atomic(backups=1), repeats))
+            config.FSYNC_WRITES = fsync_setting
+            print(f"{count:>9,} {results[0]:>10.2f} {results[1]:>10.2f} {results[2]:>13.2f} {results[3]:>10.2f}")
+
+if __name__ == "__main__":
+    main([int(count) for count in sys.argv[1:]])
@@ -0,0 +1,77 @@
+"""serializers.py: compares how fast each tasks file format saves and loads.
+
+Imports:
+- os: Makes a temporary data folder and checks each saved file's size.
+- sys: Reads the task counts from the command line.
+- tempfile: A throwaway folder so real data isn't touched.
+- time: perf_counter for timing each save and load.
+- config: Custom file with app settings (TASK_FORMAT and FSYNC_WRITES, changed for each run).
+- serializers: Custom file with the tasks file formats being measured.
+- storage: Custom file with JSONTaskStorage, which saves and loads through the serializers.
+- tasks: Custom file with TaskList, so loading includes building the Task objects.
+- benchmarks.atomic_write: make_records, the same test tasks as the write benchmark.
+
+For each task count and format, saves the tasks once and loads them into a TaskList once, and prints
+the time, the throughput (tasks per second) and the file size. Formats are json (pretty-printed, the
+original), compact and msgpack (if installed), each with orjson if it's installed and again with only
+the standard library. fsync is turned off so the numbers show serialization, not the disk.
+Run with: python3 -m benchmarks.serializers [task counts...]"""
+
+import os
+import sys
+import tempfile
+import time
+import config
+import serializers
+from storage import JSONTaskStorage
+from tasks import TaskList
+from benchmarks.atomic_write import make_records
+
+def variants() -> list:
+    """Returns: list[tuple]: (label, format name, use orjson) for every format that can run here."""
+    runs = []
+    has_orjson = serializers.optional_module("orjson") is not None
+    for name in ("json", "compact"):
+        if has_orjson:
+            runs.append((f"{name}+orjson", name, True))
+        runs.append((name, name, False))
+    if serializers.optional_module("msgpack") is not None:
+        runs.append(("msgpack", "msgpack", has_orjson))
+    return runs
+
+def main(counts: list = None) -> None:
+    """Print save and load times for each format, at each task count.
+    Parameters: counts (list[int]): Numbers of tasks (default 1,000, 100,000 and 1,000,000).
+    Returns: None"""
+    counts = counts or [1_000, 100_000, 1_000_000]
+    settings = config.TASK_FORMAT, config.FSYNC_WRITES, config.BACKUP_COUNT
+    orjson = serializers.optional_module("orjson")
+    runs = variants()
+    config.FSYNC_WRITES, config.BACKUP_COUNT = False, 0
+    try:
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "bench_tasks.json")
+            print(f"{'tasks':>9} {'format':<15} {'save ms':>9} {'load ms':>9} {'save/s':>11} {'load/s':>11} {'size KB':>9}")
+            for count in counts:
+                records = make_records(count)
+                for label, name, use_orjson in runs:
+                    serializers._modules["orjson"] = orjson if use_orjson else None
+                    config.TASK_FORMAT = name
+                    storage = JSONTaskStorage(path)
+
+                    start = time.perf_counter()
+                    storage.save(records)
+                    save_time = time.perf_counter() - start
+                    start = time.perf_counter()
+                    task_list = TaskList("bench", storage=storage, flush_interval=0)
+                    load_time = time.perf_counter() - start
+                    assert len(task_list.tasks) == count
+
+                    print(f"{count:>9,} {label:<15} {save_time * 1000:>9.1f} {load_time * 1000:>9.1f} "
+                          f"{count / save_time:>11,.0f} {count / load_time:>11,.0f} {os.path.getsize(path) / 1024:>9,.0f}")
+    finally:
+        config.TASK_FORMAT, config.FSYNC_WRITES, config.BACKUP_COUNT = settings
+        serializers._modules["orjson"] = orjson
+
+if __name__ == "__main__":
+    main([int(count) for count in sys.argv[1:]])
@@ -0,0 +1,300 @@
+"""suite.py: times the app's hot paths on made-up data and saves the results, so two commits can be compared.
+
+Imports:
+- argparse: Reads the options (sizes, repeats, output file, compare mode) from the command line.
+- contextlib: Sends table and banner output to a throwaway buffer while they're timed.
+- io: The throwaway buffer.
+- json: Saves and reads the results files.
+- os: Makes the temporary data folder.
+- platform: Records the Python version and machine in the results.
+- random: Made-up data from a fixed seed, so every run measures the same thing.
+- statistics: Mean time.
+- subprocess: Records the git commit being measured (if there is one).
+- sys: Exits with 1 when compare finds a regression.
+- tempfile: A throwaway data folder so real data isn't touched.
+- time: The date of the run.
+- timeit: Times each call with the most precise clock available.
+- tracemalloc: Measures the peak memory each operation allocates.
+- config: Custom file with app settings (fsync and bcrypt cost are set for the run).
+- hashing, sharded_users, storage, styling, tasks, user: Custom files with the code being measured.
+
+Benchmarks (each at every size asked for):
+  tasks.save[n]        TaskList.save_tasks with n tasks
+  tasks.load[n]        TaskList.load_tasks with n tasks
+  tasks.display[n]     TaskList.display_tasks, one page of an n task list
+  tasks.delete_by_id[n] TaskList.delete_by_id on the middle task of an n task list (in memory, nothing saved)
+  users.load[n]        User.load_users with n accounts
+  users.lookup[n]      One login's account lookup by a fresh process (json: reads users.json)
+  users.compact[n]     A signup that folds the journal back in (json: rewrites users.json)
+  users.sharded.*[n]   The same two with TODO_USER_STORAGE=sharded (reads or rewrites one shard)
+  users.login          User.verify_login (one bcrypt check at config.BCRYPT_ROUNDS)
+  styling.rainbow      print_rainbow_text, cached and cold (banner built from scratch)
+Each is run repeat times; the results give latency percentiles in ms and the peak memory in KB.
+Run with:
+    python3 -m benchmarks.suite --output before.json             # default sizes 10/10k/1M tasks, 1k/100k/1M users
+    python3 -m benchmarks.suite --tasks 10 10000 --users 1000    # quicker
+    python3 -m benchmarks.suite --compare before.json after.json # exits 1 if anything got slower than --threshold"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+import tracemalloc
+import config
+
+SEED = 2024
+WORDS = ["pay", "buy", "call", "clean", "fix", "book", "email", "read", "write", "walk",
+         "milk", "rent", "bill", "dog", "car", "doctor", "report", "plan", "gym", "garden"]
+LABELS = ["High", "Medium", "Low"]
+
+# ========= Made-up data =========
+def make_task_records(count: int) -> list:
+    """Returns: list[dict]: count task records with 2-4 word titles, a third with a priority, a quarter completed."""
+    rng = random.Random(SEED)
+    records = []
+    for i in range(count):
+        record = {"title": " ".join(rng.sample(WORDS, rng.randint(2, 4))) + f" #{i}",
+                  "completed": rng.random() < 0.25, "type": "Task"}
+        if i % 3 == 0:
+            record.update(type="PriorityTask", priority=LABELS[rng.randrange(3)])
+        records.append(record)
+    return records
+
+def make_users(count: int, hashed: bytes) -> dict:
+    """Returns: dict: count accounts (user0, user1, ...) all with the same password hash (hashing each is too slow)."""
+    return {f"user{i}": {"password": hashed} for i in range(count)}
+
+# ========= Measuring =========
+def percentile(times: list, pct: float) -> float:
+    """Returns: float: The pct percentile of the times (nearest rank)."""
+    ordered = sorted(times)
+    return ordered[min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))]
+
+def measure(run, repeat: int, setup=None) -> dict:
+    """Time run() repeat times (calling setup() before each, untimed), then run it once more under tracemalloc.
+    Parameters: run (function): The operation being measured.
+                repeat (int): Number of timed runs.
+                setup (function, optional): Gets things ready before each run (e.g. clears a cache).
+    Returns: dict: samples, min/mean/p50/p90/p99/max in ms, and peak_kb (memory allocated at the peak)."""
+    times = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        times.append(timeit.Timer(run).timeit(number=1) * 1000)
+    if setup:
+        setup()
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"samples": repeat, "min_ms": min(times), "mean_ms": statistics.mean(times),
+            "p50_ms": percentile(times, 50), "p90_ms": percentile(times, 90), "p99_ms": percentile(times, 99),
+            "max_ms": max(times), "peak_kb": peak / 1024}
+
+def repeats_for(count: int, repeat: int) -> int:
+    """Returns: int: Fewer repeats for big datasets, so a full run finishes in minutes (at least 3)."""
+    return max(3, min(repeat, repeat * 10_000 // max(count, 1)))
+
+# ========= Benchmarks =========
+def bench_tasks(folder: str, counts: list, repeat: int, results: dict) -> None:
+    """Time saving, loading, showing and deleting from task lists of each size.
+    Returns: None"""
+    from storage import JSONTaskStorage, MemoryTaskStorage
+    from tasks import TaskList, task_from_dict
+    for count in counts:
+        path = os.path.join(folder, f"bench{count}_tasks.json")
+        records = make_task_records(count)
+        JSONTaskStorage(path).save(records)
+        task_list = TaskList("bench", storage=JSONTaskStorage(path), flush_interval=0)
+        times = repeats_for(count, repeat)
+        results[f"tasks.save[{count}]"] = measure(task_list.save_tasks, times)
+        results[f"tasks.load[{count}]"] = measure(task_list.load_tasks, times)
+
+        def display():
+            with contextlib.redirect_stdout(io.StringIO()):
+                task_list.display_tasks(page=task_list.page_count() // 2 + 1)
+        results[f"tasks.display[{count}]"] = measure(display, repeat, setup=lambda: setattr(task_list, "_row_cache", []))
+        del task_list
+
+        in_memory = TaskList("bench", storage=MemoryTaskStorage(), flush_interval=0)
+        in_memory.add_tasks(task_from_dict(record) for record in records)
+        del records
+        in_memory.position_of("") # Build the ID index before timing
+        deleting = {}
+
+        def middle_task(): # Put the last deleted task back at the end, so the list keeps n tasks
+            if "task" in deleting:
+                in_memory.add_tasks([deleting.pop("task")])
+            deleting["id"] = in_memory.tasks[count // 2].id
+        results[f"tasks.delete_by_id[{count}]"] = measure(
+            lambda: deleting.update(task=in_memory.delete_by_id(deleting["id"])), times, setup=middle_task)
+        del in_memory
+        print(f"  tasks: {count:,} done", file=sys.stderr)
+
+def bench_user_storage(name: str, open_storage, count: int, repeat: int, results: dict) -> None:
+    """Time one login lookup and one journal-compacting signup, each by a freshly opened storage.
+    Parameters: name (str): Start of the benchmark names, e.g. "users" or "users.sharded".
+                open_storage (function): Called with compact_every, returns a new storage for the saved users.
+                count (int): Number of saved accounts.
+    Returns: None"""
+    storage = None
+    username = f"user{count // 2}"
+
+    def fresh():
+        nonlocal storage
+        storage = open_storage(None)
+
+    def journal_full():
+        nonlocal storage
+        storage = open_storage(1)
+        storage.add(username, {"password": b"hash"}) # Now the next signup in this file compacts it
+    results[f"{name}.lookup[{count}]"] = measure(lambda: storage.get(username), repeat, setup=fresh)
+    results[f"{name}.compact[{count}]"] = measure(lambda: storage.add(username, {"password": b"hash"}), repeat,
+                                                  setup=journal_full)
+
+def bench_users(folder: str, counts: list, repeat: int, results: dict) -> None:
+    """Time loading user files of each size, looking up and signing up users in them (as one users.json and
+    sharded), and one bcrypt login.
+    Returns: None"""
+    from hashing import PasswordHasher
+    from sharded_users import ShardedUserStorage
+    from storage import JSONUserStorage
+    from user import User
+    hasher = PasswordHasher()
+    hashed = hasher.hash("secret password")
+    for count in counts:
+        users_file = os.path.join(folder, f"users{count}.json")
+        users = make_users(count, hashed)
+        JSONUserStorage(users_file).save(users)
+        user = User(users_file, hasher=hasher)
+        times = repeats_for(count, repeat)
+        results[f"users.load[{count}]"] = measure(user.load_users, times,
+                                                  setup=lambda: setattr(user, "storage", JSONUserStorage(users_file)))
+        bench_user_storage("users", lambda compact_every: JSONUserStorage(users_file, compact_every),
+                           count, times, results)
+
+        shard_folder = os.path.join(folder, f"users{count}")
+        ShardedUserStorage(shard_folder).save(users)
+        del users
+        bench_user_storage("users.sharded", lambda compact_every: ShardedUserStorage(shard_folder,
+                                                                                     compact_every=compact_every),
+                           count, times, results)
+        print(f"  users: {count:,} done", file=sys.stderr)
+    user = User(os.path.join(folder, "login_users.json"), hasher=hasher)
+    user.storage.add("bob", {"password": hashed})
+    results["users.login"] = measure(lambda: user.verify_login("bob", "secret password"), min(repeat, 10))
+
+def bench_styling(repeat: int, results: dict) -> None:
+    """Time the rainbow banner, both cached (the usual case) and built from scratch.
+    Returns: None"""
+    import styling
+
+    def rainbow():
+        with contextlib.redirect_stdout(io.StringIO()):
+            styling.print_rainbow_text("GOODBYE!")
+    rainbow() # Import rich and pyfiglet before timing
+    results["styling.rainbow"] = measure(rainbow, repeat)
+    results["styling.rainbow_cold"] = measure(rainbow, min(repeat, 20), setup=styling._banner_cache.clear)
+
+def git_commit() -> str:
+    """Returns: str: The current git commit (short), or None if it can't be found."""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_suite(task_counts: list, user_counts: list, repeat: int, fsync: bool = False) -> dict:
+    """Run every benchmark in a throwaway data folder.
+    Parameters: task_counts (list[int]), user_counts (list[int]): Dataset sizes.
+                repeat (int): Timed runs per benchmark (fewer for big datasets).
+                fsync (bool): Keep fsync on while saving (off by default, to measure the app rather than the disk).
+    Returns: dict: {"meta": {...}, "results": {benchmark name: measurements}}."""
+    results = {}
+    saved = config.FSYNC_WRITES, config.BACKUP_COUNT, config.FILE_LOCKING
+    config.FSYNC_WRITES, config.BACKUP_COUNT, config.FILE_LOCKING = fsync, 0, False
+    try:
+        with tempfile.TemporaryDirectory() as folder:
+            bench_tasks(folder, task_counts, repeat, results)
+            bench_users(folder, user_counts, repeat, results)
+            bench_styling(repeat, results)
+    finally:
+        config.FSYNC_WRITES, config.BACKUP_COUNT, config.FILE_LOCKING = saved
+    meta = {"commit": git_commit(), "date": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": platform.python_version(),
+            "machine": f"{platform.system()} {platform.machine()}", "repeat": repeat, "fsync": fsync,
+            "bcrypt_rounds": config.BCRYPT_ROUNDS, "task_storage": config.TASK_STORAGE, "task_format": config.TASK_FORMAT,
+            "user_shards": config.USER_SHARDS}
+    return {"meta": meta, "results": results}
+
+# ========= Reporting =========
+def print_results(report: dict) -> None:
+    """Print one results table.
+    Returns: None"""
+    print(f"{'benchmark':<31} {'p50 ms':>10} {'p90 ms':>10} {'p99 ms':>10} {'max ms':>10} {'peak KB':>11}")
+    for name, result in report["results"].items():
+        print(f"{name:<31} {result['p50_ms']:>10.3f} {result['p90_ms']:>10.3f} {result['p99_ms']:>10.3f} "
+              f"{result['max_ms']:>10.3f} {result['peak_kb']:>11,.0f}")
+
+def compare(before: dict, after: dict, threshold: float) -> list:
+    """Print how each benchmark changed between two results files.
+    Parameters: before, after (dict): Results, as saved by --output.
+                threshold (float): How many times slower (p50) or bigger (peak memory) counts as a regression.
+    Returns: list[str]: Names of the benchmarks that regressed."""
+    regressions = []
+    print(f"{'benchmark':<31} {'p50 before':>11} {'p50 after':>11} {'change':>8} {'peak before':>12} {'peak after':>11}")
+    for name, new in after["results"].items():
+        old = before["results"].get(name)
+        if old is None:
+            print(f"{name:<31} {'-':>11} {new['p50_ms']:>11.3f}      new")
+            continue
+        ratio = new["p50_ms"] / old["p50_ms"] if old["p50_ms"] else 1.0
+        memory_ratio = new["peak_kb"] / old["peak_kb"] if old["peak_kb"] else 1.0
+        regressed = ratio > threshold or memory_ratio > threshold
+        if regressed:
+            regressions.append(name)
+        print(f"{name:<31} {old['p50_ms']:>11.3f} {new['p50_ms']:>11.3f} {ratio:>7.2f}x "
+              f"{old['peak_kb']:>12,.0f} {new['peak_kb']:>11,.0f}{'  <-- slower' if regressed else ''}")
+    return regressions
+
+def main(argv: list = None) -> int:
+    """Run the suite (or compare two results files).
+    Parameters: argv (list[str], optional): Command line arguments (default sys.argv).
+    Returns: int: 0, or 1 if --compare found a regression."""
+    parser = argparse.ArgumentParser(description="Benchmark TO DO.'s hot paths.")
+    parser.add_argument("--tasks", type=int, nargs="*", default=[10, 10_000, 1_000_000], help="task list sizes")
+    parser.add_argument("--users", type=int, nargs="*", default=[1_000, 100_000, 1_000_000], help="numbers of accounts")
+    parser.add_argument("--repeat", type=int, default=50, help="timed runs per benchmark (fewer for big datasets)")
+    parser.add_argument("--fsync", action="store_true", help="keep fsync on while saving")
+    parser.add_argument("--output", help="save the results as JSON to this file")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="compare two results files")
+    parser.add_argument("--threshold", type=float, default=1.25, help="slowdown that counts as a regression")
+    options = parser.parse_args(argv)
+
+    if options.compare:
+        reports = []
+        for path in options.compare:
+            with open(path) as file:
+                reports.append(json.load(file))
+        regressions = compare(*reports, options.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+        return 1 if regressions else 0
+
+    report = run_suite(options.tasks, options.users, options.repeat, options.fsync)
+    print_results(report)
+    if options.output:
+        with open(options.output, "w") as file:
+            json.dump(report, file, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
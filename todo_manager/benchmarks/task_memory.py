@@ -0,0 +1,58 @@
+"""task_memory.py: measures how much memory task objects use.
+
+Imports:
+- sys: Reads the task count from the command line.
+- tracemalloc: Python's built-in memory tracer, counts every byte allocated while tasks are created.
+- tasks: Custom file with the Task and PriorityTask classes being measured.
+
+Compares the current slotted Task/PriorityTask (with an IntEnum priority) against the old
+dict-backed classes with a string priority, for the same list of tasks.
+Run with: python3 -m benchmarks.task_memory [number of tasks]"""
+
+import sys
+import tracemalloc
+from tasks import Task, PriorityTask
+
+# ========= The old task classes, for comparison =========
+class DictTask:
+    """The original Task: every object has its own __dict__."""
+    def __init__(self, title: str) -> None:
+        self.title = title
+        self.completed = False
+
+class DictPriorityTask(DictTask):
+    """The original PriorityTask: priority stored as a string."""
+    def __init__(self, title: str, priority: str) -> None:
+        super().__init__(title)
+        self.priority = priority
+
+# ========= Measure =========
+def measure(task_class, priority_class, count: int) -> int:
+    """Create count tasks (every third one a priority task) and return the memory they use.
+    Titles are made before measuring, so only the task objects and the list are counted.
+    Parameters: task_class, priority_class: The classes to create.
+                count (int): Number of tasks.
+    Returns: int: Bytes allocated."""
+    titles = [f"Task number {i}" for i in range(count)]
+    labels = ["High", "Medium", "Low"]
+    tracemalloc.start()
+    tasks = [priority_class(title, labels[i % 3]) if i % 3 == 0 else task_class(title)
+             for i, title in enumerate(titles)]
+    used, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del tasks
+    return used
+
+def main(count: int = 100_000) -> None:
+    """Print memory per task for the old and new classes.
+    Parameters: count (int): Number of tasks to create.
+    Returns: None"""
+    old = measure(DictTask, DictPriorityTask, count)
+    new = measure(Task, PriorityTask, count)
+    print(f"{count:,} tasks")
+    print(f"  dict-backed classes: {old / 1024 / 1024:8.2f} MiB ({old / count:6.1f} bytes/task)")
+    print(f"  slotted classes:     {new / 1024 / 1024:8.2f} MiB ({new / count:6.1f} bytes/task)")
+    print(f"  saved {100 * (old - new) / old:.0f}%")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
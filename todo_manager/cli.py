@@ -0,0 +1,233 @@
+"""cli.py: use TO DO. from scripts, one command at a time, without the menus.
+
+Imports:
+- argparse: Reads the command and options typed after cli.py.
+- json: Prints tasks as JSON for list --json.
+- os: Reads the password from the TODO_PASSWORD environment variable.
+- sys: Reads bulk input from stdin and sets the exit code.
+- getpass: Asks for the password if it isn't in TODO_PASSWORD (and a person is typing).
+- styling: Custom file for styling the terminal, switched to headless so no banners or screen clears are printed.
+- tasks: Custom file with Task, PriorityTask and TaskList.
+- task_io: Custom file that streams task files (JSON, JSON Lines, CSV) one record at a time.
+- user: Custom file with User, used to check the username and password.
+
+Every command loads the user's tasks once, applies the whole batch, and saves once.
+Examples:
+    python3 todo_manager/cli.py --user bob add "Buy milk" "Call mum" --priority High
+    cat titles.txt | python3 todo_manager/cli.py --user bob add -
+    python3 todo_manager/cli.py --user bob list --todo
+    python3 todo_manager/cli.py --user bob complete 1 3 5
+    python3 todo_manager/cli.py --user bob complete --id 3f9a0c2b7d41e8a6   # IDs from list --json never change
+    python3 todo_manager/cli.py --user bob delete --completed
+    python3 todo_manager/cli.py --user bob export backup.json
+    python3 todo_manager/cli.py --user bob import archive.jsonl
+    python3 todo_manager/cli.py --user bob export - --format csv > tasks.csv
+Exit codes: 0 = done, 1 = wrong username or password, 2 = bad command, task number or file."""
+
+import argparse
+import json
+import os
+import sys
+from getpass import getpass
+import styling
+from tasks import Task, PriorityTask, TaskList
+from task_io import FORMATS, format_for
+from user import User
+
+# ========= Helpers =========
+def fail(message: str, code: int = 2) -> int:
+    """Print an error message to stderr.
+    Parameters: message (str): What went wrong.
+                code (int): The exit code to return.
+    Returns: int: The exit code."""
+    print(f"todo: {message}", file=sys.stderr)
+    return code
+
+def read_lines(values: list) -> list:
+    """Return the command line values, or the lines of stdin if the only value is "-".
+    Parameters: values (list[str]): Values typed on the command line.
+    Returns: list[str]: The values, with blank lines skipped."""
+    if values == ["-"]:
+        return [line.strip() for line in sys.stdin if line.strip()]
+    return values
+
+def task_numbers(values: list) -> list:
+    """Turn task numbers (1-based, as shown in the app) into list indexes.
+    Parameters: values (list[str]): Task numbers typed on the command line or read from stdin.
+    Returns: list[int]: The 0-based indexes.
+    Raises: ValueError: If a value isn't a whole number."""
+    return [int(value) - 1 for value in read_lines(values)]
+
+def id_positions(task_list: TaskList, values: list) -> list:
+    """Turn task IDs (as shown by list --json) into list indexes, checking every one is a task before anything
+    is changed, so a bad ID means nothing is saved.
+    Parameters: task_list (TaskList): The user's tasks.
+                values (list[str]): IDs typed on the command line, or - to read them from stdin.
+    Returns: list[int]: The 0-based indexes, without repeats.
+    Raises: ValueError: Naming the first ID that isn't a task."""
+    positions = {}
+    for task_id in read_lines(values):
+        positions[task_id] = task_list.position_of(task_id)
+        if positions[task_id] is None:
+            raise ValueError(f"No task with ID {task_id}")
+    return list(dict.fromkeys(positions.values()))
+
+def open_file(path: str, mode: str):
+    """Open a file, or stdin/stdout for "-".
+    Parameters: path (str): File path, or "-".
+                mode (str): "r" or "w".
+    Returns: file: The open file."""
+    if path == "-":
+        return sys.stdin if mode == "r" else sys.stdout
+    return open(path, mode, newline="") # newline="" so CSV files keep their own line endings
+
+# ========= Log in =========
+def login(username: str) -> bool:
+    """Check the user's password, from TODO_PASSWORD or typed in if a person is at the terminal.
+    Parameters: username (str): The user to log in as.
+    Returns: bool: True if the username and password are correct."""
+    password = os.environ.get("TODO_PASSWORD")
+    if password is None:
+        if not sys.stdin.isatty():
+            return False # Can't ask a script for a password
+        password = getpass(f"Password for {username}: ")
+    return User().verify_login(username, password)
+
+# ========= Commands =========
+def cmd_add(task_list: TaskList, args) -> int:
+    """Add tasks from the command line or stdin."""
+    titles = read_lines(args.titles)
+    too_long = [title for title in titles if len(title) > 100]
+    if too_long:
+        return fail(f"task titles must be less than 100 characters: {too_long[0][:40]}...")
+    if args.priority:
+        tasks = [PriorityTask(title, args.priority) for title in titles]
+    else:
+        tasks = [Task(title) for title in titles]
+    print(f"Added {task_list.add_tasks(tasks)} tasks")
+    return 0
+
+def cmd_list(task_list: TaskList, args) -> int:
+    """Print tasks, one per line: number, done/todo, priority, title (tab separated), or as JSON."""
+    completed = True if args.done else False if args.todo else None
+    records = task_list.filter_tasks(completed, args.priority) # With SQLite, an index lookup
+    if args.json:
+        json.dump(records, sys.stdout, indent=2)
+        print()
+    else:
+        for record in records:
+            print(f"{record['number']}\t{'done' if record['completed'] else 'todo'}\t"
+                  f"{record.get('priority') or '-'}\t{record['title']}")
+    return 0
+
+def cmd_complete(task_list: TaskList, args) -> int:
+    """Mark tasks complete by number or ID, or all of them (optionally only one priority)."""
+    if args.all:
+        print(f"Completed {task_list.complete_all(args.priority)} tasks")
+        return 0
+    indices = id_positions(task_list, args.numbers) if args.id else task_numbers(args.numbers)
+    print(f"Completed {task_list.complete_tasks(indices)} tasks") # All or nothing, saved once
+    return 0
+
+def cmd_delete(task_list: TaskList, args) -> int:
+    """Delete tasks by number or ID, or every completed task."""
+    if args.completed:
+        print(f"Deleted {task_list.delete_completed()} tasks")
+        return 0
+    indices = id_positions(task_list, args.numbers) if args.id else task_numbers(args.numbers)
+    print(f"Deleted {task_list.delete_tasks(indices)} tasks") # All or nothing, saved once
+    return 0
+
+def cmd_import(task_list: TaskList, args) -> int:
+    """Add tasks from a JSON, JSON Lines or CSV file, streamed one record at a time."""
+    fmt = format_for(args.file, args.format)
+    file = open_file(args.file, "r")
+    try:
+        print(f"Imported {task_list.import_tasks(file, fmt)} tasks")
+    finally:
+        if file is not sys.stdin:
+            file.close()
+    return 0
+
+def cmd_export(task_list: TaskList, args) -> int:
+    """Write every task to a JSON, JSON Lines or CSV file, one record at a time."""
+    fmt = format_for(args.file, args.format)
+    file = open_file(args.file, "w")
+    try:
+        task_list.export_tasks(file, fmt)
+    finally:
+        if file is not sys.stdout:
+            file.close()
+    return 0
+
+# ========= Command line options =========
+def build_parser() -> argparse.ArgumentParser:
+    """Set up the commands and options.
+    Returns: ArgumentParser: The parser for the command line."""
+    parser = argparse.ArgumentParser(prog="todo", description="TO DO. for scripts: manage a user's tasks without the menus.")
+    parser.add_argument("--user", required=True, help="username (password from TODO_PASSWORD, or asked for)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    priorities = ["High", "Medium", "Low"]
+
+    add = commands.add_parser("add", help="add tasks (titles, or - to read one per line from stdin)")
+    add.add_argument("titles", nargs="+")
+    add.add_argument("--priority", choices=priorities)
+    add.set_defaults(run=cmd_add)
+
+    show = commands.add_parser("list", help="list tasks")
+    state = show.add_mutually_exclusive_group()
+    state.add_argument("--done", action="store_true", help="only completed tasks")
+    state.add_argument("--todo", action="store_true", help="only tasks not completed yet")
+    show.add_argument("--priority", choices=priorities)
+    show.add_argument("--json", action="store_true", help="print as JSON")
+    show.set_defaults(run=cmd_list)
+
+    complete = commands.add_parser("complete", help="mark tasks complete (numbers, or - for stdin)")
+    complete.add_argument("numbers", nargs="*")
+    complete.add_argument("--all", action="store_true", help="every task (use --priority to limit)")
+    complete.add_argument("--priority", choices=priorities)
+    complete.add_argument("--id", action="store_true", help="the values are task IDs (from list --json), not numbers")
+    complete.set_defaults(run=cmd_complete)
+
+    delete = commands.add_parser("delete", help="delete tasks (numbers, or - for stdin)")
+    delete.add_argument("numbers", nargs="*")
+    delete.add_argument("--completed", action="store_true", help="every completed task")
+    delete.add_argument("--id", action="store_true", help="the values are task IDs (from list --json), not numbers")
+    delete.set_defaults(run=cmd_delete)
+
+    importer = commands.add_parser("import", help="add tasks from a .json, .jsonl or .csv file (- for stdin)")
+    importer.add_argument("file")
+    importer.add_argument("--format", choices=FORMATS, help="file format (default from the file extension, json for -)")
+    importer.set_defaults(run=cmd_import)
+
+    exporter = commands.add_parser("export", help="write tasks to a .json, .jsonl or .csv file (- or nothing for stdout)")
+    exporter.add_argument("file", nargs="?", default="-")
+    exporter.add_argument("--format", choices=FORMATS, help="file format (default from the file extension, json for -)")
+    exporter.set_defaults(run=cmd_export)
+    return parser
+
+# ========= Run a command =========
+def main(argv: list = None) -> int:
+    """Run one command for a user.
+    Parameters: argv (list[str], optional): Command line values (default sys.argv).
+    Returns: int: Exit code."""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command == "complete" and not (args.numbers or args.all):
+        parser.error("complete needs task numbers (or task IDs with --id), or --all")
+    if args.command == "delete" and not (args.numbers or args.completed):
+        parser.error("delete needs task numbers (or task IDs with --id), or --completed")
+    styling.set_headless(True) # No screen clears or banners
+    if not login(args.user):
+        return fail("wrong username or password (set TODO_PASSWORD)", 1)
+
+    task_list = TaskList(args.user)
+    try:
+        return args.run(task_list, args)
+    except (IndexError, ValueError, KeyError, TypeError) as e: # Bad task number, priority or import file
+        return fail(f"{e}")
+    except OSError as e: # Import/export file couldn't be opened
+        return fail(f"{e.filename}: {e.strerror}")
+
+if __name__ == "__main__":
+    sys.exit(main())
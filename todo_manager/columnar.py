@@ -0,0 +1,199 @@
+"""columnar.py: stores a very long task list as columns instead of one object per task.
+
+Imports:
+- array: Compact arrays of small numbers (1 byte per task for done/not done and for priority).
+- sys: sys.intern shares one copy of titles that repeat (e.g. "Pay rent" every month).
+- numpy (optional): If installed, bulk changes and counts run as whole-array operations.
+  Only imported the first time a bulk operation needs it, so the app still starts quickly.
+
+Instead of a list of Task objects, ColumnarTaskStore keeps four parallel columns:
+    titles    ["Homework", "Pay gas bill", ...]
+    completed array('b', [0, 1, ...])      1 = done
+    priority  array('b', [0, 1, ...])      0 = no priority, 1 = High, 2 = Medium, 3 = Low
+    ids       ["3f9a0c2b7d41e8a6", ...]    each task's ID (see task_ids.py)
+It acts like a list of tasks (len, index, loop, append, pop), building Task objects only when asked,
+so TaskList can use it in place of its normal list. Bulk operations like "complete all High" work
+directly on the columns in a single pass."""
+
+import sys
+from array import array
+
+NO_PRIORITY = 0 # Priority code for a plain Task
+
+_numpy = None # numpy module, False if it isn't installed, None if not checked yet
+
+def get_numpy():
+    """Import numpy the first time it's needed.
+    Returns: module: numpy, or None if it isn't installed."""
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+            _numpy = numpy
+        except ImportError:
+            _numpy = False
+    return _numpy or None
+
+# ========= Columnar task store =========
+class ColumnarTaskStore:
+    """A list-like container of tasks, stored as columns.
+    Purpose: Low memory use and single-pass bulk operations for huge task lists.
+    Methods: __init__, append_values, __len__, __iter__, __getitem__, __setitem__, append, pop, to_records, iter_records,
+        iter_ids, complete_where, delete_completed, counts_by_priority.
+    Variables: titles (list[str]), completed (array), priority (array), ids (list[str]), make_task (function),
+        use_numpy (bool)."""
+
+    def __init__(self, make_task, use_numpy: bool = True) -> None:
+        """Create empty columns.
+        Parameters: make_task (function): Builds a task from (title, completed, priority code, ID).
+                    use_numpy (bool): Use numpy for bulk operations when it's installed.
+        Returns: None"""
+        self.make_task = make_task
+        self.use_numpy = use_numpy
+        self.titles = []
+        self.completed = array('b')
+        self.priority = array('b')
+        self.ids = []
+
+    def append_values(self, title: str, completed: bool, code: int, task_id: str) -> None:
+        """Add one task to the end of the columns, without building a Task object.
+        Parameters: title (str): The task title.
+                    completed (bool): True if the task is done.
+                    code (int): Priority code (0 = no priority, 1 = High, 2 = Medium, 3 = Low).
+                    task_id (str): The task's ID.
+        Returns: None"""
+        self.titles.append(sys.intern(title))
+        self.completed.append(1 if completed else 0)
+        self.priority.append(code)
+        self.ids.append(task_id)
+
+    # ===== List behaviour =====
+    def __len__(self) -> int:
+        """Returns: int: Number of tasks."""
+        return len(self.titles)
+
+    def __iter__(self):
+        """Loop over the tasks, building each Task object as it's reached."""
+        make_task = self.make_task
+        for title, completed, code, task_id in zip(self.titles, self.completed, self.priority, self.ids):
+            yield make_task(title, completed, code, task_id)
+
+    def __getitem__(self, index):
+        """Get the task at an index (or a list of tasks for a slice).
+        Parameters: index (int or slice): Position(s) in the list.
+        Returns: Task or list[Task]: Newly built task object(s)."""
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        return self.make_task(self.titles[index], self.completed[index], self.priority[index], self.ids[index])
+
+    def __setitem__(self, index: int, task) -> None:
+        """Write a (changed) task back into the columns.
+        Parameters: index (int): Position in the list.
+                    task (Task): The task to store there.
+        Returns: None"""
+        self.titles[index] = sys.intern(task.title)
+        self.completed[index] = 1 if task.completed else 0
+        self.priority[index] = int(getattr(task, "level", NO_PRIORITY))
+        self.ids[index] = task.id
+
+    def append(self, task) -> None:
+        """Add a task to the end of the list.
+        Parameters: task (Task): The task to add.
+        Returns: None"""
+        self.append_values(task.title, task.completed, int(getattr(task, "level", NO_PRIORITY)), task.id)
+
+    def pop(self, index: int = -1):
+        """Remove and return the task at an index.
+        Parameters: index (int): Position in the list (default last).
+        Returns: Task: The removed task."""
+        task = self[index]
+        del self.titles[index]
+        del self.completed[index]
+        del self.priority[index]
+        del self.ids[index]
+        return task
+
+    def to_records(self, label_for) -> list:
+        """Return every task as a saveable dict record, straight from the columns (no Task objects).
+        Parameters: label_for (function): Turns a priority code into its label, e.g. 1 -> "High".
+        Returns: list[dict]: One record per task, in list order."""
+        return list(self.iter_records(label_for))
+
+    def iter_records(self, label_for):
+        """Yield every task as a saveable dict record one at a time, straight from the columns.
+        Parameters: label_for (function): Turns a priority code into its label, e.g. 1 -> "High".
+        Yields: dict: One record per task, in list order."""
+        for title, completed, code, task_id in zip(self.titles, self.completed, self.priority, self.ids):
+            if code == NO_PRIORITY:
+                yield {"title": title, "completed": bool(completed), "type": "Task", "id": task_id}
+            else:
+                yield {"title": title, "completed": bool(completed), "type": "PriorityTask", "id": task_id,
+                       "priority": label_for(code)}
+
+    def iter_ids(self):
+        """Returns: iterator: Every task's ID, in list order."""
+        return iter(self.ids)
+
+    # ===== Bulk operations =====
+    def _numpy_views(self):
+        """Returns: tuple: numpy views of (completed, priority) sharing memory with the arrays,
+        or None if numpy isn't being used. Views must be dropped before the arrays change size."""
+        np = get_numpy() if self.use_numpy else None
+        if np is None or not self.titles:
+            return None
+        return np.frombuffer(self.completed, dtype=np.int8), np.frombuffer(self.priority, dtype=np.int8)
+
+    def complete_where(self, code: int = None) -> int:
+        """Mark every task (or every task with one priority) as done, in a single pass.
+        Parameters: code (int): Priority code to match, e.g. 1 for High. None for every task.
+        Returns: int: Number of tasks that were not done before."""
+        views = self._numpy_views()
+        if views is not None:
+            done, prio = views
+            match = (done == 0) if code is None else (done == 0) & (prio == code)
+            changed = int(match.sum())
+            done[match] = 1
+            return changed
+        if code is None:
+            changed = self.completed.count(0)
+            self.completed = array('b', b"\x01" * len(self.completed))
+            return changed
+        changed = 0
+        for i, task_code in enumerate(self.priority):
+            if task_code == code and not self.completed[i]:
+                self.completed[i] = 1
+                changed += 1
+        return changed
+
+    def delete_completed(self) -> int:
+        """Remove every done task, in a single pass.
+        Returns: int: Number of tasks removed."""
+        views = self._numpy_views()
+        if views is not None:
+            done, prio = views
+            keep = done == 0
+            removed = len(self.titles) - int(keep.sum())
+            kept_list = keep.tolist()
+            self.titles = [title for title, kept in zip(self.titles, kept_list) if kept]
+            self.ids = [task_id for task_id, kept in zip(self.ids, kept_list) if kept]
+            new_priority = prio[keep].tobytes()
+            del done, prio, views # Release the views so the arrays can be replaced
+            self.priority = array('b', new_priority)
+            self.completed = array('b', bytes(len(self.titles)))
+            return removed
+        keep = [i for i, done in enumerate(self.completed) if not done]
+        removed = len(self.titles) - len(keep)
+        self.titles = [self.titles[i] for i in keep]
+        self.ids = [self.ids[i] for i in keep]
+        self.priority = array('b', [self.priority[i] for i in keep])
+        self.completed = array('b', bytes(len(keep)))
+        return removed
+
+    def counts_by_priority(self) -> dict:
+        """Count tasks for each priority code, in a single pass over the priority column.
+        Returns: dict: Priority code (0 = no priority) -> number of tasks."""
+        views = self._numpy_views()
+        if views is not None:
+            counts = get_numpy().bincount(views[1], minlength=4)
+            return {code: int(counts[code]) for code in range(4)}
+        return {code: self.priority.count(code) for code in range(4)}
@@ -0,0 +1,75 @@
+"""config.py: app settings for TO DO. that can be changed with environment variables.
+
+Imports:
+- os: Reads environment variables so settings can be changed without editing code.
+
+Settings:
+- DATA_DIR: Folder where users and tasks are saved.
+- TASK_STORAGE: How tasks are saved - "json" (rewrite the whole file), "journal" (append each change), "mapped" (json plus an index, so long lists show instantly) or "sqlite".
+- TASK_FORMAT: Format tasks files are saved in - "compact" (one-line JSON), "json" (pretty-printed JSON) or "msgpack" (binary, needs msgpack). Files in any format are always read.
+- JOURNAL_COMPACT_EVERY: How many journal changes to keep before folding them back into the main file.
+- FLUSH_INTERVAL: Seconds to wait for a burst of task changes to settle before saving them all at once (0 = save every change straight away).
+- BACKUP_COUNT: Number of previous versions of each tasks file and users.json to keep as .bak files (0 for none).
+- FSYNC_WRITES: Wait for every save to reach the disk before carrying on (safer, but slower on some disks).
+- FILE_LOCKING: Lock each file while it's being saved, so several copies of the app can share the data folder.
+- CACHE_LISTS: Most users' task lists to keep loaded in memory at once (for users who come back, and the HTTP API).
+- CACHE_MB: Most memory (in MB) those kept task lists may use before the least recently used are saved and dropped.
+- COLUMNAR_TASKS: Keep tasks in memory as columns (less memory, fast bulk changes) instead of a list of objects.
+- USER_STORAGE: How user accounts are saved - "json" (data/users.json), "sharded" (split across the files in data/users/) or "sqlite".
+- USER_SHARDS: Number of shard files a new "sharded" user store is split into (change an existing one with sharded_users.py).
+- DATABASE_FILE: The SQLite database file used when either storage is "sqlite".
+- BCRYPT_ROUNDS: bcrypt cost for new password hashes. Older hashes are updated on the next login.
+- HASH_WORKERS: Number of worker threads that run bcrypt for async password checks.
+- STARTUP_BUDGET_MS: Longest the app may take to import before startup_check.py fails.
+- HEADLESS: Never clear the screen or show the title banner (for scripts and automated runs).
+- PAGE_SIZE: Number of tasks shown per page of the task table.
+- DIFF_FRAMES: Redraw only the lines of a menu screen that changed, instead of clearing and drawing it all again.
+- SERVER_HOST / SERVER_PORT: Where server.py listens for HTTP requests (local only by default).
+- SERVER_MAX_BODY: Largest request body (in bytes) server.py will accept.
+- METRICS_FILE: File to save timings of saves, loads, password checks and drawing to, at exit and on SIGUSR1 (blank = metrics off).
+- METRICS_FORMAT: "json" or "prometheus" (blank = prometheus for .prom/.txt files, otherwise json)."""
+
+import os
+
+# ========= Data folder =========
+DATA_DIR = os.environ.get("TODO_DATA_DIR", "data")
+
+# ========= Task storage =========
+TASK_STORAGE = os.environ.get("TODO_TASK_STORAGE", "json")
+TASK_FORMAT = os.environ.get("TODO_TASK_FORMAT", "compact")
+JOURNAL_COMPACT_EVERY = int(os.environ.get("TODO_JOURNAL_COMPACT_EVERY", "500"))
+FLUSH_INTERVAL = float(os.environ.get("TODO_FLUSH_INTERVAL", "0"))
+BACKUP_COUNT = int(os.environ.get("TODO_BACKUP_COUNT", "1"))
+FSYNC_WRITES = os.environ.get("TODO_FSYNC", "1").lower() not in ("0", "false", "no")
+FILE_LOCKING = os.environ.get("TODO_FILE_LOCKING", "1").lower() not in ("0", "false", "no")
+CACHE_LISTS = int(os.environ.get("TODO_CACHE_LISTS", "32"))
+CACHE_MB = float(os.environ.get("TODO_CACHE_MB", "256"))
+COLUMNAR_TASKS = os.environ.get("TODO_COLUMNAR_TASKS", "").lower() in ("1", "true", "yes")
+
+# ========= User storage =========
+USER_STORAGE = os.environ.get("TODO_USER_STORAGE", "json")
+USER_SHARDS = int(os.environ.get("TODO_USER_SHARDS", "64"))
+
+# ========= SQLite =========
+DATABASE_FILE = os.environ.get("TODO_DATABASE_FILE", os.path.join(DATA_DIR, "todo.db"))
+
+# ========= Password hashing =========
+BCRYPT_ROUNDS = int(os.environ.get("TODO_BCRYPT_ROUNDS", "12"))
+HASH_WORKERS = int(os.environ.get("TODO_HASH_WORKERS", str(os.cpu_count() or 2)))
+
+# ========= Startup =========
+STARTUP_BUDGET_MS = float(os.environ.get("TODO_STARTUP_BUDGET_MS", "100"))
+
+# ========= Screen =========
+HEADLESS = os.environ.get("TODO_HEADLESS", "").lower() in ("1", "true", "yes")
+PAGE_SIZE = int(os.environ.get("TODO_PAGE_SIZE", "20"))
+DIFF_FRAMES = os.environ.get("TODO_DIFF_FRAMES", "").lower() in ("1", "true", "yes")
+
+# ========= HTTP API =========
+SERVER_HOST = os.environ.get("TODO_SERVER_HOST", "127.0.0.1")
+SERVER_PORT = int(os.environ.get("TODO_SERVER_PORT", "8080"))
+SERVER_MAX_BODY = int(os.environ.get("TODO_SERVER_MAX_BODY", str(1024 * 1024)))
+
+# ========= Metrics =========
+METRICS_FILE = os.environ.get("TODO_METRICS_FILE", "")
+METRICS_FORMAT = os.environ.get("TODO_METRICS_FORMAT", "").lower()
@@ -1,27 +1,27 @@
-# Emoji variables using the third-party emoji library
-
-import emoji
+# Emoji variables, written out as ready-made characters so nothing is converted when the app starts
+# (the same characters the third-party emoji library's emojize() returns for each :name:)
 
 # Main Menu Emojis
-emoji_person = emoji.emojize(':bust_in_silhouette:')      # 👤
-emoji_key = emoji.emojize(':key:')                        # 🔑
-emoji_smile = emoji.emojize(':grinning_face:')            # 😀
-emoji_door = emoji.emojize(':door:')                      # 🚪
+emoji_person = "👤"                # :bust_in_silhouette:
+emoji_key = "🔑"                   # :key:
+emoji_smile = "😀"                 # :grinning_face:
+emoji_door = "🚪"                  # :door:
 
 # Task Menu Emojis
-emoji_add = emoji.emojize(':pencil:')                     # ✏️
-emoji_list = emoji.emojize(':clipboard:')                 # 📋
-emoji_complete = emoji.emojize(':check_mark_button:')     # ✅
-emoji_incomplete = emoji.emojize(':white_large_square:')  # ⬜
-emoji_delete = emoji.emojize(':wastebasket:')             # 🗑️
-emoji_quit = emoji.emojize(':waving_hand:')               # 👋
+emoji_add = "✏️"                  # :pencil:
+emoji_list = "📋"                  # :clipboard:
+emoji_complete = "✅"              # :check_mark_button:
+emoji_incomplete = "⬜"            # :white_large_square:
+emoji_delete = "🗑️"               # :wastebasket:
+emoji_search = "🔍"                # :magnifying_glass_tilted_left:
+emoji_quit = "👋"                  # :waving_hand:
 
 # General Emojis
-emoji_cross = emoji.emojize(':cross_mark:')               # ❌
-emoji_interesting = emoji.emojize(':face_with_monocle:')  # 🧐
-emoji_lock = emoji.emojize(':locked:')                    # 🔒
+emoji_cross = "❌"                 # :cross_mark:
+emoji_interesting = "🧐"           # :face_with_monocle:
+emoji_lock = "🔒"                  # :locked:
 
 # Task Priority Emojis
-emoji_high = emoji.emojize(':red_circle:')                # 🔴
-emoji_medium = emoji.emojize(':orange_circle:')           # 🟠
-emoji_low = emoji.emojize(':yellow_circle:')              # 🟡
\ No newline at end of file
+emoji_high = "🔴"                  # :red_circle:
+emoji_medium = "🟠"                # :orange_circle:
+emoji_low = "🟡"                   # :yellow_circle:
@@ -0,0 +1,75 @@
+"""flusher.py: saves changes a short time after they stop coming in, instead of after every single one.
+
+Imports:
+- atexit: Makes sure anything still waiting is saved when the app exits.
+- threading: Runs the delayed save on a background timer.
+- time: Tracks how long changes have been waiting.
+
+How it works: every change calls touch(), which (re)starts a timer. When no change has come in for
+`interval` seconds, the timer calls flush() once for the whole burst. If changes keep coming in without a
+pause, they're still saved at least every `max_wait` seconds. Whatever is left is saved on close() or at exit."""
+
+import atexit
+import threading
+import time
+
+# ========= Debounced flusher =========
+class DebouncedFlusher:
+    """Calls a flush function once a burst of changes has settled down.
+    Purpose: Turn many quick saves (e.g. 1,000 adds) into one write, without losing anything at exit.
+    Methods: __init__, touch, flush_now, close.
+    Variables: flush (function), interval (float), max_wait (float)."""
+
+    def __init__(self, flush, interval: float, max_wait: float = None) -> None:
+        """Set up the flusher and make sure it flushes at exit.
+        Parameters: flush (function): Saves everything waiting and returns True if it worked. Called on a background
+                        thread by the timer.
+                    interval (float): Seconds without a change before flushing.
+                    max_wait (float, optional): Longest a change can wait while changes keep coming (default 10 x interval).
+        Returns: None"""
+        self.flush = flush
+        self.interval = interval
+        self.max_wait = max_wait if max_wait is not None else interval * 10
+        self._timer = None
+        self._first_change = None # When the oldest unsaved change came in
+        self._lock = threading.Lock()
+        atexit.register(self.flush_now)
+
+    def touch(self) -> None:
+        """Note that something changed: (re)start the timer, unless the oldest change has waited max_wait already.
+        Returns: None"""
+        with self._lock:
+            now = time.monotonic()
+            if self._first_change is None:
+                self._first_change = now
+            elif self._timer is not None and now - self._first_change >= self.max_wait:
+                return # Let the running timer fire instead of putting it off again
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.interval, self._run)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _run(self) -> None:
+        """Timer went off: flush everything waiting.
+        Returns: None"""
+        with self._lock:
+            self._timer = None
+            self._first_change = None
+        self.flush()
+
+    def flush_now(self) -> bool:
+        """Stop the timer and flush straight away.
+        Returns: bool: What the flush function returned (True if everything was saved)."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = None
+            self._first_change = None
+        return self.flush()
+
+    def close(self) -> bool:
+        """Flush anything waiting and stop flushing at exit (e.g. when the task list isn't needed any more).
+        Returns: bool: True if everything was saved."""
+        atexit.unregister(self.flush_now)
+        return self.flush_now()
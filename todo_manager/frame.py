@@ -0,0 +1,207 @@
+"""frame.py: draws each menu screen (banner, menu, table, messages and the question) with one terminal write.
+
+Imports:
+- io: StringIO, the buffer a screen is put together in.
+- contextlib: Makes frames() usable in a with block.
+- functools: wraps, so a framed menu keeps its name and docstring.
+- re: Removes colour codes when working out how wide a line is on screen.
+- shutil: Reads the terminal's size.
+- sys: Swaps sys.stdout for the buffer while a screen is being put together.
+- getpass: Asks for passwords without showing them.
+- config: Custom file with app settings (diff mode).
+- metrics: Custom file that times drawing each frame (when metrics are on).
+
+How it works: while a FrameRenderer is running, everything printed - print() and rich output from styling.py
+alike - goes into a buffer instead of the terminal. When the app asks a question (ask() or ask_secret()
+instead of input() and getpass()), the buffer and the question are written out in a single write, so a slow
+(e.g. SSH) connection gets the whole screen at once instead of a dozen small writes that flicker in one by one.
+In diff mode (TODO_DIFF_FRAMES=1) a screen that starts by clearing the terminal isn't cleared and redrawn:
+the cursor is moved to each line that changed since the previous screen and only those lines are written.
+Screens taller or wider than the terminal are always drawn in full, since lines would scroll or wrap."""
+
+import io
+from contextlib import contextmanager
+from functools import wraps
+import re
+import shutil
+import sys
+from getpass import getpass
+import config
+import metrics
+
+CLEAR = "\x1b[2J\x1b[H" # What styling.clear_screen() writes (clear, then cursor to the top left)
+ANSI_CODE = re.compile(r"\x1b\[[0-9;?]*[A-Za-z]")
+
+_active = None # The FrameRenderer putting the screen together, if one is running
+
+# ========= Asking questions =========
+def ask(prompt: str) -> str:
+    """input(), but the screen so far and the question are shown in one write first.
+    Parameters: prompt (str): The question.
+    Returns: str: What the user typed."""
+    return input(prompt) if _active is None else _active.ask(prompt)
+
+def ask_secret(prompt: str) -> str:
+    """getpass(), but the screen so far and the question are shown in one write first.
+    Parameters: prompt (str): The question.
+    Returns: str: What the user typed (never shown on screen)."""
+    return getpass(prompt) if _active is None else _active.ask(prompt, secret=True)
+
+@contextmanager
+def frames(diff: bool = None):
+    """Draw everything printed in a with block as frames, e.g. `with frames(): main_menu()`.
+    Menus inside other menus share the renderer that's already running.
+    Parameters: diff (bool): Only redraw the lines that changed (default config.DIFF_FRAMES).
+    Yields: FrameRenderer: The renderer that's running."""
+    if _active is not None:
+        yield _active
+        return
+    with FrameRenderer(diff) as renderer:
+        yield renderer
+
+def framed(menu):
+    """Decorator that draws a menu's screens as frames (see frames()).
+    Parameters: menu (function): The menu.
+    Returns: function: The menu, run inside frames()."""
+    @wraps(menu)
+    def wrapper(*args, **kwargs):
+        with frames():
+            return menu(*args, **kwargs)
+    return wrapper
+
+def screen_width(line: str) -> int:
+    """Returns: int: Roughly how many columns a line takes up (at most; wide characters like emoji count as 2)."""
+    return sum(2 if ord(char) > 0x1100 else 1 for char in ANSI_CODE.sub("", line))
+
+# ========= Frame buffer =========
+class FrameBuffer(io.StringIO):
+    """Stands in for sys.stdout while a screen is put together.
+    Purpose: Collect print() and rich output in order, without writing anything to the terminal.
+    Inheritance: Inherits from io.StringIO.
+    Methods: __init__, isatty, flush.
+    Variables: stream (file): The real stdout."""
+
+    def __init__(self, stream) -> None:
+        """Parameters: stream (file): The real stdout, the buffer is written to later.
+        Returns: None"""
+        super().__init__()
+        self.stream = stream
+
+    def isatty(self) -> bool:
+        """Returns: bool: Whether the real stdout is a terminal, so rich keeps its colours and clear codes."""
+        try:
+            return self.stream.isatty()
+        except (AttributeError, ValueError): # stdout replaced or closed
+            return False
+
+    def flush(self) -> None:
+        """Does nothing - rich flushes after every print, but the frame is only written when a question is asked.
+        Returns: None"""
+
+# ========= Frame renderer =========
+class FrameRenderer:
+    """Collects everything printed between two questions and draws it as one frame.
+    Purpose: Fewer terminal writes and less flicker for the menus.
+    Methods: __init__, __enter__, __exit__, show, ask, render.
+    Variables: diff (bool), stream (file), frames (int)."""
+
+    def __init__(self, diff: bool = None, stream=None) -> None:
+        """Set up the renderer (nothing is captured until it's used in a with block).
+        Parameters: diff (bool): Only redraw the lines that changed (default config.DIFF_FRAMES).
+                    stream (file): Where frames are written (default sys.stdout when the with block starts).
+        Returns: None"""
+        self.diff = config.DIFF_FRAMES if diff is None else diff
+        self.stream = stream
+        self.frames = 0 # Frames written so far
+        self._buffer = None
+        self._stdout = None # sys.stdout before the renderer started
+        self._outer = None  # The renderer that was running before this one
+        self._screen = None # Lines on the terminal since it was last cleared (None = not known)
+
+    def __enter__(self):
+        """Start putting frames together: sys.stdout is the buffer until the with block ends.
+        Returns: FrameRenderer: This renderer."""
+        global _active
+        self._stdout = sys.stdout
+        self.stream = self.stream or sys.stdout
+        self._buffer = FrameBuffer(self.stream)
+        self._outer, _active = _active, self
+        sys.stdout = self._buffer
+        return self
+
+    def __exit__(self, *exc_info) -> bool:
+        """Write anything still in the buffer (e.g. the goodbye banner) and put sys.stdout back.
+        Returns: bool: False, so errors carry on as normal."""
+        global _active
+        try:
+            self.show()
+        finally:
+            sys.stdout, _active = self._stdout, self._outer
+            self._buffer = None
+        return False
+
+    def show(self, prompt: str = "") -> None:
+        """Write everything printed since the last frame, plus a question, to the terminal in one write.
+        Parameters: prompt (str): The question to end the frame with.
+        Returns: None"""
+        text = self._buffer.getvalue() + prompt
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        if not text:
+            return
+        with metrics.timer("render.frame"):
+            self.stream.write(self.render(text))
+            self.stream.flush()
+        self.frames += 1
+
+    def ask(self, prompt: str, secret: bool = False) -> str:
+        """Show the frame with a question at the end, then read the answer from the real terminal.
+        Parameters: prompt (str): The question.
+                    secret (bool): Don't show what's typed (for passwords).
+        Returns: str: What the user typed."""
+        self.show(prompt)
+        sys.stdout = self._stdout # So input() can use line editing
+        try:
+            answer = getpass("") if secret else input()
+        finally:
+            sys.stdout = self._buffer
+        if self._screen is not None: # The terminal also shows the answer (if it's typed out) and the Enter
+            self._extend(("" if secret else answer) + "\n")
+        return answer
+
+    # ===== Diff mode =====
+    def render(self, text: str) -> str:
+        """Work out what to write for a frame.
+        Parameters: text (str): The frame, as printed.
+        Returns: str: The frame itself, or in diff mode (for a frame that clears the screen) only the
+            cursor moves and lines needed to turn the previous screen into this one."""
+        if not self.diff:
+            return text
+        start = text.rfind(CLEAR)
+        if start == -1: # Carries on below what's already on screen
+            if self._screen is not None:
+                self._extend(text)
+            return text
+        lines = text[start + len(CLEAR):].split("\n")
+        old, self._screen = self._screen, lines
+        if old is None or not self._fits(lines):
+            return text
+        changes = [f"\x1b[{row + 1};1H{line}\x1b[K" for row, line in enumerate(lines[:-1])
+                   if row >= len(old) or old[row] != line]
+        changes.append(f"\x1b[{len(lines)};1H{lines[-1]}\x1b[J") # Cursor ends after the last line; clear what's below
+        return "".join(changes)
+
+    def _fits(self, lines: list) -> bool:
+        """Returns: bool: True if lines fit on the terminal without scrolling or wrapping."""
+        columns, rows = shutil.get_terminal_size()
+        return len(lines) < rows and all(screen_width(line) < columns for line in lines)
+
+    def _extend(self, text: str) -> None:
+        """Add text written below the current screen to what's known to be on the terminal.
+        Parameters: text (str): The text that was written.
+        Returns: None"""
+        pieces = text.split("\n")
+        self._screen[-1] += pieces[0]
+        self._screen.extend(pieces[1:])
+        if not self._fits(self._screen): # Scrolled or wrapped - redraw the next screen in full
+            self._screen = None
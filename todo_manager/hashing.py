@@ -0,0 +1,96 @@
+"""hashing.py: hashes and checks passwords with bcrypt, without holding up the rest of the app.
+
+Imports:
+- asyncio: Lets async code (like a web server) wait for a password check without blocking.
+- concurrent.futures: A pool of worker threads to run bcrypt on. bcrypt releases Python's GIL while
+  it works, so several logins can be checked at the same time on different CPU cores.
+- bcrypt: Securely hash and check passwords (so we don't store plain text passwords).
+- config: Custom file with app settings (bcrypt cost, number of workers).
+- metrics: Custom file that times each hash and check (when metrics are on).
+
+bcrypt, asyncio and the worker pool are only imported when a password is first hashed or checked,
+so starting the app doesn't wait for them."""
+
+import config
+import metrics
+
+# ========= Password hasher =========
+class PasswordHasher:
+    """Hashes and checks passwords using bcrypt with a configurable cost (work factor).
+    Purpose: Keep password hashing secure, tunable, and off the main thread when needed.
+    Methods: __init__, hash, check, hash_async, check_async, cost_of, needs_rehash, shutdown.
+    Variables: rounds (int), workers (int), executor (ThreadPoolExecutor)."""
+
+    def __init__(self, rounds: int = None, workers: int = None) -> None:
+        """Set up the hasher. The worker pool is only started the first time it's needed.
+        Parameters: rounds (int): bcrypt cost, each +1 doubles the work (default from config.BCRYPT_ROUNDS).
+                    workers (int): Number of worker threads (default from config.HASH_WORKERS).
+        Returns: None"""
+        self.rounds = rounds or config.BCRYPT_ROUNDS
+        self.workers = workers or config.HASH_WORKERS
+        self._executor = None
+
+    @property
+    def executor(self):
+        """Returns: ThreadPoolExecutor: The worker pool, started on first use."""
+        if self._executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+        return self._executor
+
+    @metrics.timed("bcrypt.hash")
+    def hash(self, password: str) -> bytes:
+        """Hash a password with a new salt at the configured cost.
+        Parameters: password (str): The plain text password to hash.
+        Returns: bytes: The hashed password."""
+        import bcrypt
+        return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=self.rounds))
+
+    @metrics.timed("bcrypt.check")
+    def check(self, password: str, hashed: bytes) -> bool:
+        """Check a plain text password against a hashed password.
+        Parameters: password (str): The plain text password to check.
+                    hashed (bytes): The hashed password to compare against.
+        Returns: bool: True if the password matches the hash, else False."""
+        import bcrypt
+        return bcrypt.checkpw(password.encode('utf-8'), hashed)
+
+    async def hash_async(self, password: str) -> bytes:
+        """Same as hash(), but runs in the worker pool so the event loop keeps going.
+        Parameters: password (str): The plain text password to hash.
+        Returns: bytes: The hashed password."""
+        import asyncio
+        return await asyncio.get_running_loop().run_in_executor(self.executor, self.hash, password)
+
+    async def check_async(self, password: str, hashed: bytes) -> bool:
+        """Same as check(), but runs in the worker pool so the event loop keeps going.
+        Parameters: password (str): The plain text password to check.
+                    hashed (bytes): The hashed password to compare against.
+        Returns: bool: True if the password matches the hash, else False."""
+        import asyncio
+        return await asyncio.get_running_loop().run_in_executor(self.executor, self.check, password, hashed)
+
+    def cost_of(self, hashed: bytes) -> int:
+        """Read the cost a hash was made with, e.g. b"$2b$12$..." -> 12.
+        Parameters: hashed (bytes): A bcrypt hash.
+        Returns: int: The cost, or None if the hash isn't in the expected format."""
+        try:
+            return int(hashed.split(b"$")[2])
+        except (IndexError, ValueError):
+            return None
+
+    def needs_rehash(self, hashed: bytes) -> bool:
+        """Check if a stored hash was made with a different cost to the one configured now.
+        Parameters: hashed (bytes): A bcrypt hash.
+        Returns: bool: True if the password should be hashed again after a successful login."""
+        cost = self.cost_of(hashed)
+        return cost is not None and cost != self.rounds
+
+    def shutdown(self) -> None:
+        """Stop the worker pool (if it was started).
+        Returns: None"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+default_hasher = PasswordHasher() # Shared by every User unless they're given their own
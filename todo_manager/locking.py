@@ -0,0 +1,67 @@
+"""locking.py: stops two copies of TO DO. (or two workers) saving the same file at the same time.
+
+Imports:
+- os: Makes sure the folder for the lock file exists, and reads a file's identity for its etag.
+- threading: Remembers which locks this thread already holds, so taking one twice doesn't wait forever.
+- contextlib: Makes file_lock usable in a with block.
+- fcntl (optional): The operating system's advisory file locks. Not available on Windows, where locking is skipped.
+- config: Custom file with app settings (FILE_LOCKING turns locking off).
+
+How it works: file_lock("data/bob_tasks.json") locks data/bob_tasks.json.lock until the with block ends.
+Any other process asking for the same lock waits. Locks are advisory - they only stop other copies of TO DO.,
+not other programs. file_etag() identifies the exact version of a file on disk, so a writer can tell if
+someone else changed the file since it last read it."""
+
+import os
+import threading
+from contextlib import contextmanager
+import config
+
+try:
+    import fcntl
+except ImportError: # Windows
+    fcntl = None
+
+_local = threading.local() # .held: lock path -> number of times this thread has taken it
+
+@contextmanager
+def file_lock(path: str):
+    """Hold an exclusive lock on a file (using a separate .lock file next to it) until the with block ends.
+    The same thread can take the same lock again inside the block without waiting for itself.
+    Parameters: path (str): The file to lock, e.g. data/bob_tasks.json.
+    Yields: None"""
+    if not config.FILE_LOCKING or fcntl is None:
+        yield
+        return
+    lock_path = path + ".lock"
+    held = getattr(_local, "held", None)
+    if held is None:
+        held = _local.held = {}
+    if lock_path in held: # This thread already has it
+        held[lock_path] += 1
+        try:
+            yield
+        finally:
+            held[lock_path] -= 1
+        return
+
+    os.makedirs(os.path.dirname(lock_path) or ".", exist_ok=True)
+    with open(lock_path, "a") as lock_file:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX) # Waits for any other holder
+        held[lock_path] = 1
+        try:
+            yield
+        finally:
+            del held[lock_path]
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+def file_etag(path: str) -> tuple:
+    """Identify the exact version of a file on disk. Saving replaces the file (new inode) and appending
+    changes its size, so any change made by another process gives a different etag.
+    Parameters: path (str): The file to check.
+    Returns: tuple: (inode, size, modified time in ns), or None if the file doesn't exist."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
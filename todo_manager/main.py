@@ -3,19 +3,23 @@ Features:
 Global objects: u for user management
 welcome_user(): Prints welcome message (new/returning)
 get_task_input(): Gets and validates task input, returns Task/PriorityTask
-task_menu(): Main task menu (add, view, complete, delete, exit app)
+task_menu(): Main task menu (add, view, complete, delete, search, exit app)
 handle_signup(): User signup flow
 handle_login(): User login flow
 handle_guest(): Guest user flow (tasks not saved)
 main_menu(): Main menu (signup, login, guest, exit app)
 App start: Shows rainbow art, title and runs main_menu()
+Menus draw each screen (banner, menu, table, messages and question) with one write, see frame.py
 ->: type hinting for better clarity"""
 
 from user import User, GuestUser
 from tasks import Task, PriorityTask, TaskList
-from utils import print_no_tasks, retry_task
+from storage import MemoryTaskStorage
+from registry import get_registry
+from utils import print_no_tasks, retry_task, browse_tasks, search_tasks
 from styling import * # Import all styling functions
-from emoji_library import emoji_person, emoji_key, emoji_door, emoji_smile, emoji_add, emoji_list, emoji_complete, emoji_delete, emoji_quit, emoji_interesting, emoji_cross, emoji_high, emoji_medium, emoji_low
+from frame import ask, frames, framed
+from emoji_library import emoji_person, emoji_key, emoji_door, emoji_smile, emoji_add, emoji_list, emoji_complete, emoji_delete, emoji_search, emoji_quit, emoji_interesting, emoji_cross, emoji_high, emoji_medium, emoji_low
 
 # ========== Global user objects =========
 u = User()
@@ -46,7 +50,7 @@ def get_task_input():
         Task: If non prioritised task
         PriorityTask: If user selects a priority
         None: If invalid task name entered"""
-    title = input("\nWhat task do you want to add? ").strip()
+    title = ask("\nWhat task do you want to add? ").strip()
     if not title:
         print_error("\nCome on, you gotta tell me what the task is!")
         return None
@@ -55,14 +59,14 @@ def get_task_input():
         return None
  
     while True:  # Loop until user enters 'y' or 'n' for priority task input
-        is_priority = input("\nIs this task important? (y/n): ").strip().lower()
+        is_priority = ask("\nIs this task important? (y/n): ").strip().lower()
         if is_priority == "y":
             while True:
                 print(f"\nHow important?")
                 print(f"\n1. {emoji_high} High")
                 print(f"2. {emoji_medium} Medium")
                 print(f"3. {emoji_low} Low")
-                priority_choice = input("\nPlease enter a number (1-3): ").strip()
+                priority_choice = ask("\nPlease enter a number (1-3): ").strip()
                 if priority_choice == "1":
                     priority = "High"
                     clear_screen()
@@ -84,8 +88,9 @@ def get_task_input():
             print_error(f"\n {emoji_interesting} Please type 'y' or 'n'.")
 
 # ========== Task Menu =========
+@framed # Each screen is drawn with one write, when the next question is asked
 def task_menu(task_list: TaskList, username: str) -> None:
-    """Main task menu for adding, seeing, completing, deleting tasks.
+    """Main task menu for adding, seeing, completing, deleting and searching tasks.
     Parameters:
         task_list (TaskList): The TaskList object for the logged in user
         username (str): The username of the logged in user
@@ -98,10 +103,11 @@ def task_menu(task_list: TaskList, username: str) -> None:
         print(f"2. {emoji_list} See all my tasks")
         print(f"3. {emoji_complete} Mark a task as done")
         print(f"4. {emoji_delete} Delete a task")
-        print(f"5. {emoji_quit} Exit TO DO. app")
+        print(f"5. {emoji_search} Search my tasks")
+        print(f"6. {emoji_quit} Exit TO DO. app")
         print("="*50)
 
-        choice = input("\nWhat would you like to do? (1-5): ")
+        choice = ask("\nWhat would you like to do? (1-6): ")
 
         if choice == "1": # Add a new task
             clear_screen()
@@ -115,7 +121,7 @@ def task_menu(task_list: TaskList, username: str) -> None:
         elif choice == "2": # See all tasks
             clear_screen()
             if task_list.get_tasks():
-                task_list.display_tasks()
+                browse_tasks(task_list) # One page at a time for long lists
             else:
                 print_no_tasks()
 
@@ -153,7 +159,16 @@ def task_menu(task_list: TaskList, username: str) -> None:
                     after_success_func=after_delete
                 )
 
-        elif choice == "5": # Exit the app
+        elif choice == "5": # Search tasks
+            clear_screen()
+            if task_list.get_tasks():
+                search_tasks(task_list)
+            else:
+                print_no_tasks()
+
+        elif choice == "6": # Exit the app
+            if not task_list.close(): # Save anything still waiting to be saved
+                print_error(f"\n{emoji_cross} Some of your latest changes couldn't be saved - see the error above.")
             print_rainbow_text("GOODBYE!")
             print_info(f"\nTHANKS FOR USING TO DO. - SEE YOU NEXT TIME!")
             return True  # Exit loop to end task and main menu
@@ -172,7 +187,7 @@ def handle_signup():
     username = u.register_user()
     if username:
         clear_screen() # clear screen after signup
-        task_list = TaskList(username)
+        task_list = get_registry().get(username) # Kept in memory if they were here recently
         welcome_user(username)
         return task_menu(task_list, username)
     return False
@@ -187,7 +202,7 @@ def handle_login():
     username = u.login_user()
     if username:
         clear_screen() # clear screen after login
-        task_list = TaskList(username)
+        task_list = get_registry().get(username) # Kept in memory if they were here recently
         welcome_user(username, is_returning=True)
         return task_menu(task_list, username)
     return False
@@ -203,14 +218,13 @@ def handle_guest() -> None:
     username = "Guest"
     clear_screen()
     print_info("Welcome to TODO. Please note: your tasks will NOT be saved after you exit.")
-    task_list = TaskList(username)
-    task_list.save_tasks = lambda: None # Disable saving
-    task_list.load_tasks = lambda: None # Disable loading
+    task_list = TaskList(username, storage=MemoryTaskStorage()) # Nothing is saved or loaded
     welcome_user(username)
     return task_menu(task_list, username)
 
         
 # ========== Main Menu =========
+@framed
 def main_menu() -> None:
     """Main menu for user to create account, login, guest or exit
     
@@ -223,7 +237,7 @@ def main_menu() -> None:
         print(f"4. {emoji_door} Exit")
         print("\n" + "="*50)
 
-        choice = input("\nWhat would you like to do? (Enter a number 1-4): ")
+        choice = ask("\nWhat would you like to do? (Enter a number 1-4): ")
 
         if choice == "1": # Create new account
             should_exit = handle_signup()
@@ -247,6 +261,7 @@ def main_menu() -> None:
 
 # ========= App Starting point / Shows title, runs main menu. =========
 if __name__ == "__main__":
-    clear_screen()
-    print_info("A TASK MANAGEMENT APP THAT HELPS YOU STAY ON TRACK")
-    main_menu()
\ No newline at end of file
+    with frames(): # The title is drawn in the same write as the first menu
+        clear_screen()
+        print_info("A TASK MANAGEMENT APP THAT HELPS YOU STAY ON TRACK")
+        main_menu()
\ No newline at end of file
@@ -0,0 +1,263 @@
+"""mapped.py: a read-only index of a tasks file that can be shown a page at a time without loading every task.
+
+Imports:
+- mmap: Maps the index file into memory, so the operating system only reads the parts that are used.
+- struct: Reads and writes the index header.
+- array: Builds the offsets column while the index is written.
+- storage: Custom file with JSONTaskStorage (the tasks file the index is built from), write_atomic and file_etag.
+- task_ids: Custom file with new_task_id, for tasks saved before tasks had IDs.
+
+How it works: next to data/bob_tasks.json, data/bob_tasks.json.idx holds the same tasks as
+    header   MAGIC, number of tasks, and the etag of the tasks file it was built from
+    status   one byte per task: priority code (0-3), plus 128 if completed
+    ids      each task's ID, as 16 ASCII characters
+    offsets  where each title starts (and where the last one ends), as 8-byte numbers
+    titles   every title as UTF-8, one after another
+Task n is read with two offset lookups and two slices, so showing a page of 20 tasks reads 20 titles,
+whatever the length of the list, and counting tasks by priority only reads the status bytes.
+The index is written whenever MappedTaskStorage saves, and rebuilt once if the tasks file was changed
+by anything else (its etag no longer matches). It is a cache for this computer only (native byte order)."""
+
+import mmap
+import struct
+from array import array
+from storage import JSONTaskStorage, write_atomic, file_etag
+from task_ids import new_task_id, ID_BYTES
+
+MAGIC = b"TODOIDX2" # Indexes from older versions (TODOIDX1, without IDs) are rebuilt
+HEADER = struct.Struct("=8sQQQq") # magic, task count, tasks file etag (inode, size, modified ns)
+COMPLETED = 128 # Status bit for a completed task
+ID_SIZE = ID_BYTES * 2 # Bytes per ID (hex characters)
+PRIORITY_CODES = {"High": 1, "Medium": 2, "Low": 3} # Same codes as tasks.Priority (0 = no priority)
+
+def index_file(filename: str) -> str:
+    """Returns: str: The index path for a tasks file, e.g. data/bob_tasks.json.idx."""
+    return filename + ".idx"
+
+# ========= Writing an index =========
+class IndexBuilder:
+    """Collects task records and writes them as an index file.
+    Purpose: Build the index in the same pass that saves (or reads) the tasks file.
+    Methods: __init__, add, collect, write.
+    Variables: status (bytearray), ids (bytearray), offsets (array), titles (list[bytes]), new_ids (int)."""
+
+    def __init__(self) -> None:
+        """Start with no tasks.
+        Returns: None"""
+        self.status = bytearray()
+        self.ids = bytearray()
+        self.offsets = array("Q", [0])
+        self.titles = []
+        self.new_ids = 0 # Records that had no ID and were given one
+
+    def add(self, record: dict) -> str:
+        """Add one task record (as made by Task.to_dict()). Records saved without an ID (or with one that doesn't
+        fit) get a new one, which is saved with the tasks file the next time it's saved.
+        Parameters: record (dict): The task record.
+        Returns: str: The task's ID (the new one, if it was given one)."""
+        code = PRIORITY_CODES.get(record.get("priority"), 2) if record.get("type") == "PriorityTask" else 0
+        self.status.append(code | (COMPLETED if record["completed"] else 0))
+        task_id = (record.get("id") or "").encode("ascii", "replace")
+        if not task_id or len(task_id) > ID_SIZE:
+            task_id = new_task_id().encode("ascii")
+            self.new_ids += 1
+        self.ids += task_id.ljust(ID_SIZE, b"\0")
+        title = record["title"].encode("utf-8")
+        self.titles.append(title)
+        self.offsets.append(self.offsets[-1] + len(title))
+        return task_id.decode("ascii")
+
+    def collect(self, records):
+        """Add each record while passing it on, so the tasks file and the index are built from one pass.
+        Parameters: records (iterable of dict): The task records.
+        Yields: dict: Each record, with its ID added if it didn't have one (so the file and index match)."""
+        for record in records:
+            task_id = self.add(record)
+            yield record if record.get("id") == task_id else dict(record, id=task_id)
+
+    def write(self, path: str, etag: tuple) -> None:
+        """Save the index atomically.
+        Parameters: path (str): The index file.
+                    etag (tuple): file_etag() of the tasks file the records came from.
+        Returns: None"""
+        padding = b"\0" * (-len(self.status) % 8) # Keep the offsets 8-byte aligned
+
+        def write(file):
+            file.write(HEADER.pack(MAGIC, len(self.status), *etag))
+            file.write(self.status + padding)
+            file.write(self.ids)
+            file.write(self.offsets.tobytes())
+            file.write(b"".join(self.titles))
+        write_atomic(path, write, binary=True)
+
+# ========= Reading an index =========
+class MappedTasks:
+    """A read-only, list-like view of the tasks in an index file. Tasks are only decoded when they're used.
+    Purpose: Show and count very long task lists straight away, without loading them.
+    Methods: __init__, __len__, __iter__, __getitem__, values, iter_values, iter_ids, iter_records, counts_by_priority,
+        close.
+    Variables: path (str), etag (tuple), make_task (function), read_only (bool, always True)."""
+    read_only = True # TaskList decodes the tasks into a list before changing them (see TaskList.is_view)
+
+    def __init__(self, path: str, make_task) -> None:
+        """Map an index file.
+        Parameters: path (str): The index file.
+                    make_task (function): Builds a task from (title, completed, priority code, ID).
+        Returns: None
+        Raises: ValueError: If the file isn't a complete index."""
+        with open(path, "rb") as file:
+            self._mm = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.path = path
+        self.make_task = make_task
+        magic, count, *etag = HEADER.unpack_from(self._mm) if len(self._mm) >= HEADER.size else (b"", 0)
+        if magic != MAGIC:
+            self._mm.close()
+            raise ValueError(f"{path} isn't a task index")
+        self.etag = tuple(etag)
+        self._count = count
+        self._status_at = HEADER.size
+        self._ids_at = self._status_at + count + (-count % 8)
+        offsets_at = self._ids_at + count * ID_SIZE
+        self._titles_at = offsets_at + (count + 1) * 8
+        if len(self._mm) < self._titles_at:
+            self._mm.close()
+            raise ValueError(f"{path} is incomplete")
+        self._offsets = memoryview(self._mm)[offsets_at:self._titles_at].cast("Q")
+        if len(self._mm) < self._titles_at + self._offsets[count]:
+            self._offsets.release()
+            self._mm.close()
+            raise ValueError(f"{path} is incomplete")
+
+    # ===== List behaviour =====
+    def __len__(self) -> int:
+        """Returns: int: Number of tasks."""
+        return self._count
+
+    def __iter__(self):
+        """Yields: Task: Each task, decoded as it's reached."""
+        for values in self.iter_values():
+            yield self.make_task(*values)
+
+    def __getitem__(self, index):
+        """Parameters: index (int or slice): Which task(s).
+        Returns: Task (or list of tasks for a slice), decoded from the index.
+        Raises: IndexError: If the index is out of range."""
+        if isinstance(index, slice):
+            return [self.make_task(*self.values(i)) for i in range(*index.indices(self._count))]
+        return self.make_task(*self.values(index))
+
+    def values(self, index: int) -> tuple:
+        """Decode one task without building a task object.
+        Parameters: index (int): The task's index (negative counts from the end).
+        Returns: tuple: (title, completed, priority code, ID).
+        Raises: IndexError: If the index is out of range."""
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("task index out of range")
+        start, end = self._offsets[index], self._offsets[index + 1]
+        status = self._mm[self._status_at + index]
+        title = self._mm[self._titles_at + start:self._titles_at + end].decode("utf-8")
+        id_at = self._ids_at + index * ID_SIZE
+        task_id = self._mm[id_at:id_at + ID_SIZE].rstrip(b"\0").decode("ascii")
+        return title, bool(status & COMPLETED), status & ~COMPLETED, task_id
+
+    def iter_values(self):
+        """Yields: tuple: (title, completed, priority code, ID) for every task, in order."""
+        titles = self._mm[self._titles_at:self._titles_at + self._offsets[self._count]]
+        status = self._mm[self._status_at:self._status_at + self._count]
+        offsets = self._offsets
+        ids = self.iter_ids()
+        for index in range(self._count):
+            yield (titles[offsets[index]:offsets[index + 1]].decode("utf-8"),
+                   bool(status[index] & COMPLETED), status[index] & ~COMPLETED, next(ids))
+
+    def iter_ids(self):
+        """Yields: str: Every task's ID, in order (without decoding the titles)."""
+        ids = self._mm[self._ids_at:self._ids_at + self._count * ID_SIZE]
+        for start in range(0, len(ids), ID_SIZE):
+            yield ids[start:start + ID_SIZE].rstrip(b"\0").decode("ascii")
+
+    def iter_records(self, label_for):
+        """Yield every task as a saveable record, like ColumnarTaskStore.iter_records.
+        Parameters: label_for (function): Turns a priority code into its label, e.g. 1 -> "High".
+        Yields: dict: One task record."""
+        for title, completed, code, task_id in self.iter_values():
+            if code:
+                yield {"title": title, "completed": completed, "type": "PriorityTask", "id": task_id,
+                       "priority": label_for(code)}
+            else:
+                yield {"title": title, "completed": completed, "type": "Task", "id": task_id}
+
+    def counts_by_priority(self) -> dict:
+        """Count tasks for each priority code, reading only the status bytes.
+        Returns: dict: Priority code (0 = no priority) -> number of tasks."""
+        status = self._mm[self._status_at:self._status_at + self._count]
+        return {code: status.count(code) + status.count(code | COMPLETED) for code in range(4)}
+
+    def close(self) -> None:
+        """Unmap the index file.
+        Returns: None"""
+        self._offsets.release()
+        self._mm.close()
+
+def open_index(path: str, etag: tuple, make_task):
+    """Open an index file if it was built from the current version of its tasks file.
+    Parameters: path (str): The index file.
+                etag (tuple): file_etag() of the tasks file now.
+                make_task (function): Builds a task from (title, completed, priority code, ID).
+    Returns: MappedTasks, or None if the index is missing, damaged or out of date."""
+    try:
+        tasks = MappedTasks(path, make_task)
+    except (OSError, ValueError):
+        return None
+    if tasks.etag != tuple(etag):
+        tasks.close()
+        return None
+    return tasks
+
+# ========= Storage =========
+class MappedTaskStorage(JSONTaskStorage):
+    """JSON task storage that also keeps an index of the tasks, so they can be viewed without loading them.
+    Purpose: Instant task views and counts for very long task lists ("mapped" in config.TASK_STORAGE).
+    Inheritance: Inherits from JSONTaskStorage (same tasks file, locking and backups).
+    Methods: __init__, save, view.
+    Variables: filename (str), index_file (str)."""
+
+    def __init__(self, filename: str) -> None:
+        """Set up the tasks file and its index.
+        Parameters: filename (str): Path to the tasks file.
+        Returns: None"""
+        super().__init__(filename)
+        self.index_file = index_file(filename)
+
+    def save(self, records) -> None:
+        """Save the tasks file, then the index built from the same records.
+        Parameters: records (iterable of dict): The task records to save.
+        Returns: None"""
+        builder = IndexBuilder()
+        super().save(builder.collect(records))
+        builder.write(self.index_file, file_etag(self.filename))
+
+    def view(self, make_task):
+        """Return the saved tasks as a read-only MappedTasks view, rebuilding the index first if the tasks file
+        changed since it was written (e.g. saved by another storage type or an older version). If the tasks were
+        saved before tasks had IDs, the tasks file is saved again with their new IDs, so they stay the same.
+        Parameters: make_task (function): Builds a task from (title, completed, priority code, ID).
+        Returns: MappedTasks, or an empty list if no tasks are saved yet.
+        Raises: json.JSONDecodeError: If the index has to be rebuilt and the tasks file is damaged."""
+        etag = file_etag(self.filename)
+        if etag is None:
+            return []
+        tasks = open_index(self.index_file, etag, make_task)
+        if tasks is None:
+            builder = IndexBuilder()
+            for record in JSONTaskStorage.iter_records(self):
+                builder.add(record)
+            if builder.new_ids:
+                self.save(JSONTaskStorage.iter_records(self)) # Reads the old file while the new one is written
+                etag = file_etag(self.filename)
+            else:
+                builder.write(self.index_file, etag)
+            tasks = open_index(self.index_file, etag, make_task)
+        return tasks
@@ -0,0 +1,179 @@
+"""metrics.py: counts and times the app's slow operations (saving, loading, bcrypt, drawing) to show where time goes.
+
+Imports:
+- threading: Stops two threads (e.g. server requests) updating the same numbers at the same time.
+- contextlib: nullcontext, the do-nothing timer handed out while metrics are off.
+- functools: wraps, so timed functions keep their name and docstring.
+- time: perf_counter for timing each operation.
+- config: Custom file with app settings (where and in what format to save the metrics).
+
+How it works: code marks its slow operations with @timed("tasks.save") or `with timer("bcrypt.check"):`,
+and reports bytes it wrote with add_bytes(). For each operation name the metrics keep the number of calls,
+the total and longest time, and the bytes written. They're off unless config.METRICS_FILE is set (or
+enable() is called). While off, a timed function only checks one flag before running, and timer() hands
+back the same do-nothing context manager, so leaving the marks in costs next to nothing.
+When on, the metrics are saved to the file when the app exits and whenever it gets SIGUSR1
+(e.g. `kill -USR1 <pid>`), as JSON or in the Prometheus text format (for node_exporter's textfile collector).
+json, atexit and signal are only imported when metrics are turned on or saved."""
+
+import threading
+from contextlib import nullcontext
+from functools import wraps
+from time import perf_counter
+import config
+
+enabled = False
+_stats = {} # operation name -> [calls, total seconds, longest seconds, bytes written]
+_lock = threading.Lock()
+_OFF = nullcontext()
+
+# ========= Recording =========
+def record(name: str, seconds: float = 0.0, nbytes: int = 0, calls: int = 1) -> None:
+    """Add one finished operation to the metrics (does nothing while metrics are off).
+    Parameters: name (str): The operation, e.g. "tasks.save".
+                seconds (float): How long it took.
+                nbytes (int): Bytes it wrote.
+                calls (int): Calls to count (0 to only add time or bytes).
+    Returns: None"""
+    if not enabled:
+        return
+    with _lock:
+        stats = _stats.get(name)
+        if stats is None:
+            stats = _stats[name] = [0, 0.0, 0.0, 0]
+        stats[0] += calls
+        stats[1] += seconds
+        if seconds > stats[2]:
+            stats[2] = seconds
+        stats[3] += nbytes
+
+def add_bytes(name: str, nbytes: int) -> None:
+    """Add bytes written to an operation without counting another call.
+    Parameters: name (str): The operation, e.g. "storage.write".
+                nbytes (int): Bytes written.
+    Returns: None"""
+    record(name, nbytes=nbytes, calls=0)
+
+class _Timer:
+    """Times a with block and records it as one call of an operation.
+    Purpose: The context manager timer() returns while metrics are on.
+    Methods: __init__, __enter__, __exit__.
+    Variables: name (str), start (float)."""
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str) -> None:
+        """Parameters: name (str): The operation being timed.
+        Returns: None"""
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        """Start timing.
+        Returns: _Timer: This timer."""
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> bool:
+        """Record the time, whether or not the block raised an error.
+        Returns: bool: False, so errors carry on as normal."""
+        record(self.name, perf_counter() - self.start)
+        return False
+
+def timer(name: str):
+    """Time a with block, e.g. `with timer("bcrypt.check"): ...`.
+    Parameters: name (str): The operation being timed.
+    Returns: context manager: Records the block's time (a shared do-nothing one while metrics are off)."""
+    return _Timer(name) if enabled else _OFF
+
+def timed(name: str):
+    """Decorator that times every call of a function, e.g. @timed("tasks.save").
+    Metrics can be turned on and off after the function is decorated.
+    Parameters: name (str): The operation being timed.
+    Returns: function: The decorator."""
+    def decorate(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return function(*args, **kwargs)
+            start = perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                record(name, perf_counter() - start)
+        return wrapper
+    return decorate
+
+# ========= Reading and saving =========
+def snapshot() -> dict:
+    """Returns: dict: Operation name -> {"calls", "seconds", "max_seconds", "bytes"}, sorted by name."""
+    with _lock:
+        return {name: {"calls": calls, "seconds": seconds, "max_seconds": longest, "bytes": nbytes}
+                for name, (calls, seconds, longest, nbytes) in sorted(_stats.items())}
+
+def reset() -> None:
+    """Forget everything recorded so far.
+    Returns: None"""
+    with _lock:
+        _stats.clear()
+
+def to_json(stats: dict = None) -> str:
+    """Parameters: stats (dict, optional): A snapshot() (default the metrics now).
+    Returns: str: The metrics as a JSON object."""
+    import json
+    return json.dumps(snapshot() if stats is None else stats, indent=2)
+
+def to_prometheus(stats: dict = None) -> str:
+    """Parameters: stats (dict, optional): A snapshot() (default the metrics now).
+    Returns: str: The metrics in the Prometheus text format, one series per operation."""
+    stats = snapshot() if stats is None else stats
+    lines = []
+    for metric, key, kind, about in (("todo_operation_calls_total", "calls", "counter", "Calls of each operation."),
+                                     ("todo_operation_seconds_total", "seconds", "counter", "Total time spent in each operation."),
+                                     ("todo_operation_seconds_max", "max_seconds", "gauge", "Longest single call of each operation."),
+                                     ("todo_operation_bytes_total", "bytes", "counter", "Bytes written by each operation.")):
+        lines.append(f"# HELP {metric} {about}")
+        lines.append(f"# TYPE {metric} {kind}")
+        for name, values in stats.items():
+            lines.append(f'{metric}{{operation="{name}"}} {values[key]}')
+    return "\n".join(lines) + "\n"
+
+def metrics_format(path: str, fmt: str = None) -> str:
+    """Returns: str: "prometheus" or "json" - fmt if given, otherwise from the file name (.prom or .txt = prometheus)."""
+    if fmt:
+        return fmt
+    return "prometheus" if path.endswith((".prom", ".txt")) else "json"
+
+def dump(path: str = None, fmt: str = None) -> str:
+    """Save the metrics now (replacing the file atomically, so a collector never reads half of it).
+    Parameters: path (str, optional): File to save to (default config.METRICS_FILE).
+                fmt (str, optional): "json" or "prometheus" (default config.METRICS_FORMAT, or from the file name).
+    Returns: str: The path saved to."""
+    from storage import write_atomic
+    path = path or config.METRICS_FILE
+    text = to_prometheus() if metrics_format(path, fmt or config.METRICS_FORMAT) == "prometheus" else to_json()
+    write_atomic(path, lambda file: file.write(text))
+    return path
+
+def enable(path: str = None, fmt: str = None) -> None:
+    """Turn metrics on. If a file is given, they're saved to it at exit and on SIGUSR1 (where there is one).
+    Parameters: path (str, optional): File to save the metrics to.
+                fmt (str, optional): "json" or "prometheus" (default from the file name).
+    Returns: None"""
+    global enabled
+    enabled = True
+    if not path:
+        return
+    import atexit
+    import signal
+    atexit.register(dump, path, fmt)
+    if hasattr(signal, "SIGUSR1") and threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGUSR1, lambda signum, frame: dump(path, fmt))
+
+def disable() -> None:
+    """Turn metrics off (what's been recorded is kept until reset()).
+    Returns: None"""
+    global enabled
+    enabled = False
+
+if config.METRICS_FILE:
+    enable(config.METRICS_FILE, config.METRICS_FORMAT)
@@ -0,0 +1,120 @@
+"""registry.py: keeps recently used task lists in memory, so a user who comes back doesn't wait for their file to load again.
+
+Imports:
+- atexit: Saves every task list still in memory when the app exits.
+- sys: getsizeof, to estimate how much memory a task list is using.
+- threading: Stops two threads (e.g. server requests) changing the registry at the same time.
+- collections: OrderedDict keeps the task lists in least recently used order.
+- config: Custom file with app settings (how many task lists and how much memory to keep).
+- tasks: Custom file with TaskList and ColumnarTaskStore.
+
+How it works: get("bob") returns bob's TaskList from memory if it's there (a hit), after picking up anything
+another process saved since. Otherwise (a miss) it loads it and keeps it. When more than max_lists lists, or
+more than max_bytes of tasks, are in memory, the least recently used list is saved (written back) and dropped.
+Anyone still holding a dropped list can keep using it - its changes are still saved."""
+
+import atexit
+import sys
+import threading
+from collections import OrderedDict
+import config
+from tasks import TaskList, ColumnarTaskStore
+
+SAMPLE_SIZE = 64 # Tasks measured to estimate the size of a whole list
+
+def estimate_bytes(task_list: TaskList) -> int:
+    """Roughly how much memory a task list's tasks use, measured from a sample so it stays fast for huge lists.
+    Parameters: task_list (TaskList): The list to measure.
+    Returns: int: Estimated bytes."""
+    tasks = task_list.tasks
+    count = len(tasks)
+    if task_list.is_view():
+        return sys.getsizeof(tasks) # Tasks stay in the mapped file (the OS page cache), not Python objects
+    if isinstance(tasks, ColumnarTaskStore):
+        titles = tasks.titles
+        sample = titles[:SAMPLE_SIZE]
+        per_task = sum(map(sys.getsizeof, sample)) / len(sample) if sample else 0
+        return int(sys.getsizeof(titles) + per_task * count + len(tasks.completed) + len(tasks.priority))
+    sample = tasks[:SAMPLE_SIZE]
+    per_task = sum(sys.getsizeof(task) + sys.getsizeof(task.title) for task in sample) / len(sample) if sample else 0
+    return int(sys.getsizeof(tasks) + per_task * count)
+
+# ========= Task list registry =========
+class TaskListRegistry:
+    """Least recently used cache of TaskLists, shared by everything in one process.
+    Purpose: Avoid loading a user's tasks from disk again every time they start a session.
+    Methods: __init__, get, evict, close_all, stats.
+    Variables: max_lists (int), max_bytes (int), open_task_list (function), hits (int), misses (int), evictions (int)."""
+
+    def __init__(self, max_lists: int = None, max_bytes: int = None, open_task_list=None) -> None:
+        """Set up an empty registry, saving everything left in it at exit.
+        Parameters: max_lists (int, optional): Most task lists to keep (default from config.CACHE_LISTS).
+                    max_bytes (int, optional): Most memory for all kept lists' tasks (default from config.CACHE_MB).
+                        The most recently used list is always kept, however big it is.
+                    open_task_list (function, optional): Loads the TaskList for a username (default TaskList).
+        Returns: None"""
+        self.max_lists = config.CACHE_LISTS if max_lists is None else max_lists
+        self.max_bytes = int(config.CACHE_MB * 1024 * 1024) if max_bytes is None else max_bytes
+        self.open_task_list = open_task_list or TaskList
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lists = OrderedDict() # username -> TaskList, least recently used first
+        self._lock = threading.RLock()
+        atexit.register(self.close_all)
+
+    def get(self, username: str) -> TaskList:
+        """Get a user's TaskList, from memory if it's there (reloaded only if another process saved it since),
+        otherwise from storage.
+        Parameters: username (str): The user.
+        Returns: TaskList: Their task list."""
+        with self._lock:
+            task_list = self._lists.get(username)
+            if task_list is not None:
+                self.hits += 1
+                self._lists.move_to_end(username)
+                task_list.refresh()
+                return task_list
+            self.misses += 1
+            task_list = self._lists[username] = self.open_task_list(username)
+            self.evict()
+            return task_list
+
+    def evict(self) -> int:
+        """Save and drop the least recently used lists until the registry is within its limits.
+        Sizes are measured now, since lists grow and shrink while they're in use.
+        Returns: int: Number of lists dropped."""
+        dropped = 0
+        with self._lock:
+            total = sum(map(estimate_bytes, self._lists.values())) if self.max_bytes else 0
+            while len(self._lists) > 1 and (len(self._lists) > self.max_lists or
+                                            (self.max_bytes and total > self.max_bytes)):
+                username, task_list = self._lists.popitem(last=False)
+                if self.max_bytes:
+                    total -= estimate_bytes(task_list)
+                task_list.close() # Write back anything waiting to be saved
+                self.evictions += 1
+                dropped += 1
+        return dropped
+
+    def close_all(self) -> None:
+        """Save every list in the registry and empty it.
+        Returns: None"""
+        with self._lock:
+            while self._lists:
+                self._lists.popitem(last=False)[1].close()
+
+    def stats(self) -> dict:
+        """Returns: dict: hits, misses, evictions, lists (kept now) and bytes (estimated memory of kept lists)."""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                    "lists": len(self._lists), "bytes": sum(map(estimate_bytes, self._lists.values()))}
+
+_registry = None
+
+def get_registry() -> TaskListRegistry:
+    """Returns: TaskListRegistry: The registry shared by the whole process (made the first time it's needed)."""
+    global _registry
+    if _registry is None:
+        _registry = TaskListRegistry()
+    return _registry
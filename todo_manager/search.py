@@ -0,0 +1,133 @@
+"""search.py: finds tasks by words in their title, whether they're done, and priority, without checking every task.
+
+Imports:
+- re: Splits titles into words.
+- array: Holds each task's key in list order, compactly.
+- bisect: Finds a task's current position from its key.
+
+How it works: every task gets a key when it's added (0, 1, 2, ...). Tasks are only ever added to the end,
+so the keys stay in increasing order, and a task's position is found with a binary search - even after
+tasks before it are deleted. The index keeps, for each word, the set of keys of tasks with that word in
+their title, plus the keys of completed tasks and of tasks at each priority. A search intersects those sets
+(smallest first) instead of looking at every task, so it takes about as long as the number of matches.
+TaskList keeps the index up to date as tasks are added, completed and deleted."""
+
+import re
+from array import array
+from bisect import bisect_left
+
+WORD = re.compile(r"\w+")
+PRIORITY_ORDER = ("High", "Medium", "Low", None) # Sort order for by_priority (None = no priority)
+
+def words(text: str) -> list:
+    """Returns: list[str]: The lower case words in some text, e.g. "Pay gas-bill" -> ["pay", "gas", "bill"]."""
+    return WORD.findall(text.lower())
+
+# ========= Task search index =========
+class TaskIndex:
+    """Inverted index of task titles, with sets for completed tasks and each priority.
+    Purpose: Fast search and filtering of long task lists.
+    Methods: __init__, add, remove, set_completed, position, find, match_words.
+    Variables: keys (array), postings (dict), completed (set), priorities (dict)."""
+
+    def __init__(self, records=()) -> None:
+        """Build the index.
+        Parameters: records (iterable of dict): Every task record (as made by Task.to_dict()), in list order.
+        Returns: None"""
+        self.keys = array("q")
+        self.postings = {} # word -> set of keys
+        self.completed = set()
+        self.priorities = {} # priority label ("High"...), or None for plain tasks -> set of keys
+        self._words = {} # key -> the title's words, so a deleted task can be taken out of postings
+        self._next_key = 0
+        for record in records:
+            self.add(record)
+
+    def add(self, record: dict) -> None:
+        """Add a task to the end of the index.
+        Parameters: record (dict): The new task's record.
+        Returns: None"""
+        key = self._next_key
+        self._next_key += 1
+        self.keys.append(key)
+        title_words = set(words(record["title"]))
+        self._words[key] = title_words
+        for word in title_words:
+            self.postings.setdefault(word, set()).add(key)
+        if record["completed"]:
+            self.completed.add(key)
+        self.priorities.setdefault(record.get("priority"), set()).add(key)
+
+    def remove(self, position: int) -> None:
+        """Take the task at a position out of the index (later tasks move up one, like the list).
+        Parameters: position (int): The deleted task's position.
+        Returns: None"""
+        key = self.keys.pop(position)
+        for word in self._words.pop(key):
+            keys = self.postings[word]
+            keys.discard(key)
+            if not keys:
+                del self.postings[word]
+        self.completed.discard(key)
+        for keys in self.priorities.values():
+            keys.discard(key)
+
+    def set_completed(self, position: int) -> None:
+        """Note that the task at a position was completed.
+        Parameters: position (int): The task's position.
+        Returns: None"""
+        self.completed.add(self.keys[position])
+
+    def position(self, key: int) -> int:
+        """Returns: int: The current position of the task with this key."""
+        return bisect_left(self.keys, key)
+
+    def match_words(self, text: str, substring: bool = False) -> set:
+        """Find the tasks whose titles have every word in some text.
+        Parameters: text (str): The words to look for.
+                    substring (bool): Also match words that contain them, e.g. "bill" matches "bills".
+                        This checks every distinct word used in titles, which is still far fewer than the tasks.
+        Returns: set: Keys of the matching tasks, or None if the text has no words (everything matches)."""
+        found = None
+        for word in sorted(set(words(text)), key=len, reverse=True): # Longest (rarest) words first
+            if substring:
+                keys = set().union(*(keys for title_word, keys in self.postings.items() if word in title_word))
+            else:
+                keys = self.postings.get(word, set())
+            found = set(keys) if found is None else found & keys
+            if not found:
+                return set()
+        return found
+
+    def find(self, text: str = None, completed: bool = None, priority=None, substring: bool = False,
+             by_priority: bool = False) -> list:
+        """Find tasks matching every filter that's given.
+        Parameters: text (str, optional): Words the title must have.
+                    completed (bool, optional): Only completed (True) or not completed (False) tasks.
+                    priority (str or list[str], optional): Only these priority labels ("High"...; None for plain tasks).
+                    substring (bool): Match parts of words too (see match_words).
+                    by_priority (bool): Sort High first, then Medium, Low and plain tasks (list order within each).
+        Returns: list[int]: Positions of the matching tasks, in list order (or priority order)."""
+        sets = []
+        if text:
+            matched = self.match_words(text, substring)
+            if matched is not None:
+                sets.append(matched)
+        if priority is not None:
+            labels = [priority] if isinstance(priority, str) else priority
+            sets.append(set().union(*(self.priorities.get(label, set()) for label in labels)))
+        if completed:
+            sets.append(self.completed)
+        sets.sort(key=len)
+        if sets:
+            keys = set(sets[0]).intersection(*sets[1:])
+        else:
+            keys = set(self.keys)
+        if completed is False:
+            keys -= self.completed
+        if not by_priority:
+            return [self.position(key) for key in sorted(keys)]
+        positions = []
+        for label in PRIORITY_ORDER:
+            positions.extend(self.position(key) for key in sorted(keys & self.priorities.get(label, set())))
+        return positions
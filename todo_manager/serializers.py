@@ -0,0 +1,202 @@
+"""serializers.py: the formats a tasks file can be saved in, and how to tell which one a file uses.
+
+Imports:
+- importlib: Imports orjson and msgpack the first time they're needed (only if they're installed).
+- io: Wraps a binary file as text for the pretty-printed JSON writer and the streaming JSON reader.
+- json: The standard library JSON encoder and decoder (always available).
+- os: Checks a file's size to decide whether to read it all at once or a chunk at a time.
+- config: Custom file with app settings (TASK_FORMAT, the format new saves use).
+- task_io: Custom file with the streaming JSON list reader and the pretty-printed JSON writer.
+
+Formats (picked with config.TASK_FORMAT, all written to and read from binary files):
+- json: The original pretty-printed JSON list (indent=2). Easy to read, but the slowest to save.
+- compact: The same JSON list on one line, with no spaces. Older versions of the app can still read it.
+- msgpack: A binary format (needs the msgpack package), starting with MSGPACK_HEADER so it's recognised.
+orjson (if installed) is used to write and read both JSON formats much faster. Reading never needs the
+format named: files starting with MSGPACK_HEADER are msgpack, anything else is a JSON list - so files
+saved by older versions (or in any other format) are always read correctly."""
+
+import importlib
+import io
+import json
+import os
+import config
+from task_io import read_json_array, write_json_array
+
+MSGPACK_HEADER = b"TODO-MSGPACK 1\n" # First bytes of a msgpack tasks file
+CHUNK_RECORDS = 4096 # Records encoded at a time, so saving never builds a second copy of a huge list
+STREAM_OVER_BYTES = 64 * 1024 * 1024 # JSON files bigger than this are decoded a record at a time (less memory)
+
+_modules = {} # Optional module name -> module, or None if it isn't installed
+
+def optional_module(name: str):
+    """Import an optional package the first time it's needed.
+    Parameters: name (str): e.g. "orjson".
+    Returns: module: The package, or None if it isn't installed."""
+    if name not in _modules:
+        try:
+            _modules[name] = importlib.import_module(name)
+        except ImportError:
+            _modules[name] = None
+    return _modules[name]
+
+def chunks(records):
+    """Yield lists of up to CHUNK_RECORDS records from any iterable (e.g. a generator).
+    Yields: list[dict]: The next chunk of records."""
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) == CHUNK_RECORDS:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+# ========= JSON =========
+class JSONSerializer:
+    """The original pretty-printed JSON list format.
+    Purpose: Save tasks in a format that's easy to read and edit by hand.
+    Inheritance: Base class for CompactJSONSerializer.
+    Methods: dump, load.
+    Variables: name (str)."""
+    name = "json"
+
+    def dump(self, records, file) -> int:
+        """Write records as a pretty-printed JSON list, exactly like json.dump(records, indent=2).
+        Parameters: records (iterable of dict): The task records to write.
+                    file (file): An open binary file.
+        Returns: int: Number of records written."""
+        orjson = optional_module("orjson")
+        if orjson is None:
+            text = io.TextIOWrapper(file, encoding="utf-8", newline="")
+            try:
+                return write_json_array(records, text)
+            finally:
+                text.detach() # Leave the binary file open for the caller
+        count = 0
+        file.write(b"[")
+        for chunk in chunks(records):
+            text = orjson.dumps(chunk, option=orjson.OPT_INDENT_2)
+            file.write((b",\n" if count else b"\n") + text[2:-2]) # Drop the chunk's own "[\n" and "\n]"
+            count += len(chunk)
+        file.write(b"\n]" if count else b"]")
+        return count
+
+    def load(self, file):
+        """Yield the records from a JSON list (pretty-printed or compact). Files up to STREAM_OVER_BYTES are
+        decoded in one go, which is fastest; bigger ones a record at a time, so memory use stays flat.
+        Parameters: file (file): An open binary file.
+        Yields: dict: One task record.
+        Raises: json.JSONDecodeError: If the file isn't a JSON list."""
+        try:
+            size = os.fstat(file.fileno()).st_size
+        except (AttributeError, OSError, io.UnsupportedOperation):
+            size = 0
+        if size > STREAM_OVER_BYTES:
+            yield from read_json_array(io.TextIOWrapper(file, encoding="utf-8"))
+            return
+        data = file.read()
+        if not data.strip():
+            return # Empty file - no tasks
+        orjson = optional_module("orjson")
+        records = orjson.loads(data) if orjson is not None else json.loads(data)
+        if not isinstance(records, list):
+            raise json.JSONDecodeError("Expecting a task list", data.decode("utf-8", "replace"), 0)
+        yield from records
+
+class CompactJSONSerializer(JSONSerializer):
+    """A JSON list on one line with no spaces - much faster to save, and readable by any JSON reader.
+    Purpose: The default tasks file format.
+    Inheritance: Inherits from JSONSerializer (load is the same).
+    Methods: dump.
+    Variables: name (str)."""
+    name = "compact"
+
+    def dump(self, records, file) -> int:
+        """Write records as a compact JSON list, CHUNK_RECORDS records at a time.
+        Parameters: records (iterable of dict): The task records to write.
+                    file (file): An open binary file.
+        Returns: int: Number of records written."""
+        orjson = optional_module("orjson")
+        encode = orjson.dumps if orjson is not None else \
+            lambda chunk: json.dumps(chunk, separators=(",", ":")).encode("utf-8")
+        count = 0
+        file.write(b"[")
+        for chunk in chunks(records):
+            file.write((b"," if count else b"") + encode(chunk)[1:-1]) # Drop the chunk's own [ and ]
+            count += len(chunk)
+        file.write(b"]")
+        return count
+
+# ========= msgpack =========
+class MsgpackSerializer:
+    """A compact binary format, written as MSGPACK_HEADER followed by one msgpack object per record.
+    Purpose: Smallest and fastest tasks files, when the msgpack package is installed.
+    Methods: dump, load.
+    Variables: name (str)."""
+    name = "msgpack"
+
+    def dump(self, records, file) -> int:
+        """Write the header, then each record packed one after another.
+        Parameters: records (iterable of dict): The task records to write.
+                    file (file): An open binary file.
+        Returns: int: Number of records written."""
+        packer = optional_module("msgpack").Packer(use_bin_type=True)
+        count = 0
+        file.write(MSGPACK_HEADER)
+        for chunk in chunks(records):
+            file.write(b"".join(map(packer.pack, chunk)))
+            count += len(chunk)
+        return count
+
+    def load(self, file):
+        """Yield the records after the header, one at a time.
+        Parameters: file (file): An open binary file, already past the header.
+        Yields: dict: One task record.
+        Raises: json.JSONDecodeError: If the file is damaged (the same error as a damaged JSON file, so
+            callers only need to handle one), or msgpack isn't installed."""
+        msgpack = optional_module("msgpack")
+        if msgpack is None:
+            raise json.JSONDecodeError("This tasks file was saved with msgpack, which isn't installed", "", 0)
+        try:
+            for record in msgpack.Unpacker(file, raw=False):
+                if not isinstance(record, dict):
+                    raise ValueError("Expecting a task record")
+                yield record
+        except ValueError as e: # msgpack's own errors are ValueErrors too
+            raise json.JSONDecodeError(f"Damaged msgpack tasks file: {e}", "", 0) from None
+
+# ========= Picking a format =========
+SERIALIZERS = {serializer.name: serializer for serializer in
+               (JSONSerializer(), CompactJSONSerializer(), MsgpackSerializer())}
+
+def get_serializer(name: str = None):
+    """Find the serializer to save with. msgpack falls back to compact JSON if it isn't installed.
+    Parameters: name (str, optional): "json", "compact" or "msgpack" (default from config.TASK_FORMAT).
+    Returns: JSONSerializer, CompactJSONSerializer or MsgpackSerializer.
+    Raises: ValueError: If the format isn't one of SERIALIZERS."""
+    name = name or config.TASK_FORMAT
+    if name not in SERIALIZERS:
+        raise ValueError(f"Unknown task file format '{name}', pick one of: {', '.join(SERIALIZERS)}")
+    if name == "msgpack" and optional_module("msgpack") is None:
+        name = "compact"
+    return SERIALIZERS[name]
+
+def read_records(file):
+    """Yield the records from a tasks file in any format, worked out from the start of the file.
+    Parameters: file (file): An open binary file.
+    Yields: dict: One task record.
+    Raises: json.JSONDecodeError: If the file is damaged."""
+    if file.read(len(MSGPACK_HEADER)) == MSGPACK_HEADER:
+        yield from SERIALIZERS["msgpack"].load(file)
+        return
+    file.seek(0)
+    yield from SERIALIZERS["json"].load(file)
+
+def write_records(records, file, name: str = None) -> int:
+    """Write records to a tasks file.
+    Parameters: records (iterable of dict): The task records to write.
+                file (file): An open binary file.
+                name (str, optional): The format (default from config.TASK_FORMAT).
+    Returns: int: Number of records written."""
+    return get_serializer(name).dump(records, file)
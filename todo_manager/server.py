@@ -0,0 +1,365 @@
+"""server.py: a small local HTTP/JSON API for TO DO., so other programs can log in and manage tasks.
+
+Imports:
+- argparse: Reads --host and --port from the command line.
+- asyncio: Handles many connections at once on one thread (an event loop).
+- json: Reads request bodies and writes responses as JSON.
+- re: Matches request paths like /tasks/3/complete.
+- secrets: Makes unguessable login tokens.
+- sys: Error reports go to stderr.
+- traceback: Prints the details of an unexpected error before answering 500 Internal Server Error.
+- http: HTTPStatus gives the standard reason text for each status code (e.g. 404 Not Found).
+- urllib.parse: Reads ?completed=true&priority=High from the path.
+- config: Custom file with app settings (host, port, request size limit).
+- styling: Custom file for styling the terminal, switched to headless so nothing is printed per request.
+- registry: Custom file that keeps recently used users' TaskLists in memory.
+- tasks: Custom file with Task, PriorityTask and Priority.
+- user: Custom file with User, used to sign up and log in.
+
+Built only on the standard library. Users' TaskLists are kept in memory between requests by a TaskListRegistry
+(only reloaded if another process saved their tasks), bcrypt runs in the hasher's worker threads,
+and task saves run in a thread pool, so one slow request never holds up the others.
+
+Endpoints (send and receive JSON, log in first and send the token as "Authorization: Bearer <token>"):
+    POST   /signup                 {"username": ..., "password": ...}  -> 201 {"token": ...}
+    POST   /login                  {"username": ..., "password": ...}  -> {"token": ...}
+    POST   /logout
+    GET    /tasks                  ?completed=true|false&priority=High  -> {"tasks": [{"number": 1, "id": ...}]}
+    POST   /tasks                  {"title": ..., "priority": "High"} or {"tasks": [...]} -> 201 {"added": n, "ids": [...]}
+    POST   /tasks/{n}/complete                                         -> {"completed": n}
+    POST   /tasks/complete         {"numbers": [1, 2]} or {"all": true, "priority": "High"}
+    DELETE /tasks/{n}                                                  -> {"deleted": n}
+    DELETE /tasks                  ?completed=true                     -> {"deleted": n}
+    POST   /tasks/id/{id}/complete                                     -> {"completed": n}
+    DELETE /tasks/id/{id}                                              -> {"deleted": 1}
+Task numbers change when earlier tasks are deleted; IDs never do, so programs that change tasks while
+someone else might too should use the /tasks/id/ endpoints.
+Run with: python3 todo_manager/server.py [--host 127.0.0.1] [--port 8080]"""
+
+import argparse
+import asyncio
+import json
+import re
+import secrets
+import sys
+import traceback
+from http import HTTPStatus
+from urllib.parse import urlsplit, parse_qs
+import config
+import styling
+from registry import TaskListRegistry, get_registry
+from tasks import Task, PriorityTask, Priority
+from user import User
+
+class HTTPError(Exception):
+    """An error to send back to the client as a JSON {"error": ...} response.
+    Purpose: Let request handlers stop with a status code and message.
+    Inheritance: Inherits from Exception.
+    Variables: status (int), message (str)."""
+
+    def __init__(self, status: int, message: str) -> None:
+        """Parameters: status (int): HTTP status code, e.g. 404.
+                    message (str): What went wrong.
+        Returns: None"""
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+# ========= Server =========
+class TodoServer:
+    """Answers HTTP/JSON requests using the same User and TaskList classes as the terminal app.
+    Purpose: Let other programs use TO DO. over HTTP.
+    Methods: __init__, start, serve_forever, handle_connection, handle_request, run_tasks,
+        plus one method per endpoint (signup, login, logout, list_tasks, add_tasks, complete_task, complete_tasks,
+        delete_task, delete_tasks, complete_task_by_id, delete_task_by_id).
+    Variables: users (User), task_lists (TaskListRegistry), sessions (dict), routes (list)."""
+
+    def __init__(self, users: User = None, open_task_list=None) -> None:
+        """Set up the server (it doesn't listen until start() is called).
+        Parameters: users (User, optional): Signs up and logs in users (default a normal User).
+                    open_task_list (function, optional): Makes the TaskList for a username. Given one, the server
+                        keeps its own registry; otherwise it shares the process-wide one.
+        Returns: None"""
+        self.users = users if users is not None else User()
+        self.task_lists = TaskListRegistry(open_task_list=open_task_list) if open_task_list else get_registry()
+        self.sessions = {}     # login token -> username
+        self._user_locks = {}  # username -> asyncio.Lock, one request at a time changes a user's tasks
+        self.routes = [
+            ("POST", re.compile(r"/signup"), self.signup),
+            ("POST", re.compile(r"/login"), self.login),
+            ("POST", re.compile(r"/logout"), self.logout),
+            ("GET", re.compile(r"/tasks"), self.list_tasks),
+            ("POST", re.compile(r"/tasks"), self.add_tasks),
+            ("POST", re.compile(r"/tasks/complete"), self.complete_tasks),
+            ("POST", re.compile(r"/tasks/(\d+)/complete"), self.complete_task),
+            ("POST", re.compile(r"/tasks/id/(\w+)/complete"), self.complete_task_by_id),
+            ("DELETE", re.compile(r"/tasks/id/(\w+)"), self.delete_task_by_id),
+            ("DELETE", re.compile(r"/tasks/(\d+)"), self.delete_task),
+            ("DELETE", re.compile(r"/tasks"), self.delete_tasks),
+        ]
+
+    async def start(self, host: str = None, port: int = None) -> asyncio.AbstractServer:
+        """Start listening for connections.
+        Parameters: host (str), port (int): Where to listen (default from config.SERVER_HOST/SERVER_PORT, port 0 picks a free one).
+        Returns: asyncio.AbstractServer: The listening server."""
+        styling.set_headless(True)
+        host = host or config.SERVER_HOST
+        port = config.SERVER_PORT if port is None else port
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+    async def serve_forever(self, host: str = None, port: int = None) -> None:
+        """Start listening and answer requests until stopped (Ctrl+C). Saves everyone's tasks before stopping.
+        Returns: None"""
+        server = await self.start(host, port)
+        address = server.sockets[0].getsockname()
+        print(f"TO DO. API listening on http://{address[0]}:{address[1]}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.task_lists.close_all()
+
+    # ===== HTTP =====
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Read requests from one connection and answer each (keeps the connection open between requests).
+        Returns: None"""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    await self.send(writer, HTTPStatus.BAD_REQUEST, {"error": "Bad request line"}, keep_alive=False)
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+                try:
+                    length = int(headers.get("content-length", "0") or 0)
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    await self.send(writer, HTTPStatus.BAD_REQUEST, {"error": "Bad Content-Length"}, keep_alive=False)
+                    break
+                if length > config.SERVER_MAX_BODY:
+                    await self.send(writer, HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {"error": "Request too large"},
+                                    keep_alive=False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+                status, payload = await self.handle_request(method, target, headers, body)
+                await self.send(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass # Client went away
+        finally:
+            writer.close()
+
+    async def send(self, writer: asyncio.StreamWriter, status: int, payload: dict, keep_alive: bool = True) -> None:
+        """Write one JSON response.
+        Parameters: writer (StreamWriter): The connection.
+                    status (int): HTTP status code.
+                    payload (dict): The JSON body.
+                    keep_alive (bool): Keep the connection open for another request.
+        Returns: None"""
+        body = json.dumps(payload).encode("utf-8")
+        status = HTTPStatus(status)
+        head = (f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                f"Content-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+    async def handle_request(self, method: str, target: str, headers: dict, body: bytes) -> tuple:
+        """Find the endpoint for a request and run it.
+        Parameters: method (str): e.g. "GET". target (str): Path and query, e.g. "/tasks?completed=true".
+                    headers (dict): Header names (lower case) -> values. body (bytes): The request body.
+        Returns: tuple: (status code, JSON payload)."""
+        url = urlsplit(target)
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        path_found = False
+        try:
+            for route_method, pattern, handler in self.routes:
+                match = pattern.fullmatch(url.path.rstrip("/") or "/")
+                if not match:
+                    continue
+                path_found = True
+                if route_method != method:
+                    continue
+                data = json.loads(body) if body else {}
+                if not isinstance(data, dict):
+                    raise HTTPError(400, "Send a JSON object")
+                return await handler(headers=headers, query=query, data=data, args=match.groups())
+            if path_found:
+                raise HTTPError(405, f"{method} isn't allowed here")
+            raise HTTPError(404, "Not found")
+        except HTTPError as e:
+            return e.status, {"error": e.message}
+        except json.JSONDecodeError:
+            return 400, {"error": "Body isn't valid JSON"}
+        except (ValueError, IndexError) as e: # Bad priority or task number
+            return 400, {"error": str(e)}
+        except Exception: # A bug or a storage error - the client gets a 500 and the details go to the server's log
+            print(f"Error answering {method} {url.path}:", file=sys.stderr)
+            traceback.print_exc()
+            return 500, {"error": "Something went wrong on the server"}
+
+    # ===== Helpers =====
+    def username_for(self, headers: dict) -> str:
+        """Returns: str: The logged in user for a request's Bearer token.
+        Raises: HTTPError: 401 if there's no valid token."""
+        scheme, _, token = headers.get("authorization", "").partition(" ")
+        username = self.sessions.get(token) if scheme.lower() == "bearer" else None
+        if username is None:
+            raise HTTPError(401, "Log in first (POST /login) and send Authorization: Bearer <token>")
+        return username
+
+    async def run_tasks(self, headers: dict, work):
+        """Run work(task_list) for the logged in user in a worker thread, one request per user at a time,
+        after picking up any changes another process saved.
+        Parameters: headers (dict): The request headers (for the login token).
+                    work (function): Does the work with the user's TaskList and returns the response.
+        Returns: The result of work."""
+        username = self.username_for(headers)
+        lock = self._user_locks.setdefault(username, asyncio.Lock())
+        async with lock:
+            return await asyncio.get_running_loop().run_in_executor(
+                None, lambda: work(self.task_lists.get(username))) # get() reloads if it changed on disk
+
+    def new_session(self, username: str) -> dict:
+        """Returns: dict: {"token": ...}, a new login token for the user."""
+        token = secrets.token_urlsafe(32)
+        self.sessions[token] = username
+        return {"token": token}
+
+    @staticmethod
+    def credentials(data: dict) -> tuple:
+        """Returns: tuple: (username, password) from a request body.
+        Raises: HTTPError: 400 if either is missing."""
+        username, password = str(data.get("username", "")).strip(), str(data.get("password", ""))
+        if not username or not password:
+            raise HTTPError(400, "Send a username and password")
+        return username, password
+
+    @staticmethod
+    def make_task(data: dict) -> Task:
+        """Returns: Task or PriorityTask: A new task from {"title": ..., "priority": ...}.
+        Raises: HTTPError: 400 if it isn't an object or the title is missing or too long.
+            ValueError: If the priority isn't valid."""
+        if not isinstance(data, dict):
+            raise HTTPError(400, "Each task must be a JSON object like {\"title\": ...}")
+        title = str(data.get("title", "")).strip()
+        if not title or len(title) > 100:
+            raise HTTPError(400, "Each task needs a title of 1-100 characters")
+        return PriorityTask(title, data["priority"]) if data.get("priority") else Task(title)
+
+    @staticmethod
+    def task_numbers(data: dict) -> list:
+        """Returns: list[int]: The task indexes (0-based) for the task numbers in "numbers".
+        Raises: HTTPError: 400 if "numbers" isn't a list of whole numbers."""
+        numbers = data.get("numbers", [])
+        if not isinstance(numbers, list) or not all(type(number) is int for number in numbers):
+            raise HTTPError(400, "Send \"numbers\" as a list of task numbers, e.g. [1, 2]")
+        return [number - 1 for number in numbers]
+
+    # ===== Endpoints =====
+    async def signup(self, headers, query, data, args) -> tuple:
+        """POST /signup: create an account and log in."""
+        username, password = self.credentials(data)
+        if len(password) < 5:
+            raise HTTPError(400, "Passwords need 5+ characters")
+        hashed = await self.users.hash_password_async(password)
+        created = await asyncio.get_running_loop().run_in_executor( # Takes a file lock and syncs to disk
+            None, self.users.storage.create, username, {"password": hashed})
+        if not created:
+            raise HTTPError(409, "That username's already taken")
+        return 201, self.new_session(username)
+
+    async def login(self, headers, query, data, args) -> tuple:
+        """POST /login: check a username and password (bcrypt runs off the event loop)."""
+        username, password = self.credentials(data)
+        if not await self.users.verify_login_async(username, password):
+            raise HTTPError(401, "Wrong username or password")
+        return 200, self.new_session(username)
+
+    async def logout(self, headers, query, data, args) -> tuple:
+        """POST /logout: forget the login token."""
+        self.username_for(headers)
+        self.sessions.pop(headers["authorization"].partition(" ")[2], None)
+        return 200, {}
+
+    async def list_tasks(self, headers, query, data, args) -> tuple:
+        """GET /tasks: every task, optionally only completed=true/false and/or one priority."""
+        completed = query["completed"].lower() == "true" if "completed" in query else None
+        level = Priority.from_label(query["priority"]) if query.get("priority") else None
+        return await self.run_tasks(headers, lambda task_list: (200, {"tasks": task_list.filter_tasks(completed, level)}))
+
+    async def add_tasks(self, headers, query, data, args) -> tuple:
+        """POST /tasks: add one task, or a list of them in "tasks"."""
+        items = data.get("tasks", [data])
+        if not isinstance(items, list):
+            raise HTTPError(400, "Send \"tasks\" as a list of task objects")
+        tasks = [self.make_task(item) for item in items]
+        return await self.run_tasks(headers, lambda task_list: (201, {"added": task_list.add_tasks(tasks),
+                                                                       "ids": [task.id for task in tasks]}))
+
+    async def complete_task(self, headers, query, data, args) -> tuple:
+        """POST /tasks/{n}/complete: mark one task complete."""
+        index = int(args[0]) - 1
+        return await self.run_tasks(headers, lambda task_list: (200, {"completed": task_list.complete_tasks([index])}))
+
+    async def complete_tasks(self, headers, query, data, args) -> tuple:
+        """POST /tasks/complete: mark several tasks complete by number, or all of them (optionally one priority)."""
+        if data.get("all"):
+            priority = data.get("priority")
+            return await self.run_tasks(headers, lambda task_list: (200, {"completed": task_list.complete_all(priority)}))
+        indices = self.task_numbers(data)
+        return await self.run_tasks(headers, lambda task_list: (200, {"completed": task_list.complete_tasks(indices)}))
+
+    async def delete_task(self, headers, query, data, args) -> tuple:
+        """DELETE /tasks/{n}: delete one task."""
+        index = int(args[0]) - 1
+        return await self.run_tasks(headers, lambda task_list: (200, {"deleted": task_list.delete_tasks([index])}))
+
+    async def delete_tasks(self, headers, query, data, args) -> tuple:
+        """DELETE /tasks?completed=true: delete every completed task."""
+        if query.get("completed", "").lower() != "true":
+            raise HTTPError(400, "Only DELETE /tasks?completed=true is allowed (delete single tasks by number)")
+        return await self.run_tasks(headers, lambda task_list: (200, {"deleted": task_list.delete_completed()}))
+
+    async def complete_task_by_id(self, headers, query, data, args) -> tuple:
+        """POST /tasks/id/{id}/complete: mark the task with this ID complete."""
+        def work(task_list):
+            try:
+                return 200, {"completed": int(task_list.complete_by_id(args[0]))}
+            except KeyError:
+                raise HTTPError(404, f"No task with ID {args[0]}") from None
+        return await self.run_tasks(headers, work)
+
+    async def delete_task_by_id(self, headers, query, data, args) -> tuple:
+        """DELETE /tasks/id/{id}: delete the task with this ID."""
+        def work(task_list):
+            try:
+                task_list.delete_by_id(args[0])
+            except KeyError:
+                raise HTTPError(404, f"No task with ID {args[0]}") from None
+            return 200, {"deleted": 1}
+        return await self.run_tasks(headers, work)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the TO DO. HTTP/JSON API.")
+    parser.add_argument("--host", default=config.SERVER_HOST)
+    parser.add_argument("--port", type=int, default=config.SERVER_PORT)
+    options = parser.parse_args()
+    try:
+        asyncio.run(TodoServer().serve_forever(options.host, options.port))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,224 @@
+"""sharded_users.py: splits user accounts across many small files, so logins and signups only touch one of them.
+
+Imports:
+- argparse: Reads the reshard tool's options from the command line.
+- glob: Finds the old shard files to remove after resharding.
+- json: Reads and writes the shards.json layout file.
+- os: Helps with file and folder handling.
+- zlib: crc32, a fast hash that gives the same shard for a username on every computer and Python version.
+- contextlib: ExitStack, to hold every old shard's lock while resharding.
+- config: Custom file with app settings (how many shards a new store gets).
+- locking: Custom file with file locks and etags, so several copies of the app can share the shards.
+- storage: Custom file with JSONUserStorage (each shard is one) and write_atomic.
+
+How it works: with TODO_USER_STORAGE=sharded, accounts are saved in data/users/ instead of data/users.json:
+    shards.json                  {"shards": 64} - how many shard files there are
+    shard-0000-of-0064.json      the accounts whose username hashes to shard 0 (plus its own .journal)
+    ...
+A username always hashes (crc32) to the same shard, so logging in reads one shard of about users/64 accounts,
+and a signup appends to (or, when its journal is full, rewrites) one shard, however many accounts there are.
+The number of shards is fixed when the store is first saved. Change it with the reshard tool, which copies
+every account into the new shard files and then swaps shards.json in one atomic step:
+    python3 todo_manager/sharded_users.py --shards 256              # reshard data/users/
+    python3 todo_manager/sharded_users.py --from data/users.json    # copy in the accounts from users.json"""
+
+import argparse
+import glob
+import json
+import os
+import zlib
+from contextlib import ExitStack
+import config
+from locking import file_lock, file_etag
+from storage import JSONUserStorage, write_atomic
+
+LAYOUT_FILE = "shards.json"
+
+def shard_index(username: str, shards: int) -> int:
+    """Returns: int: The shard (0 to shards - 1) a username is saved in."""
+    return zlib.crc32(username.encode("utf-8")) % shards
+
+def shard_file(folder: str, index: int, shards: int) -> str:
+    """Returns: str: Path of one shard, e.g. data/users/shard-0003-of-0064.json."""
+    return os.path.join(folder, f"shard-{index:04d}-of-{shards:04d}.json")
+
+def read_shard_count(folder: str) -> int:
+    """Returns: int: The number of shards saved in a folder's shards.json, or None if there isn't one yet."""
+    try:
+        with open(os.path.join(folder, LAYOUT_FILE)) as file:
+            return int(json.load(file)["shards"])
+    except FileNotFoundError:
+        return None
+
+def write_shard_count(folder: str, shards: int) -> None:
+    """Save the number of shards in shards.json (atomically - this is the moment a reshard takes effect).
+    Returns: None"""
+    write_atomic(os.path.join(folder, LAYOUT_FILE), lambda file: json.dump({"shards": shards}, file))
+
+# ========= Sharded user storage =========
+class ShardedUserStorage:
+    """Saves user accounts in a folder of shard files, each one a JSONUserStorage.
+    Only the shards that are used get loaded, so one login reads one shard instead of every account.
+    Purpose: User storage that stays fast with millions of accounts.
+    Methods: __init__, shard_count, shard_for, load, save, get, add, create, refresh.
+    Variables: folder (str), layout_file (str), shards (int), compact_every (int)."""
+
+    def __init__(self, folder: str, shards: int = None, compact_every: int = None) -> None:
+        """Set up the shard folder.
+        Parameters: folder (str): Folder holding shards.json and the shard files, e.g. data/users.
+                    shards (int): Number of shards if the store is new (default from config.USER_SHARDS).
+                        An existing store always keeps its own number (see reshard).
+                    compact_every (int): Signups in a shard's journal before that shard is rewritten (default from config).
+        Returns: None"""
+        self.folder = folder
+        self.layout_file = os.path.join(folder, LAYOUT_FILE)
+        self.shards = shards or config.USER_SHARDS
+        self.compact_every = compact_every
+        self._shards = {}       # shard index -> JSONUserStorage, made when first used
+        self._layout = False    # etag of shards.json the shard count was read from (False = not read yet)
+
+    def _check_layout(self) -> None:
+        """Read the shard count again if shards.json changed (e.g. another process resharded).
+        Returns: None"""
+        layout = file_etag(self.layout_file)
+        if layout == self._layout:
+            return
+        self.shards = read_shard_count(self.folder) or self.shards
+        self._shards = {}
+        self._layout = layout
+
+    def _ensure_layout(self) -> None:
+        """Save shards.json before the first account is saved, so every process agrees on the shard count.
+        Returns: None"""
+        self._check_layout()
+        if self._layout is not None:
+            return
+        with file_lock(self.layout_file):
+            if read_shard_count(self.folder) is None:
+                write_shard_count(self.folder, self.shards)
+            self._check_layout()
+
+    def shard_count(self) -> int:
+        """Returns: int: The number of shards."""
+        self._check_layout()
+        return self.shards
+
+    def _shard(self, index: int) -> JSONUserStorage:
+        """Returns: JSONUserStorage: One shard (the shard count must have been checked)."""
+        shard = self._shards.get(index)
+        if shard is None:
+            path = shard_file(self.folder, index, self.shards)
+            shard = self._shards[index] = JSONUserStorage(path, self.compact_every)
+        return shard
+
+    def shard_for(self, username: str) -> JSONUserStorage:
+        """Parameters: username (str): The username.
+        Returns: JSONUserStorage: The shard the user is (or would be) saved in."""
+        self._check_layout()
+        return self._shard(shard_index(username, self.shards))
+
+    def load(self) -> dict:
+        """Return every user from every shard (reads them all - logins only need get()).
+        Returns: dict: Usernames as keys, {"password": bytes} as values."""
+        self._check_layout()
+        users = {}
+        for index in range(self.shards):
+            users.update(self._shard(index).load())
+        return users
+
+    def save(self, users: dict) -> None:
+        """Rewrite every shard with the users that belong in it.
+        Parameters: users (dict): Usernames as keys, {"password": bytes} as values.
+        Returns: None"""
+        with file_lock(self.layout_file): # Not while someone reshards
+            self._ensure_layout()
+            buckets = [{} for _ in range(self.shards)]
+            for username, user_data in users.items():
+                buckets[shard_index(username, self.shards)][username] = user_data
+            for index, bucket in enumerate(buckets):
+                self._shard(index).save(bucket)
+
+    def get(self, username: str) -> dict:
+        """Look up one user (only their shard is read).
+        Parameters: username (str): The username to find.
+        Returns: dict: {"password": bytes}, or None if there is no such user."""
+        return self.shard_for(username).get(username)
+
+    def _write(self, username: str, write):
+        """Run a change on a user's shard while holding its lock. If the store was resharded before the
+        lock was taken, the change goes to the user's new shard instead of a file that's being removed.
+        Parameters: username (str): The user being saved.
+                    write (function): Called with the shard.
+        Returns: What write returned."""
+        self._ensure_layout()
+        while True:
+            shard = self.shard_for(username)
+            with file_lock(shard.users_file):
+                if file_etag(self.layout_file) == self._layout:
+                    return write(shard)
+
+    def add(self, username: str, user_data: dict) -> None:
+        """Save one user (new, or a new password for an existing one) in their shard.
+        Parameters: username (str): The username.
+                    user_data (dict): {"password": bytes}.
+        Returns: None"""
+        self._write(username, lambda shard: shard.add(username, user_data))
+
+    def create(self, username: str, user_data: dict) -> bool:
+        """Save a new user, but only if nobody has that username yet (checked under the shard's lock).
+        Parameters: username (str): The new username.
+                    user_data (dict): {"password": bytes}.
+        Returns: bool: True if the user was created, False if the username was already taken."""
+        return self._write(username, lambda shard: shard.create(username, user_data))
+
+    def refresh(self) -> None:
+        """Reload any shard that changed on disk since it was read.
+        Returns: None"""
+        self._check_layout()
+        for shard in self._shards.values():
+            shard.refresh()
+
+# ========= Resharding =========
+def reshard(folder: str, shards: int = None, source: str = None) -> int:
+    """Copy every account into a new set of shard files, then switch to them and remove the old ones.
+    Other copies of the app can keep running: every old shard is locked until shards.json points at the new ones.
+    Parameters: folder (str): The shard folder, e.g. data/users.
+                shards (int): The new number of shards (default: keep the current number, or config.USER_SHARDS).
+                source (str, optional): A users.json (from TODO_USER_STORAGE=json) whose accounts are copied in too.
+    Returns: int: The number of accounts in the store afterwards."""
+    layout_file = os.path.join(folder, LAYOUT_FILE)
+    with file_lock(layout_file), ExitStack() as locks:
+        old = read_shard_count(folder)
+        shards = shards or old or config.USER_SHARDS
+        users = {}
+        if old is not None:
+            for index in range(old):
+                path = shard_file(folder, index, old)
+                locks.enter_context(file_lock(path))
+                users.update(JSONUserStorage(path).load())
+        if source:
+            users.update(JSONUserStorage(source).load())
+        if shards == old and not source:
+            return len(users)
+
+        buckets = [{} for _ in range(shards)]
+        for username, user_data in users.items():
+            buckets[shard_index(username, shards)][username] = user_data
+        for index, bucket in enumerate(buckets):
+            JSONUserStorage(shard_file(folder, index, shards)).save(bucket)
+        write_shard_count(folder, shards)
+        if old is not None and old != shards:
+            for path in glob.glob(os.path.join(folder, f"shard-*-of-{old:04d}.*")):
+                os.remove(path)
+        return len(users)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reshard TO DO.'s user accounts (TODO_USER_STORAGE=sharded).")
+    parser.add_argument("--folder", default=os.path.join(config.DATA_DIR, "users"), help="shard folder")
+    parser.add_argument("--shards", type=int, help="new number of shards (default: keep the current number)")
+    parser.add_argument("--from", dest="source", metavar="USERS_JSON", help="also copy in the accounts from a users.json")
+    options = parser.parse_args()
+    if options.shards is not None and options.shards < 1:
+        parser.error("--shards must be at least 1")
+    count = reshard(options.folder, options.shards, options.source)
+    print(f"{count} accounts in {read_shard_count(options.folder)} shards in {options.folder}")
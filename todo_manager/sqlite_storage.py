@@ -0,0 +1,363 @@
+"""sqlite_storage.py: saves users and tasks in a single SQLite database instead of JSON files.
+
+Imports:
+- sqlite3: Python's built-in database, no extra install needed.
+- threading: Gives each thread its own connection (a connection can only be used by the thread that opened it).
+- glob: Finds every user's tasks file when moving old JSON data into the database.
+- os: Helps with file and folder handling (making sure the database is saved in the right place).
+- zlib: crc32, to pick which of the lock files a user's task saves take.
+- config: Custom file with app settings (where the database file lives).
+- locking: Custom file with file locks, so two app processes don't change the same user's tasks at once.
+- storage: Custom file with the JSON storage classes, used to read old data when migrating.
+
+The database has indexes on username, task ID, completion state and priority, so logging in, listing
+and filtering tasks only look at the rows they need instead of reading every file.
+Use it by setting TODO_TASK_STORAGE=sqlite and/or TODO_USER_STORAGE=sqlite (see config.py).
+Move existing JSON data across with: python3 todo_manager/sqlite_storage.py"""
+
+import sqlite3
+import threading
+import glob
+import os
+import zlib
+import config
+from storage import JournalTaskStorage, JSONUserStorage
+from locking import file_lock
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    username TEXT PRIMARY KEY,
+    password BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    username TEXT NOT NULL,
+    title TEXT NOT NULL,
+    completed INTEGER NOT NULL DEFAULT 0,
+    type TEXT NOT NULL,
+    priority TEXT,
+    task_id TEXT
+);
+CREATE INDEX IF NOT EXISTS tasks_by_user ON tasks (username, id);
+CREATE INDEX IF NOT EXISTS tasks_by_completed ON tasks (username, completed);
+CREATE INDEX IF NOT EXISTS tasks_by_priority ON tasks (username, priority);
+CREATE TABLE IF NOT EXISTS task_versions (
+    username TEXT PRIMARY KEY,
+    version INTEGER NOT NULL
+);
+"""
+TASK_ID_INDEX = "CREATE INDEX IF NOT EXISTS tasks_by_task_id ON tasks (username, task_id)"
+LOCK_STRIPES = 64 # Lock files per database: users' task saves only wait for users that share one
+
+_local = threading.local()  # Each thread's open connections, by database file
+_set_up = set()              # Database files whose tables have been checked by this process
+_set_up_lock = threading.Lock()
+
+# ========= Open the database =========
+def connect(db_file: str = None) -> sqlite3.Connection:
+    """Open (or reuse) this thread's connection to the database and make sure the tables exist.
+    Each thread gets its own connection, so the background flusher and a server's worker threads can use the
+    database too. WAL mode lets readers keep reading while a change is being written.
+    Parameters: db_file (str): Path to the database file (default from config.DATABASE_FILE).
+    Returns: sqlite3.Connection: The open connection."""
+    db_file = db_file or config.DATABASE_FILE
+    connections = getattr(_local, "connections", None)
+    if connections is None:
+        connections = _local.connections = {}
+    if db_file not in connections:
+        os.makedirs(os.path.dirname(db_file) or ".", exist_ok=True)
+        connection = sqlite3.connect(db_file)
+        connection.execute("PRAGMA synchronous=NORMAL")
+        with _set_up_lock:
+            if db_file not in _set_up:
+                _set_up_database(connection)
+                _set_up.add(db_file)
+        connections[db_file] = connection
+    return connections[db_file]
+
+def _set_up_database(connection: sqlite3.Connection) -> None:
+    """Switch a new database to WAL mode and create (or update) its tables. Runs once per file.
+    Parameters: connection (sqlite3.Connection): A connection to the database.
+    Returns: None"""
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.executescript(SCHEMA)
+    columns = [row[1] for row in connection.execute("PRAGMA table_info(tasks)")]
+    if "task_id" not in columns: # Database made before tasks had IDs
+        connection.execute("ALTER TABLE tasks ADD COLUMN task_id TEXT")
+    connection.execute(TASK_ID_INDEX)
+
+def _row_to_record(row: tuple) -> dict:
+    """Turn a (title, completed, type, priority, task_id) row into a task record.
+    Parameters: row (tuple): One row from the tasks table.
+    Returns: dict: The task record, the same shape as Task.to_dict()."""
+    title, completed, task_type, priority, task_id = row
+    record = {"title": title, "completed": bool(completed), "type": task_type}
+    if task_id is not None: # Rows saved before tasks had IDs don't have one
+        record["id"] = task_id
+    if priority is not None:
+        record["priority"] = priority
+    return record
+
+# ========= SQLite task storage =========
+class SQLiteTaskStorage:
+    """Saves one user's tasks as rows in the tasks table. Tasks keep their order by row id.
+    Purpose: Fast saving and filtering of large task lists.
+    Methods: __init__, db, load, iter_records, save, record, record_many, lock, etag, query, count,
+        count_by_priority.
+    Variables: username (str), db_file (str)."""
+
+    def __init__(self, username: str, db_file: str = None) -> None:
+        """Connect to the database for a user.
+        Parameters: username (str): The user whose tasks are stored.
+                    db_file (str): Path to the database file (default from config.DATABASE_FILE).
+        Returns: None"""
+        self.username = username
+        self.db_file = db_file or config.DATABASE_FILE
+        connect(self.db_file)
+
+    @property
+    def db(self) -> sqlite3.Connection:
+        """Returns: sqlite3.Connection: The calling thread's connection to the database."""
+        return connect(self.db_file)
+
+    def load(self) -> list:
+        """Load the user's task records, in the order they were added.
+        Returns: list[dict]: The saved task records."""
+        return list(self.iter_records())
+
+    def iter_records(self):
+        """Yield the user's task records one row at a time, in the order they were added.
+        Yields: dict: One saved task record."""
+        rows = self.db.execute(
+            "SELECT title, completed, type, priority, task_id FROM tasks WHERE username = ? ORDER BY id",
+            (self.username,))
+        for row in rows:
+            yield _row_to_record(row)
+
+    def save(self, records) -> None:
+        """Replace all of the user's tasks with the given records, in one transaction.
+        Parameters: records (iterable of dict): The task records to save.
+        Returns: None"""
+        db = self.db
+        with db:
+            db.execute("DELETE FROM tasks WHERE username = ?", (self.username,))
+            db.executemany(
+                "INSERT INTO tasks (username, title, completed, type, priority, task_id) VALUES (?, ?, ?, ?, ?, ?)",
+                ((self.username, r["title"], int(r["completed"]), r.get("type", "Task"), r.get("priority"), r.get("id"))
+                 for r in records))
+            self._bump_version(db)
+
+    def record(self, op: dict, snapshot) -> None:
+        """Save a single change as one row insert, update or delete.
+        Parameters: op (dict): The change that was made.
+                    snapshot (function): Not needed - every change is saved on its own row.
+        Returns: None"""
+        db = self.db
+        with db:
+            self._apply(op)
+            self._bump_version(db)
+
+    def record_many(self, ops: list, snapshot) -> None:
+        """Save a batch of changes in one transaction (one commit to disk).
+        Parameters: ops (list[dict]): The changes that were made, in order.
+                    snapshot (function): Not needed - every change is saved on its own row.
+        Returns: None"""
+        db = self.db
+        with db:
+            for op in ops:
+                self._apply(op)
+            self._bump_version(db)
+
+    def lock(self):
+        """Returns: context manager: Holds this user's task lock (other app processes saving the same user's tasks
+            wait) until the with block ends. Users are spread over LOCK_STRIPES lock files, so saving one user's
+            tasks doesn't wait for everyone else's - SQLite's own transactions keep the database itself safe."""
+        stripe = zlib.crc32(self.username.encode("utf-8")) % LOCK_STRIPES
+        return file_lock(f"{self.db_file}.tasks{stripe:02d}")
+
+    def etag(self) -> int:
+        """Returns: int: The user's version number, which goes up with every save of their tasks
+            (from any thread or process)."""
+        row = self.db.execute("SELECT version FROM task_versions WHERE username = ?", (self.username,)).fetchone()
+        return 0 if row is None else row[0]
+
+    def _bump_version(self, db: sqlite3.Connection) -> None:
+        """Add one to the user's version number (inside the caller's transaction), so etag() changes.
+        Parameters: db (sqlite3.Connection): The connection the change is being saved on.
+        Returns: None"""
+        db.execute("INSERT INTO task_versions (username, version) VALUES (?, 1) "
+                   "ON CONFLICT(username) DO UPDATE SET version = version + 1", (self.username,))
+
+    def _row_id(self, op: dict) -> int:
+        """Find the row a complete/delete change is for, by task ID (using the index), or for rows saved before tasks
+        had IDs, by position, or by title if the task has moved.
+        Parameters: op (dict): The change, with "index" and (usually) "id" and "title".
+        Returns: int: The row id, or None if the task is gone."""
+        task_id, title = op.get("id"), op.get("title")
+        if task_id is not None:
+            row = self.db.execute("SELECT id FROM tasks WHERE username = ? AND task_id = ?",
+                                  (self.username, task_id)).fetchone()
+            if row is not None:
+                return row[0]
+        row = self.db.execute("SELECT id, title, task_id FROM tasks WHERE username = ? ORDER BY id LIMIT 1 OFFSET ?",
+                              (self.username, op["index"])).fetchone()
+        if row is not None and (title is None or row[1] == title) and (task_id is None or row[2] is None):
+            return row[0]
+        if title is None:
+            return None
+        without_ids = " AND task_id IS NULL" if task_id is not None else "" # A task with an ID is only found by it
+        row = self.db.execute(f"SELECT id FROM tasks WHERE username = ? AND title = ?{without_ids} ORDER BY id LIMIT 1",
+                              (self.username, title)).fetchone()
+        return None if row is None else row[0]
+
+    def _apply(self, op: dict) -> None:
+        """Run the SQL for one change (inside the caller's transaction).
+        Parameters: op (dict): The change that was made.
+        Returns: None"""
+        if op["op"] == "add":
+            task = op["task"]
+            self.db.execute(
+                "INSERT INTO tasks (username, title, completed, type, priority, task_id) VALUES (?, ?, ?, ?, ?, ?)",
+                (self.username, task["title"], int(task["completed"]), task.get("type", "Task"), task.get("priority"),
+                 task.get("id")))
+        elif op["op"] == "complete":
+            self.db.execute("UPDATE tasks SET completed = 1 WHERE id = ?", (self._row_id(op),))
+        elif op["op"] == "delete":
+            self.db.execute("DELETE FROM tasks WHERE id = ?", (self._row_id(op),))
+        elif op["op"] == "complete_all":
+            where, params = self._where(priority=op.get("priority"))
+            self.db.execute(f"UPDATE tasks SET completed = 1 WHERE {where}", params)
+        elif op["op"] == "delete_completed":
+            self.db.execute("DELETE FROM tasks WHERE username = ? AND completed = 1", (self.username,))
+        else:
+            raise ValueError(f"Unknown task change: {op['op']}")
+
+    def _where(self, completed: bool = None, priority: str = None) -> tuple:
+        """Build the WHERE part of a query for the given filters.
+        Returns: tuple: (sql, parameters)."""
+        sql, params = "username = ?", [self.username]
+        if completed is not None:
+            sql += " AND completed = ?"
+            params.append(int(completed))
+        if priority is not None:
+            sql += " AND priority = ?"
+            params.append(priority)
+        return sql, params
+
+    def query(self, completed: bool = None, priority: str = None, numbered: bool = False) -> list:
+        """Find the user's tasks matching the filters, using the indexes.
+        Parameters: completed (bool): Only done (True) or not done (False) tasks. None for both.
+                    priority (str): Only tasks with this priority ("High", "Medium", "Low"). None for all.
+                    numbered (bool): Add each task's number (its position in the whole list, from 1) as "number".
+                        A number depends on every task before it, so the user's rows are numbered in SQL (walking
+                        the username index) before the filters are applied.
+        Returns: list[dict]: The matching task records, in order."""
+        where, params = self._where(completed, priority)
+        if not numbered:
+            rows = self.db.execute(
+                f"SELECT title, completed, type, priority, task_id FROM tasks WHERE {where} ORDER BY id", params)
+            return [_row_to_record(row) for row in rows]
+        rows = self.db.execute(
+            "SELECT title, completed, type, priority, task_id, number FROM ("
+            "SELECT *, ROW_NUMBER() OVER (ORDER BY id) AS number FROM tasks WHERE username = ?"
+            f") WHERE {where} ORDER BY number", [self.username, *params])
+        return [dict(_row_to_record(row[:5]), number=row[5]) for row in rows]
+
+    def count(self, completed: bool = None, priority: str = None) -> int:
+        """Count the user's tasks matching the filters, without loading them.
+        Parameters: completed (bool), priority (str): The same filters as query().
+        Returns: int: Number of matching tasks."""
+        where, params = self._where(completed, priority)
+        return self.db.execute(f"SELECT COUNT(*) FROM tasks WHERE {where}", params).fetchone()[0]
+
+    def count_by_priority(self) -> dict:
+        """Count the user's tasks at each priority from the priority index, without reading the tasks.
+        Returns: dict: "High", "Medium", "Low" (and None for tasks without a priority) -> number of tasks."""
+        rows = self.db.execute("SELECT priority, COUNT(*) FROM tasks WHERE username = ? GROUP BY priority",
+                               (self.username,))
+        return dict(rows.fetchall())
+
+# ========= SQLite user storage =========
+class SQLiteUserStorage:
+    """Saves user accounts as rows in the users table. The username is the primary key,
+    so looking up one user at login doesn't read anyone else's details.
+    Purpose: Fast signup and login with lots of accounts.
+    Methods: __init__, db, load, save, get, add, create.
+    Variables: db_file (str)."""
+
+    def __init__(self, db_file: str = None) -> None:
+        """Connect to the database.
+        Parameters: db_file (str): Path to the database file (default from config.DATABASE_FILE).
+        Returns: None"""
+        self.db_file = db_file or config.DATABASE_FILE
+        connect(self.db_file)
+
+    @property
+    def db(self) -> sqlite3.Connection:
+        """Returns: sqlite3.Connection: The calling thread's connection to the database."""
+        return connect(self.db_file)
+
+    def load(self) -> dict:
+        """Load every user.
+        Returns: dict: Usernames as keys, {"password": bytes} as values."""
+        rows = self.db.execute("SELECT username, password FROM users")
+        return {username: {"password": bytes(password)} for username, password in rows}
+
+    def save(self, users: dict) -> None:
+        """Save every user in the dict (adds new users, updates existing passwords).
+        Parameters: users (dict): Usernames as keys, {"password": bytes} as values.
+        Returns: None"""
+        with self.db:
+            self.db.executemany(
+                "INSERT OR REPLACE INTO users (username, password) VALUES (?, ?)",
+                ((username, user_data["password"]) for username, user_data in users.items()))
+
+    def get(self, username: str) -> dict:
+        """Look up one user by username.
+        Parameters: username (str): The username to find.
+        Returns: dict: {"password": bytes}, or None if there is no such user."""
+        row = self.db.execute("SELECT password FROM users WHERE username = ?", (username,)).fetchone()
+        return {"password": bytes(row[0])} if row else None
+
+    def add(self, username: str, user_data: dict) -> None:
+        """Save one new user.
+        Parameters: username (str): The new username.
+                    user_data (dict): {"password": bytes}.
+        Returns: None"""
+        with self.db:
+            self.db.execute("INSERT OR REPLACE INTO users (username, password) VALUES (?, ?)",
+                            (username, user_data["password"]))
+
+    def create(self, username: str, user_data: dict) -> bool:
+        """Save a new user, but only if nobody has that username yet (the primary key makes this safe
+        when two people sign up with the same name at the same time).
+        Parameters: username (str): The new username.
+                    user_data (dict): {"password": bytes}.
+        Returns: bool: True if the user was created, False if the username was already taken."""
+        with self.db:
+            cursor = self.db.execute("INSERT OR IGNORE INTO users (username, password) VALUES (?, ?)",
+                                     (username, user_data["password"]))
+        return cursor.rowcount == 1
+
+# ========= Move JSON data into SQLite =========
+def migrate_json_to_sqlite(data_dir: str = None, db_file: str = None) -> tuple:
+    """Copy every user from users.json and every {username}_tasks.json (plus any journal) into the database.
+    Safe to run more than once - each user's tasks are replaced, not duplicated.
+    Parameters: data_dir (str): Folder holding the JSON files (default from config.DATA_DIR).
+                db_file (str): Path to the database file (default from config.DATABASE_FILE).
+    Returns: tuple: (number of users copied, number of tasks copied)."""
+    data_dir = data_dir or config.DATA_DIR
+    users = JSONUserStorage(os.path.join(data_dir, "users.json")).load()
+    SQLiteUserStorage(db_file).save(users)
+
+    task_count = 0
+    for filename in glob.glob(os.path.join(data_dir, "*_tasks.json")):
+        username = os.path.basename(filename)[:-len("_tasks.json")]
+        records = JournalTaskStorage(filename).load() # Also picks up changes saved in a journal
+        SQLiteTaskStorage(username, db_file).save(records)
+        task_count += len(records)
+    return len(users), task_count
+
+if __name__ == "__main__":
+    user_count, task_count = migrate_json_to_sqlite()
+    print(f"Moved {user_count} users and {task_count} tasks into {config.DATABASE_FILE}")
@@ -0,0 +1,64 @@
+"""startup_check.py: checks that TO DO. still starts quickly.
+
+Imports:
+- os: Finds the todo_manager folder so the check can be run from anywhere.
+- subprocess: Starts a fresh Python for each measurement, so nothing is already imported.
+- sys: Finds the running Python and sets the exit code.
+- config: Custom file with app settings (the startup time budget).
+
+How it works: runs `python -X importtime -c "import main"` a few times, reads how long importing main
+took in total, and checks that heavy libraries (rich, pyfiglet, bcrypt...) weren't imported before they're needed.
+Run it with: python3 todo_manager/startup_check.py [module]
+Exits with 1 if the best time is over config.STARTUP_BUDGET_MS or a heavy library was imported."""
+
+import os
+import subprocess
+import sys
+import config
+
+HEAVY_MODULES = ("rich", "pyfiglet", "bcrypt", "emoji", "asyncio", "sqlite3")
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# ========= Measure one start =========
+def measure_import(module: str = "main") -> tuple:
+    """Import a module in a fresh Python with -X importtime.
+    Parameters: module (str): The app module to import (default main).
+    Returns: tuple: (total import time in ms, list of heavy libraries that were imported)."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=APP_DIR, capture_output=True, text=True, check=True)
+    total_us = 0
+    imported = set()
+    for line in result.stderr.splitlines():  # e.g. "import time:  1234 |  5678 | main"
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        if not parts[1].strip().isdigit():
+            continue  # Header line
+        name = parts[2].strip()
+        imported.add(name.split(".")[0])
+        if name == module:
+            total_us = int(parts[1])
+    heavy = [name for name in HEAVY_MODULES if name in imported]
+    return total_us / 1000, heavy
+
+# ========= Check against the budget =========
+def check_startup(module: str = "main", runs: int = 5, budget_ms: float = None) -> bool:
+    """Measure startup a few times and compare the best run with the budget.
+    Parameters: module (str): The app module to import (default main).
+                runs (int): Number of fresh starts to measure.
+                budget_ms (float): Allowed import time in ms (default from config.STARTUP_BUDGET_MS).
+    Returns: bool: True if startup is within budget and no heavy library was imported."""
+    budget_ms = budget_ms or config.STARTUP_BUDGET_MS
+    times = []
+    heavy = []
+    for _ in range(runs):
+        took_ms, heavy = measure_import(module)
+        times.append(took_ms)
+    best = min(times)
+    print(f"import {module}: best {best:.1f} ms, worst {max(times):.1f} ms over {runs} runs (budget {budget_ms} ms)")
+    if heavy:
+        print(f"Imported too early: {', '.join(heavy)}")
+    return best <= budget_ms and not heavy
+
+if __name__ == "__main__":
+    sys.exit(0 if check_startup(*sys.argv[1:2]) else 1)
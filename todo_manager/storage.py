@@ -0,0 +1,624 @@
+"""storage.py: saves and loads users and their tasks so they are still there next time.
+
+Imports:
+- json: Save and load task records as text files.
+- os: Helps with file and folder handling (making sure files are saved in the right place).
+- contextlib: nullcontext, a lock that doesn't lock anything (for guest tasks that are never saved).
+- itertools: chain, to put a journal snapshot's generation record in front of its task records.
+- shutil: Copies the old file to a backup if the system can't hard link it.
+- tempfile: Makes a temporary file next to the real one, so a save can be swapped in all at once.
+- serializers: Custom file with the tasks file formats (pretty JSON, compact JSON, msgpack), picked by config.TASK_FORMAT.
+- config: Custom file with app settings (which storage to use, when to compact the journal).
+- locking: Custom file with file locks and etags, so several copies of the app can share data/ safely.
+- metrics: Custom file that times saves and loads and counts the bytes written (when metrics are on).
+- sqlite_storage: Custom file with the SQLite storage (only imported when it's picked in config).
+- sharded_users: Custom file with ShardedUserStorage, which splits users across many JSONUserStorage files (only imported when it's picked in config).
+- mapped: Custom file with MappedTaskStorage, which builds on JSONTaskStorage (only imported when it's picked in config).
+
+Storage classes only work with plain task records (dicts like {"title": ..., "completed": ...}),
+so they don't need to know about the Task classes in tasks.py. Every storage class has the same methods,
+so TaskList can use any of them:
+- load(): Returns the saved list of task records.
+- iter_records(): Yields the saved task records one at a time (streams from disk where it can).
+- save(records): Saves the full list of task records (any iterable, e.g. a generator).
+- record(op, snapshot): Saves a single change (add/complete/delete). snapshot() returns the full list if needed.
+- record_many(ops, snapshot): Saves a batch of changes with one write.
+- lock(): A with block that stops other processes writing this user's tasks until it ends.
+- etag(): Identifies the version on disk, so TaskList can tell if another process saved since it loaded.
+
+User storage classes work the same way, with a dict of users ({username: {"password": bytes}}):
+- load(), save(users), get(username), add(username, user_data), create(username, user_data).
+
+Whole files (tasks JSON, users.json) are saved atomically: written to a temporary file, flushed to disk,
+then swapped in with os.replace, so a crash mid-save leaves the old file untouched. The previous version
+is kept as a rolling backup (bob_tasks.json.bak, .bak2, ...), and loading falls back to the newest
+readable backup if the main file is damaged."""
+
+import json
+import os
+from contextlib import nullcontext
+from itertools import chain
+import shutil
+import tempfile
+import config
+from locking import file_lock, file_etag
+import metrics
+import serializers
+
+# ========= Apply one change to a list of records =========
+def apply_op(records: list, op: dict) -> None:
+    """Apply a single saved change to a list of task records (used when replaying the journal).
+    Parameters: records (list[dict]): The task records to change.
+                op (dict): The change, e.g. {"op": "add", "task": {...}},
+                    {"op": "delete", "index": 0, "id": "3f9a0c2b7d41e8a6", "title": "Homework"},
+                    {"op": "complete_all", "priority": "High"} or {"op": "delete_completed"}.
+    Returns: None"""
+    kind = op["op"]
+    if kind == "add":
+        records.append(op["task"])
+    elif kind == "complete":
+        index = find_op_index(records, op)
+        if index is not None:
+            records[index]["completed"] = True
+    elif kind == "delete":
+        index = find_op_index(records, op)
+        if index is not None:
+            records.pop(index)
+    elif kind == "complete_all":
+        for record in records:
+            if op.get("priority") is None or record.get("priority") == op["priority"]:
+                record["completed"] = True
+    elif kind == "delete_completed":
+        records[:] = [record for record in records if not record["completed"]]
+    else:
+        raise ValueError(f"Unknown task change: {kind}")
+
+def find_op_index(records: list, op: dict) -> int:
+    """Find the task a complete/delete change is for. Changes remember the task's ID (and title), so if another
+    session added or deleted tasks first (moving this one), it's found by ID instead of position. Tasks saved
+    before tasks had IDs are found by title.
+    Parameters: records (list[dict]): The task records.
+                op (dict): The change, with "index" and (usually) "id" and "title".
+    Returns: int: The index of the task, or None if it's gone."""
+    index, task_id, title = op["index"], op.get("id"), op.get("title")
+    if 0 <= index < len(records):
+        record = records[index]
+        if task_id is not None and record.get("id") == task_id:
+            return index
+        if (task_id is None or "id" not in record) and (title is None or record["title"] == title):
+            return index
+    if task_id is not None:
+        for i, record in enumerate(records):
+            if record.get("id") == task_id:
+                return i
+    if title is None:
+        return None
+    for i, record in enumerate(records):
+        if record["title"] == title and (task_id is None or "id" not in record):
+            return i
+    return None # Already deleted by someone else
+
+# ========= Small helpers =========
+def _file_stamp(path: str) -> tuple:
+    """Returns: tuple: (size, modified time in ns) of a file, or None if it doesn't exist."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_size, stat.st_mtime_ns)
+
+def _append_line(path: str, line: str) -> None:
+    """Append one line of text to a file and make sure it reaches the disk.
+    Parameters: path (str): The file to append to.
+                line (str): The text to add (a newline is added).
+    Returns: None"""
+    _append_lines(path, [line])
+
+def _append_lines(path: str, lines: list) -> None:
+    """Append several lines of text to a file in one write, then make sure they reach the disk (one fsync).
+    Parameters: path (str): The file to append to.
+                lines (list[str]): The lines to add (newlines are added).
+    Returns: None"""
+    with open(path, 'a') as file:
+        file.write("".join(line + "\n" for line in lines))
+        file.flush()
+        if config.FSYNC_WRITES:
+            os.fsync(file.fileno())
+
+# ========= Crash-safe file writes =========
+def backup_files(path: str, count: int = None) -> list:
+    """List the backup file names for a file, newest first, e.g. [bob_tasks.json.bak, bob_tasks.json.bak2].
+    Parameters: path (str): The file being backed up.
+                count (int): Number of backups kept (default from config.BACKUP_COUNT).
+    Returns: list[str]: The backup paths (they may not exist yet)."""
+    count = config.BACKUP_COUNT if count is None else count
+    return [f"{path}.bak"] + [f"{path}.bak{i}" for i in range(2, count + 1)] if count > 0 else []
+
+def _rotate_backups(path: str, count: int) -> None:
+    """Shift each backup one place older (dropping the oldest), then make the current file the newest backup.
+    Parameters: path (str): The file about to be replaced.
+                count (int): Number of backups to keep.
+    Returns: None"""
+    backups = backup_files(path, count)
+    for newer, older in reversed(list(zip(backups, backups[1:]))):
+        if os.path.exists(newer):
+            os.replace(newer, older)
+    if os.path.exists(backups[0]):
+        os.remove(backups[0])
+    try:
+        os.link(path, backups[0]) # Same file, no copying - the real file is replaced (not changed) next
+    except OSError:
+        shutil.copy2(path, backups[0])
+
+def _fsync_dir(directory: str) -> None:
+    """Make sure a rename in a folder reaches the disk (not possible on Windows, where it's skipped).
+    Parameters: directory (str): The folder to sync.
+    Returns: None"""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+@metrics.timed("storage.write")
+def write_atomic(path: str, write, backups: int = 0, binary: bool = False) -> None:
+    """Save a file so that it's either completely the old version or completely the new one, even after a crash.
+    Writes to a temporary file in the same folder, flushes it to disk, then swaps it in with os.replace.
+    Parameters: path (str): The file to save.
+                write (function): Called with the open temporary file to write the new contents.
+                backups (int): Number of previous versions to keep as .bak files (0 for none).
+                binary (bool): Open the temporary file in binary mode (write gets bytes) instead of text.
+    Returns: None"""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb' if binary else 'w') as file:
+            write(file)
+            file.flush()
+            metrics.add_bytes("storage.write", file.tell())
+            if config.FSYNC_WRITES:
+                os.fsync(file.fileno())
+        if os.path.exists(path):
+            shutil.copymode(path, temp_path) # Keep the file's permissions
+            if backups:
+                _rotate_backups(path, backups)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path) # Leave the old file as it was
+        raise
+    if config.FSYNC_WRITES:
+        _fsync_dir(directory)
+
+GENERATION_KEY = "generation" # Key of the record a journal snapshot starts with, e.g. {"generation": "9c1f..."}
+
+# ========= Whole file JSON storage =========
+class JSONTaskStorage:
+    """Saves all of a user's tasks in one file, rewriting the file after every change.
+    Purpose: The original TO DO. storage (data/{username}_tasks.json), saved in the format picked by
+        config.TASK_FORMAT and read in whichever format the file was saved in (see serializers.py).
+    Inheritance: Base class for JournalTaskStorage.
+    Methods: __init__, load, iter_records, recover, save, record, record_many, lock, etag.
+    Variables: filename (str), recovered_from (str), generation (str)."""
+
+    def __init__(self, filename: str) -> None:
+        """Set up the file location for the tasks.
+        Parameters: filename (str): Path to the JSON file storing the tasks.
+        Returns: None"""
+        self.filename = filename
+        self.recovered_from = None # Backup file the tasks were last loaded from, if the main file was damaged
+        self.generation = None # Generation ID of the file last read (see JournalTaskStorage.save), if it has one
+
+    def load(self) -> list:
+        """Load task records from the JSON file. If the file doesn't exist yet, return an empty list.
+        If it's damaged, load the newest good backup instead (see recover).
+        Returns: list[dict]: The saved task records.
+        Raises: json.JSONDecodeError: If the file and every backup are damaged."""
+        self.recovered_from = None
+        try:
+            return list(JSONTaskStorage.iter_records(self)) # Just this file (a journal adds its changes after)
+        except json.JSONDecodeError:
+            return self.recover()
+
+    def recover(self) -> list:
+        """Load the newest backup that can be read, after the main file turned out to be damaged.
+        If none can be read, the damaged file is kept as {filename}.corrupt so the next save doesn't lose it.
+        Returns: list[dict]: The task records from the backup.
+        Raises: json.JSONDecodeError: If every backup is damaged or missing."""
+        for backup in backup_files(self.filename):
+            try:
+                with open(backup, 'rb') as file:
+                    records = list(self._without_generation(serializers.read_records(file)))
+            except (FileNotFoundError, json.JSONDecodeError):
+                continue
+            self.recovered_from = backup
+            return records
+        os.replace(self.filename, self.filename + ".corrupt")
+        raise json.JSONDecodeError(f"{self.filename} is damaged and has no good backup "
+                                   f"(kept as {self.filename}.corrupt)", "", 0)
+
+    def iter_records(self):
+        """Yield task records from the tasks file one at a time (whatever format it was saved in).
+        Yields: dict: One saved task record (nothing if the file doesn't exist yet)."""
+        try:
+            file = open(self.filename, 'rb')
+        except FileNotFoundError:
+            return
+        with file:
+            yield from self._without_generation(serializers.read_records(file))
+
+    def _without_generation(self, records):
+        """Pass on task records, taking out the generation record a journal snapshot starts with (if there is one)
+        and keeping its ID in self.generation.
+        Parameters: records (iterable of dict): The records read from a tasks file.
+        Yields: dict: One task record."""
+        self.generation = None
+        records = iter(records)
+        for record in records: # Only the first record can be a generation record
+            if len(record) == 1 and GENERATION_KEY in record:
+                self.generation = record[GENERATION_KEY]
+            else:
+                yield record
+            break
+        yield from records
+
+    def save(self, records) -> None:
+        """Rewrite the tasks file with the full list of task records (in config.TASK_FORMAT), a chunk at a time.
+        The file is replaced atomically and the old version kept as a backup.
+        Parameters: records (iterable of dict): The task records to save.
+        Returns: None"""
+        write_atomic(self.filename, lambda file: serializers.write_records(records, file),
+                     backups=config.BACKUP_COUNT, binary=True)
+
+    def record(self, op: dict, snapshot) -> None:
+        """Save a single change. A JSON file can't be changed in place, so the whole list is rewritten.
+        Parameters: op (dict): The change that was made.
+                    snapshot (function): Returns the full list of task records.
+        Returns: None"""
+        self.save(snapshot())
+
+    def record_many(self, ops: list, snapshot) -> None:
+        """Save a batch of changes. The whole list is rewritten once, however many changes there are.
+        Parameters: ops (list[dict]): The changes that were made, in order.
+                    snapshot (function): Returns the full list of task records.
+        Returns: None"""
+        self.save(snapshot())
+
+    def lock(self):
+        """Returns: context manager: Holds this tasks file's lock (other processes wait) until the with block ends."""
+        return file_lock(self.filename)
+
+    def etag(self):
+        """Returns: tuple: The version of the tasks file on disk (None if there isn't one yet)."""
+        return file_etag(self.filename)
+
+# ========= Append-only journal storage =========
+class JournalTaskStorage(JSONTaskStorage):
+    """Saves each change as one small line at the end of a journal file, instead of rewriting every task.
+    Every so often the journal is compacted: the full list is written to the main JSON file (the snapshot)
+    and the journal starts again empty. Loading reads the snapshot and replays the journal on top.
+    Each snapshot starts with a new random generation ID ({"generation": ...}, skipped when tasks are read), and
+    the journal's first line names the generation it belongs to. Copying or restoring data/ keeps both, so the
+    journal is still replayed however the files' modified times change.
+    Purpose: Keep each add/complete/delete the same small cost, no matter how many tasks a user has.
+    Inheritance: Inherits from JSONTaskStorage (the snapshot is the normal tasks JSON file).
+    Methods: __init__, load, iter_records, save, record, record_many, snapshot_id, etag.
+    Variables: filename (str), journal_file (str), compact_every (int), pending_ops (int), journal_ok (bool)."""
+
+    def __init__(self, filename: str, compact_every: int = None) -> None:
+        """Set up the snapshot and journal file locations.
+        Parameters: filename (str): Path to the JSON snapshot file.
+                    compact_every (int): Number of journal changes before compacting (default from config).
+        Returns: None"""
+        super().__init__(filename)
+        self.journal_file = os.path.splitext(filename)[0] + ".journal"
+        self.compact_every = compact_every or config.JOURNAL_COMPACT_EVERY
+        self.pending_ops = 0
+        self.journal_ok = False  # True once the journal on disk is known to match the snapshot
+
+    def snapshot_id(self):
+        """Identify the snapshot that was last loaded (or saved): its generation ID, or for a snapshot saved before
+        they had one, its size and modified time. The journal remembers which snapshot it belongs to, so an old
+        journal left behind by a crash during compaction is never replayed twice.
+        Returns: str or list: The generation ID, [size, modified time in ns], or None if there is no snapshot yet."""
+        if self.generation is not None:
+            return self.generation
+        stamp = _file_stamp(self.recovered_from or self.filename)
+        return None if stamp is None else list(stamp)
+
+    def load(self) -> list:
+        """Load the snapshot, then replay every change saved in the journal since.
+        A half-written last line (e.g. power cut mid-save) is skipped.
+        Returns: list[dict]: The saved task records."""
+        records = super().load() # Falls back to a backup if the snapshot is damaged (then it's the backup's ID)
+        self.pending_ops = 0
+        self.journal_ok = False
+        try:
+            with open(self.journal_file, 'r') as journal:
+                try:
+                    base = json.loads(journal.readline()).get("base")
+                except json.JSONDecodeError:
+                    return records # No (or a half written) header - not a journal for this snapshot
+                if base != self.snapshot_id():
+                    return records  # Journal belongs to an older snapshot - already included
+                self.journal_ok = True
+                for line in journal:
+                    try:
+                        op = json.loads(line)
+                    except json.JSONDecodeError:
+                        break  # Unfinished last change - ignore it
+                    apply_op(records, op)
+                    self.pending_ops += 1
+        except FileNotFoundError:
+            pass
+        return records
+
+    def etag(self):
+        """Returns: tuple: The versions of the snapshot and the journal on disk (appending a change counts too)."""
+        return (file_etag(self.filename), file_etag(self.journal_file))
+
+    def iter_records(self):
+        """Yield the saved task records. The journal has to be replayed first, so this loads them all.
+        Yields: dict: One saved task record."""
+        yield from self.load()
+
+    def save(self, records) -> None:
+        """Compact: write the full snapshot with a new generation ID, then start a new empty journal for it.
+        Parameters: records (iterable of dict): The task records to save.
+        Returns: None"""
+        generation = os.urandom(8).hex()
+        super().save(chain([{GENERATION_KEY: generation}], records))
+        self.generation, self.recovered_from = generation, None
+        header = json.dumps({"base": self.snapshot_id()}) + "\n"
+        write_atomic(self.journal_file, lambda journal: journal.write(header))
+        self.pending_ops = 0
+        self.journal_ok = True
+
+    def record(self, op: dict, snapshot) -> None:
+        """Append one change to the journal and make sure it reaches the disk.
+        Compacts once the journal has compact_every changes in it.
+        Parameters: op (dict): The change that was made.
+                    snapshot (function): Returns the full list of task records (only called when compacting).
+        Returns: None"""
+        if self.pending_ops >= self.compact_every or not self.journal_ok:
+            self.save(snapshot())
+            return
+        _append_line(self.journal_file, json.dumps(op, separators=(",", ":")))
+        self.pending_ops += 1
+
+    def record_many(self, ops: list, snapshot) -> None:
+        """Append a batch of changes to the journal in one write with one fsync.
+        Compacts instead if the batch would take the journal past compact_every changes.
+        Parameters: ops (list[dict]): The changes that were made, in order.
+                    snapshot (function): Returns the full list of task records (only called when compacting).
+        Returns: None"""
+        if self.pending_ops + len(ops) > self.compact_every or not self.journal_ok:
+            self.save(snapshot())
+            return
+        _append_lines(self.journal_file, [json.dumps(op, separators=(",", ":")) for op in ops])
+        self.pending_ops += len(ops)
+
+# ========= Memory only storage (guest users) =========
+class MemoryTaskStorage:
+    """Keeps nothing - tasks only live while the app is running.
+    Purpose: Guest users, whose tasks are not saved after they exit.
+    Methods: load, iter_records, save, record, record_many, lock, etag."""
+
+    def load(self) -> list:
+        """Returns: list: Always an empty list, nothing is ever saved."""
+        return []
+
+    def iter_records(self):
+        """Returns: iterator: Always empty, nothing is ever saved."""
+        return iter(())
+
+    def save(self, records) -> None:
+        """Returns: None (nothing is saved)."""
+
+    def record(self, op: dict, snapshot) -> None:
+        """Returns: None (nothing is saved)."""
+
+    def record_many(self, ops: list, snapshot) -> None:
+        """Returns: None (nothing is saved)."""
+
+    def lock(self):
+        """Returns: context manager: Nothing to lock - only this session has these tasks."""
+        return nullcontext()
+
+    def etag(self):
+        """Returns: None (nothing on disk to change)."""
+        return None
+
+# ========= JSON user storage with an in-memory index =========
+class JSONUserStorage:
+    """Saves user accounts in data/users.json, plus a small journal (data/users.journal) for new signups.
+    Every account is loaded into memory once and kept there. It's only read again when one of the
+    files changes on disk (checked by size and modified time), so each login is a dict lookup.
+    New signups are appended to the journal, which is folded back into users.json every compact_every signups.
+    Passwords are bcrypt hashes (bytes), stored in the files as latin-1 text.
+    Purpose: The original TO DO. user storage format, fast with lots of accounts.
+    Methods: __init__, load, save, get, add, create, refresh.
+    Variables: users_file (str), journal_file (str), compact_every (int)."""
+
+    def __init__(self, users_file: str, compact_every: int = None) -> None:
+        """Set up the file locations for the users.
+        Parameters: users_file (str): Path to the JSON file storing user data.
+                    compact_every (int): Number of journal signups before rewriting users.json (default from config).
+        Returns: None"""
+        self.users_file = users_file
+        self.journal_file = os.path.splitext(users_file)[0] + ".journal"
+        self.compact_every = compact_every or config.JOURNAL_COMPACT_EVERY
+        self._index = {}           # username -> password hash as latin-1 text
+        self._journal_count = 0    # signups in the journal since users.json was written
+        self._stamp = None         # file stamps the index was loaded from
+
+    def _stamps(self) -> tuple:
+        """Returns: tuple: The current etags of users.json and the journal."""
+        return (file_etag(self.users_file), file_etag(self.journal_file))
+
+    def refresh(self) -> None:
+        """Reload the in-memory index, but only if users.json or the journal changed since last time.
+        Returns: None"""
+        if self._stamps() == self._stamp:
+            return
+        with file_lock(self.users_file): # Don't read while another process is rewriting
+            self._reload()
+
+    def _reload(self) -> None:
+        """Read users.json and the journal into the in-memory index (the lock must be held).
+        Returns: None"""
+        stamp = self._stamps()
+        index = {}
+        if stamp[0] is not None:
+            for username, user_data in self._read_users().items():
+                index[username] = user_data["password"]
+        journal_count = 0
+        if stamp[1] is not None:
+            with open(self.journal_file, "r") as journal:
+                for line in journal:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        break  # Unfinished last signup - ignore it
+                    index[entry["username"]] = entry["password"]
+                    journal_count += 1
+        self._index, self._journal_count, self._stamp = index, journal_count, stamp
+
+    @metrics.timed("users.read")
+    def _read_users(self) -> dict:
+        """Read users.json, or the newest good backup of it if it's damaged.
+        Returns: dict: Usernames as keys, {"password": str} as values (as saved in the file).
+        Raises: json.JSONDecodeError: If users.json and every backup are damaged."""
+        for path in [self.users_file] + backup_files(self.users_file):
+            try:
+                with open(path, "r") as f:
+                    return json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError) as e:
+                error = e
+        raise error
+
+    def load(self) -> dict:
+        """Return every user. If there are none yet, return an empty dict.
+        Returns: dict: Usernames as keys, {"password": bytes} as values."""
+        self.refresh()
+        return {username: {"password": password.encode('latin-1')} # Convert string back to bytes for bcrypt
+                for username, password in self._index.items()}
+
+    @metrics.timed("users.save")
+    def save(self, users: dict) -> None:
+        """Rewrite users.json (atomically, keeping the old one as a backup) with every user and empty the journal.
+        Parameters: users (dict): Usernames as keys, {"password": bytes} as values.
+        Returns: None"""
+        users_for_json = {} # Convert bytes to string for JSON storage
+        for username, user_data in users.items():
+            users_for_json[username] = {
+                "password": user_data["password"].decode('latin-1')
+            }
+        with file_lock(self.users_file):
+            write_atomic(self.users_file, lambda f: json.dump(users_for_json, f, indent=2), backups=config.BACKUP_COUNT)
+            if os.path.exists(self.journal_file): # Everything in the journal is in users.json now
+                os.remove(self.journal_file)
+            self._index = {username: user_data["password"] for username, user_data in users_for_json.items()}
+            self._journal_count = 0
+            self._stamp = self._stamps()
+
+    def get(self, username: str) -> dict:
+        """Look up one user in the in-memory index.
+        Parameters: username (str): The username to find.
+        Returns: dict: {"password": bytes}, or None if there is no such user."""
+        self.refresh()
+        password = self._index.get(username)
+        return None if password is None else {"password": password.encode('latin-1')}
+
+    def add(self, username: str, user_data: dict) -> None:
+        """Save one user (new, or a new password for an existing one) by appending a line to the journal
+        (no rewrite of users.json).
+        Parameters: username (str): The username.
+                    user_data (dict): {"password": bytes}.
+        Returns: None"""
+        with file_lock(self.users_file):
+            self._reload_if_changed()
+            self._append(username, user_data)
+
+    def create(self, username: str, user_data: dict) -> bool:
+        """Save a new user, but only if nobody has that username yet - checked and saved while holding the lock,
+        so two people signing up with the same name at the same time can't both get it.
+        Parameters: username (str): The new username.
+                    user_data (dict): {"password": bytes}.
+        Returns: bool: True if the user was created, False if the username was already taken."""
+        with file_lock(self.users_file):
+            self._reload_if_changed()
+            if username in self._index:
+                return False
+            self._append(username, user_data)
+            return True
+
+    def _reload_if_changed(self) -> None:
+        """Re-read the files if another process changed them (the lock must be held).
+        Returns: None"""
+        if self._stamps() != self._stamp:
+            self._reload()
+
+    def _append(self, username: str, user_data: dict) -> None:
+        """Add a user to the journal, or compact everything into users.json if the journal is full (the lock must be held).
+        Returns: None"""
+        password = user_data["password"].decode('latin-1')
+        if self._journal_count >= self.compact_every:
+            users = self.load()
+            users[username] = user_data
+            self.save(users)
+            return
+        os.makedirs(os.path.dirname(self.users_file) or ".", exist_ok=True)
+        _append_line(self.journal_file, json.dumps({"username": username, "password": password}))
+        self._index[username] = password
+        self._journal_count += 1
+        self._stamp = self._stamps()
+
+# ========= Pick a storage =========
+STORAGE_TYPES = {
+    "json": JSONTaskStorage,
+    "journal": JournalTaskStorage,
+}
+
+def task_file(username: str) -> str:
+    """Returns: str: Path of a user's tasks JSON file, e.g. data/bob_tasks.json."""
+    return os.path.join(config.DATA_DIR, f"{username}_tasks.json")
+
+def open_task_storage(username: str, kind: str = None):
+    """Create the storage configured for a user's tasks.
+    Parameters: username (str): The user whose tasks are stored.
+                kind (str): "json", "journal", "mapped" or "sqlite" (default from config.TASK_STORAGE).
+    Returns: JSONTaskStorage, JournalTaskStorage, MappedTaskStorage or SQLiteTaskStorage: The storage to use."""
+    kind = kind or config.TASK_STORAGE
+    if kind == "sqlite":
+        from sqlite_storage import SQLiteTaskStorage
+        return SQLiteTaskStorage(username)
+    if kind == "mapped":
+        from mapped import MappedTaskStorage
+        return MappedTaskStorage(task_file(username))
+    if kind not in STORAGE_TYPES:
+        raise ValueError(f"Unknown task storage '{kind}', pick one of: {', '.join(STORAGE_TYPES)}, mapped, sqlite")
+    return STORAGE_TYPES[kind](task_file(username))
+
+def open_user_storage(users_file: str, kind: str = None):
+    """Create the storage configured for user accounts.
+    Parameters: users_file (str): Path to the users JSON file (sharded users are saved in the folder
+                    with the same name, e.g. data/users/).
+                kind (str): "json", "sharded" or "sqlite" (default from config.USER_STORAGE).
+    Returns: JSONUserStorage, ShardedUserStorage or SQLiteUserStorage: The storage to use."""
+    kind = kind or config.USER_STORAGE
+    if kind == "sqlite":
+        from sqlite_storage import SQLiteUserStorage
+        return SQLiteUserStorage()
+    if kind == "sharded":
+        from sharded_users import ShardedUserStorage
+        return ShardedUserStorage(os.path.splitext(users_file)[0])
+    if kind != "json":
+        raise ValueError(f"Unknown user storage '{kind}', pick one of: json, sharded, sqlite")
+    return JSONUserStorage(users_file)
@@ -2,17 +2,40 @@
 styling.py: Styling for the CLI app using Rich, pyfiglet, and custom print functions. 
 
 Imports:
-- os: Helps with file and folder handling (making sure files are saved in the right place).
+- sys: Checks if the app is printing to a real terminal (or to a file/pipe/script).
+- config: Custom file with app settings (headless mode).
+- metrics: Custom file that times building and drawing banners and tables (when metrics are on).
 - pyfiglet: Facilitates creating & displaying stylised ASCII art text
 - rich: Enables coloured & formatted console output including tables
+
+pyfiglet and rich take a while to import, so they're only imported the first time something is printed.
+This keeps the app (and scripts that never print a banner) quick to start.
 """
 
-import os
-import pyfiglet
-from rich.console import Console
-from rich.table import Table
+import sys
+import config
+import metrics
+
+_console = None # Created on first use by get_console()
+_headless = config.HEADLESS # True skips screen clearing and the title banner
 
-console = Console(style="bold")
+# ========= Console =========
+def get_console():
+    """Return the shared rich Console, creating it (and importing rich) the first time.
+
+    Returns:
+        Console (rich): Console used for all styled output"""
+    global _console
+    if _console is None:
+        from rich.console import Console
+        _console = Console(style="bold")
+    return _console
+
+def __getattr__(name: str):
+    """Lets older code keep using styling.console, which is now created on first use."""
+    if name == "console":
+        return get_console()
+    raise AttributeError(f"module 'styling' has no attribute '{name}'")
 
 # ========= Basic Print Functions =========
 def print_error(message:str) -> None:
@@ -23,7 +46,7 @@ def print_error(message:str) -> None:
     
     Returns:
         None: Prints message to console"""
-    console.print(f"[bold #ff0000]{message}[bold /#ff0000]", markup=True) # force rich to style all text bold in red
+    get_console().print(f"[bold #ff0000]{message}[bold /#ff0000]", markup=True) # force rich to style all text bold in red
 
 def print_success(message:str) -> None:
     """Prints provided message in green (success)
@@ -33,7 +56,7 @@ def print_success(message:str) -> None:
     
     Returns:
         None: Prints message to console"""
-    console.print(message, style="#00ff84", markup=True)
+    get_console().print(message, style="#00ff84", markup=True)
 
 def print_info(message:str) -> None:
     """Prints provided message in yellow (info)
@@ -43,7 +66,7 @@ def print_info(message:str) -> None:
     
     Returns:
         None: Prints message to console"""
-    console.print(message, style="#ffe600", markup=True)
+    get_console().print(message, style="#ffe600", markup=True)
 
 def red_text(message:str) -> str:
     """Formats provided message as bold & red colour, for use in testing
@@ -55,69 +78,128 @@ def red_text(message:str) -> str:
         str: Formatted message"""
     return f"[bold #ff0000]{message}[bold /#ff0000]" # red text for TDD testing implementation
 
+def escape_markup(text:str) -> str:
+    """Escapes square brackets in text typed by the user, so rich shows them instead of reading them as style tags
+    (a search for "[/x]" would otherwise crash the table)
+
+    Parameters:
+        text (str): The text to show as it is
+
+    Returns:
+        str: Text that is safe to put in a rich message or table title"""
+    from rich.markup import escape
+    return escape(text)
+
 # ========= ASCII Art Title =========
-def print_rainbow_text(text:str, font:str='ansi_shadow') -> None:
-    """Prints provided message in rainbow colours & stylised using ASCII art with pyfiglet
+RAINBOW_COLORS = [   # List rainbow colours
+    "#ff7a7a",  # Red
+    "#fff27e",  # Yellow
+    "#94ffcb",  # Green
+    "#9eeaff",  # Blue
+    "#d382ff",  # Purple
+    "#fe85c2"   # Pink
+]
+
+_banner_cache = {} # (text, font, terminal width) -> finished rich Text, so each banner is only built once
+
+def render_rainbow_text(text:str, font:str='ansi_shadow', width:int=80):
+    """Builds the rainbow ASCII art for provided message, or returns it from the cache if it was built before.
+    Colours are added as rich Spans (start, end, style) instead of markup tags, so rich doesn't have to
+    parse thousands of tags each time the banner is shown.
 
     Parameters:
-        message (str): The message to format
+        text (str): The message to format
         font (str): The pyfiglet font to use (default = ansi_shadow)
+        width (int): Terminal width, pyfiglet wraps the art to fit
 
     Returns:
-        None: Prints message to console"""
-    figlet_text = pyfiglet.figlet_format(text, font=font) # Convert input text to ASCII art with pyfiglet
-
-    rich_colors = [   # List rainbow colours
-        "#ff7a7a",  # Red
-        "#fff27e",  # Yellow
-        "#94ffcb",  # Green
-        "#9eeaff",  # Blue
-        "#d382ff",  # Purple
-        "#fe85c2"   # Pink
-    ]
-    
+        Text (rich): The padded, coloured banner"""
+    key = (text, font, width)
+    if key in _banner_cache:
+        return _banner_cache[key]
+
+    with metrics.timer("render.banner_build"):
+        banner = _build_rainbow_text(text, font, width)
+    _banner_cache[key] = banner
+    return banner
+
+def _build_rainbow_text(text:str, font:str, width:int):
+    """Builds a rainbow banner from scratch, for render_rainbow_text to cache.
+
+    Parameters:
+        text (str): The message to format
+        font (str): The pyfiglet font to use
+        width (int): Terminal width, pyfiglet wraps the art to fit
+
+    Returns:
+        Text (rich): The padded, coloured banner"""
+    import pyfiglet # Imported here so the app starts without loading fonts
+    from rich.text import Span, Text
+    figlet_text = pyfiglet.figlet_format(text, font=font, width=width) # Convert input text to ASCII art with pyfiglet
+
     lines = figlet_text.splitlines()  # Split the ASCII art into lines for processing
     max_line_length = max(len(line) for line in lines) if lines else 0 # Find length of longest line to set total width for padding
     total_width = max_line_length + 8  # 4 spaces of padding on each side
+    styles = [f"bold {color}" for color in RAINBOW_COLORS] # bold and colour for each char
 
-    for _ in range(2):
-        console.print(" " * total_width) # Print 2 empty lines for padding at top
-
+    out_lines = [" " * total_width] * 2 # 2 empty lines for padding at top
+    spans = []
+    offset = len(out_lines) * (total_width + 1) # Where the next line starts in the finished text (+1 for newline)
     for i, line in enumerate(lines): # Loop through each line of the ASCII art
-        colored_line = ""  # Store the coloured version of the line
-        for j, char in enumerate(line): # Loop through each char in the line
-            color_index = (j + i) % len(rich_colors) # Pick colour and cycle through rainbow colours
-            color = rich_colors[color_index]
-            colored_line += f"[bold {color}]{char}[/bold {color}]" # Add Rich markup to bold and colour char
+        start = offset + 4 # after the left padding
+        for j in range(len(line)): # Pick colour for each char and cycle through rainbow colours
+            spans.append(Span(start + j, start + j + 1, styles[(j + i) % len(styles)]))
+        padded_line = "    " + line + " " * (total_width - len(line) - 4) # padding on left and right
+        out_lines.append(padded_line)
+        offset += len(padded_line) + 1
+    out_lines.append(" " * total_width) # Bottom padding
+
+    return Text("\n".join(out_lines), spans=spans)
+
+@metrics.timed("render.banner")
+def print_rainbow_text(text:str, font:str='ansi_shadow') -> None:
+    """Prints provided message in rainbow colours & stylised using ASCII art with pyfiglet.
+    The banner is built once per message/font/terminal width and then reused, so it's one console write.
 
-        left_padding = "    " # padding on left
-        right_padding = " " * (total_width - len(line) - 4) # padding on right
-        padded_line = left_padding + colored_line + right_padding # combine left and right
-        console.print(padded_line) # Print padded line
+    Parameters:
+        message (str): The message to format
+        font (str): The pyfiglet font to use (default = ansi_shadow)
 
-    console.print(" " * total_width) # Bottom padding
+    Returns:
+        None: Prints message to console"""
+    console = get_console()
+    console.print(render_rainbow_text(text, font, console.width))
 
 # ========= App Title =========
+@metrics.timed("render.title")
 def show_app_title():
-    """Helper function that prints the configured app title to console
+    """Helper function that prints the configured app title to console, in a single write
 
     Returns:
         None: Prints title to console"""
-    console.print("="*50)
-    print_rainbow_text("TO DO.", font='ansi_shadow')
-    console.print("="*50 + "\n")
+    console = get_console()
+    key = ("app title", console.width)
+    if key not in _banner_cache:
+        from rich.text import Text
+        title = Text("="*50 + "\n")
+        title.append_text(render_rainbow_text("TO DO.", 'ansi_shadow', console.width))
+        title.append("\n" + "="*50 + "\n")
+        _banner_cache[key] = title
+    console.print(_banner_cache[key])
 
 # ========= Task Table =========
-def create_task_table(username):
+def create_task_table(username, title=None):
     """Display provided users tasks in a table format. Each column has different colour.
         
     Parameters:
         username (str): Username of the logged in user
+        title (str, optional): Table title (default "{username}'s Tasks")
     
     Returns:
         Table (rich): Table object containing users tasks
     """
-    table = Table(title=f"{username}'s Tasks", style="#00fbff", show_header=True)
+    from rich.table import Table
+    table = Table(title=title or f"{username}'s Tasks", style="#00fbff", show_header=True)
 
     table.add_column("TASK #", width=8, justify="center", header_style="#d382ff") # Purple
     table.add_column("TASK", min_width=30, justify="center", header_style="#fe85c2") # Pink
@@ -126,20 +208,47 @@ def create_task_table(username):
     return table
 
 # ========= Print Table =========
-def print_table(table:Table) -> None:
+@metrics.timed("render.table")
+def print_table(table:"Table") -> None:
     """Prints a provided table to console
     
     Parameters: 
         table (Table): rich Table object
     
     Returns: None"""
-    console.print(table)
+    get_console().print(table)
     
 # ========= Clear screen styling =========
-    
+def set_headless(enabled: bool) -> None:
+    """Turn headless mode on or off. In headless mode the screen is never cleared and no title is shown,
+    which suits scripts and automated runs.
+
+    Parameters:
+        enabled (bool): True to turn headless mode on
+
+    Returns: None"""
+    global _headless
+    _headless = enabled
+
+def is_headless() -> bool:
+    """Check if screen control should be skipped: headless mode is on, or output isn't a terminal
+    (e.g. piped to a file), where clear codes and banners would just be noise.
+
+    Returns:
+        bool: True if clear_screen should do nothing"""
+    if _headless:
+        return True
+    try:
+        return not sys.stdout.isatty()
+    except (AttributeError, ValueError): # stdout replaced or closed
+        return True
+
 def clear_screen():
-    """Clear screen for better visibility, using os
+    """Clear screen for better visibility and show the title, using an ANSI escape code through rich
+    (no shell is started). Does nothing when headless or not printing to a terminal.
     
     Returns: None"""
-    os.system('clear')
-    show_app_title()
\ No newline at end of file
+    if is_headless():
+        return
+    get_console().clear()
+    show_app_title()
@@ -0,0 +1,76 @@
+"""task_ids.py: gives every task an ID that never changes, and finds a task's position from its ID quickly.
+
+Imports:
+- os: urandom, for random IDs that two sessions (or processes) adding tasks at once won't both pick.
+- bisect: Counts the deleted tasks before a position, so positions stay right after deletes.
+
+Task numbers (positions) change whenever an earlier task is deleted, so a change sent by number can hit the
+wrong task if someone else deleted first. IDs don't change: they're saved with each task ("id" in its record).
+How TaskIdIndex works: each ID gets a slot (0, 1, 2, ...) when it's added. Deleting a task leaves its slot as a
+tombstone instead of moving every later ID, so a task's position is its slot minus the tombstones before it
+(a binary search). Once tombstones build up, TaskList drops the index and it's rebuilt (compacted) on the next
+lookup, so lookups, adds and deletes all stay fast however long the list is."""
+
+import os
+from bisect import bisect_left, insort
+
+ID_BYTES = 8 # Random bytes per ID, shown as 16 hex characters
+COMPACT_MIN = 256 # Tombstones always allowed before compacting (more for long lists, see needs_compacting)
+
+def new_task_id() -> str:
+    """Returns: str: A new random task ID, e.g. "3f9a0c2b7d41e8a6"."""
+    return os.urandom(ID_BYTES).hex()
+
+# ========= ID to position index =========
+class TaskIdIndex:
+    """Maps task IDs to their current positions in the task list.
+    Purpose: Find, complete and delete tasks by ID without looking through the whole list.
+    Methods: __init__, __len__, __contains__, position, append, remove, needs_compacting.
+    Variables: slots (dict), deleted (list[int])."""
+
+    def __init__(self, ids=()) -> None:
+        """Build the index.
+        Parameters: ids (iterable of str): Every task's ID, in list order.
+        Returns: None"""
+        self.slots = {task_id: slot for slot, task_id in enumerate(ids)} # ID -> slot
+        self.deleted = [] # Slots of deleted tasks (tombstones), sorted
+        self._next_slot = len(self.slots)
+
+    def __len__(self) -> int:
+        """Returns: int: Number of tasks in the index."""
+        return len(self.slots)
+
+    def __contains__(self, task_id: str) -> bool:
+        """Returns: bool: True if a task has this ID."""
+        return task_id in self.slots
+
+    def position(self, task_id: str) -> int:
+        """Parameters: task_id (str): The task's ID.
+        Returns: int: The task's current position, or None if no task has this ID."""
+        slot = self.slots.get(task_id)
+        if slot is None:
+            return None
+        return slot - bisect_left(self.deleted, slot)
+
+    def append(self, task_id: str) -> None:
+        """Add a task at the end of the list.
+        Parameters: task_id (str): The new task's ID.
+        Returns: None"""
+        self.slots[task_id] = self._next_slot
+        self._next_slot += 1
+
+    def remove(self, task_id: str) -> int:
+        """Take a deleted task out of the index (later tasks move up one, like the list).
+        Parameters: task_id (str): The deleted task's ID.
+        Returns: int: The position it was at, or None if no task had this ID."""
+        slot = self.slots.pop(task_id, None)
+        if slot is None:
+            return None
+        position = slot - bisect_left(self.deleted, slot)
+        insort(self.deleted, slot)
+        return position
+
+    def needs_compacting(self) -> bool:
+        """Returns: bool: True once there are enough tombstones that rebuilding the index is worth it
+        (more than COMPACT_MIN, and more than one for every 8 tasks)."""
+        return len(self.deleted) > max(COMPACT_MIN, len(self.slots) // 8)
@@ -0,0 +1,215 @@
+"""task_io.py: reads and writes task records one at a time, so huge task files never sit in memory at once.
+
+Imports:
+- csv: Reads and writes tasks as spreadsheet-friendly CSV files.
+- json: Reads and writes tasks as JSON (one big list) or JSON Lines (one task per line).
+- os: Works out a file's format from its extension.
+- sys: Reads stdin / writes stdout when converting files from the command line.
+
+Every reader is a generator that yields one task record (a dict like Task.to_dict() makes) at a time,
+and every writer takes any iterable of records (a list, or another generator), so records can be
+streamed straight from one file to another with flat memory use:
+    write_records(read_records(src, "jsonl"), dst, "csv")
+Formats:
+- json: The app's own task file format, a pretty-printed JSON list (read a chunk at a time).
+- jsonl: JSON Lines, one compact record per line. Best for very large archives.
+- csv: Columns title, completed, type, priority (completed is true/false, priority blank for plain tasks).
+Convert an archive from the command line with: python3 todo_manager/task_io.py INPUT OUTPUT"""
+
+import csv
+import json
+import os
+import sys
+
+FORMATS = ("json", "jsonl", "csv")
+CSV_FIELDS = ("title", "completed", "type", "priority")
+CHUNK_SIZE = 64 * 1024 # Characters read at a time from a JSON list
+
+def format_for(path: str, fmt: str = None) -> str:
+    """Work out the format of a task file from its extension (.json, .jsonl/.ndjson, .csv).
+    Parameters: path (str): The file path ("-" for stdin/stdout is treated as json).
+                fmt (str, optional): A format picked by the user, which wins over the extension.
+    Returns: str: "json", "jsonl" or "csv".
+    Raises: ValueError: If the format isn't one of FORMATS."""
+    if fmt is None:
+        extension = os.path.splitext(path)[1].lower().lstrip(".")
+        fmt = {"ndjson": "jsonl"}.get(extension, extension) if extension in FORMATS + ("ndjson",) else "json"
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown task file format '{fmt}', pick one of: {', '.join(FORMATS)}")
+    return fmt
+
+# ========= JSON list (the app's task file format) =========
+def read_json_array(file, chunk_size: int = CHUNK_SIZE):
+    """Yield each record from a JSON list, decoding one record at a time from chunks of the file.
+    Parameters: file (file): An open text file holding a JSON list.
+                chunk_size (int): Characters to read at a time.
+    Yields: dict: One task record.
+    Raises: json.JSONDecodeError: If the file isn't a JSON list."""
+    decoder = json.JSONDecoder()
+    buffer, pos, at_end = "", 0, False
+
+    def read_more() -> None:
+        """Add the next chunk of the file to the buffer, dropping what's already been decoded."""
+        nonlocal buffer, pos, at_end
+        chunk = file.read(chunk_size)
+        at_end = not chunk
+        buffer, pos = buffer[pos:] + chunk, 0
+
+    def next_char() -> str:
+        """Skip whitespace (reading more if needed). Returns: str: The next character, or "" at the end."""
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos].isspace():
+                pos += 1
+            if pos < len(buffer) or at_end:
+                return buffer[pos:pos + 1]
+            read_more()
+
+    first = next_char()
+    if first == "":
+        return # Empty file - no tasks
+    if first != "[":
+        raise json.JSONDecodeError("Expecting a task list", buffer, pos)
+    pos += 1
+    if next_char() == "]":
+        return
+    while True:
+        while True:
+            try:
+                record, pos = decoder.raw_decode(buffer, pos)
+                break
+            except json.JSONDecodeError:
+                if at_end:
+                    raise
+                read_more() # Record runs past the end of the buffer - read more and try again
+        yield record
+        char = next_char()
+        if char == "]":
+            return
+        if char != ",":
+            raise json.JSONDecodeError("Expecting , or ]", buffer, pos)
+        pos += 1
+        next_char()
+
+def write_json_array(records, file, indent: int = 2) -> int:
+    """Write records as a JSON list, one record at a time. The output is exactly what json.dump(records, indent=2) makes.
+    Parameters: records (iterable of dict): The task records to write.
+                file (file): An open text file to write to.
+                indent (int): Spaces to indent by (None for compact, one line).
+    Returns: int: Number of records written."""
+    pad = " " * indent if indent is not None else ""
+    newline = "\n" if indent is not None else ""
+    count = 0
+    file.write("[")
+    for record in records:
+        text = json.dumps(record, indent=indent)
+        if indent is not None:
+            text = pad + text.replace("\n", "\n" + pad)
+        file.write(("," if count else "") + newline + text)
+        count += 1
+    file.write((newline if count else "") + "]")
+    return count
+
+# ========= JSON Lines =========
+def read_jsonl(file):
+    """Yield each record from a JSON Lines file (blank lines are skipped).
+    Parameters: file (file): An open text file with one JSON record per line.
+    Yields: dict: One task record.
+    Raises: ValueError: Naming the line number of a line that isn't valid JSON."""
+    for number, line in enumerate(file, 1):
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Line {number} isn't a valid task: {e.msg}") from None
+
+def write_jsonl(records, file) -> int:
+    """Write one compact JSON record per line.
+    Parameters: records (iterable of dict): The task records to write.
+                file (file): An open text file to write to.
+    Returns: int: Number of records written."""
+    count = 0
+    for record in records:
+        file.write(json.dumps(record, separators=(",", ":")) + "\n")
+        count += 1
+    return count
+
+# ========= CSV =========
+def read_csv(file):
+    """Yield each row of a CSV file (with a title, completed, type, priority header) as a task record.
+    The type column is optional - rows with a priority become PriorityTasks.
+    Parameters: file (file): An open text file (opened with newline="").
+    Yields: dict: One task record.
+    Raises: ValueError: If the header has no title column."""
+    reader = csv.DictReader(file)
+    if reader.fieldnames is None:
+        return # Empty file - no tasks
+    if "title" not in reader.fieldnames:
+        raise ValueError("CSV task files need a 'title' column")
+    for row in reader:
+        priority = (row.get("priority") or "").strip()
+        task_type = (row.get("type") or "").strip() or ("PriorityTask" if priority else "Task")
+        record = {"title": row["title"],
+                  "completed": (row.get("completed") or "").strip().lower() in ("true", "1", "yes", "y", "x"),
+                  "type": task_type}
+        if task_type == "PriorityTask":
+            record["priority"] = priority or "Medium"
+        yield record
+
+def write_csv(records, file) -> int:
+    """Write records as CSV rows under a title, completed, type, priority header.
+    Parameters: records (iterable of dict): The task records to write.
+                file (file): An open text file to write to (opened with newline="").
+    Returns: int: Number of records written."""
+    writer = csv.writer(file)
+    writer.writerow(CSV_FIELDS)
+    count = 0
+    for record in records:
+        writer.writerow((record["title"], "true" if record["completed"] else "false",
+                         record.get("type", "Task"), record.get("priority", "")))
+        count += 1
+    return count
+
+# ========= Any format =========
+READERS = {"json": read_json_array, "jsonl": read_jsonl, "csv": read_csv}
+WRITERS = {"json": write_json_array, "jsonl": write_jsonl, "csv": write_csv}
+
+def read_records(file, fmt: str = "json"):
+    """Yield task records from an open file in any of FORMATS.
+    Parameters: file (file): An open text file.
+                fmt (str): "json", "jsonl" or "csv".
+    Yields: dict: One task record."""
+    return READERS[format_for("", fmt)](file)
+
+def write_records(records, file, fmt: str = "json") -> int:
+    """Write task records to an open file in any of FORMATS.
+    Parameters: records (iterable of dict): The task records to write.
+                file (file): An open text file.
+                fmt (str): "json", "jsonl" or "csv".
+    Returns: int: Number of records written."""
+    count = WRITERS[format_for("", fmt)](records, file)
+    if fmt == "json":
+        file.write("\n")
+    return count
+
+def convert(source: str, destination: str, source_fmt: str = None, destination_fmt: str = None) -> int:
+    """Stream every record from one task file into another (e.g. a JSON Lines archive into CSV).
+    Parameters: source (str), destination (str): File paths ("-" for stdin/stdout).
+                source_fmt (str), destination_fmt (str): Formats (default from each file's extension).
+    Returns: int: Number of records copied."""
+    source_fmt = format_for(source, source_fmt)
+    destination_fmt = format_for(destination, destination_fmt)
+    src = sys.stdin if source == "-" else open(source, "r", newline="")
+    dst = sys.stdout if destination == "-" else open(destination, "w", newline="")
+    try:
+        return write_records(read_records(src, source_fmt), dst, destination_fmt)
+    finally:
+        for file in (src, dst):
+            if file not in (sys.stdin, sys.stdout):
+                file.close()
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        sys.exit("Usage: python3 todo_manager/task_io.py INPUT OUTPUT (.json, .jsonl or .csv, - for stdin/stdout)")
+    print(f"Copied {convert(sys.argv[1], sys.argv[2])} tasks", file=sys.stderr)
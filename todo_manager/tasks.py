@@ -2,32 +2,87 @@
 
 Imports:
 - json: Save and load tasks as text files (like storing tasks in a notebook).
-- os: Helps with file and folder handling (making sure files are saved in the right place).
+- threading: A lock so a background save (see config.FLUSH_INTERVAL) and the app don't save at the same time.
+- contextlib: Makes TaskList.batch() usable in a with block.
+- functools: wraps, so a method that holds the save lock keeps its name and docstring.
+- enum: IntEnum gives task priorities a small fixed set of numbered values (High=1, Medium=2, Low=3).
 - emoji_library: Custom file that holds emoji icons for task completion, priority, etc.
 - styling: Custom file for styling the terminal (colours, tables, clearing the screen).
-- utils: Custom file with helper functions (like showing “no tasks” messages)."""
+- utils: Custom file with helper functions (like showing “no tasks” messages).
+- storage: Custom file that saves and loads task records (whole JSON file, append-only journal or memory only).
+- task_io: Custom file that reads and writes task records one at a time (JSON, JSON Lines or CSV), for import and export.
+- columnar: Custom file with a column-based task store for huge lists (optional, see config.COLUMNAR_TASKS).
+- flusher: Custom file that saves a burst of changes once it settles (only imported if config.FLUSH_INTERVAL is set).
+- task_ids: Custom file with task IDs and TaskIdIndex, which finds a task's position from its ID.
+- search: Custom file with TaskIndex, the word index behind TaskList.search (only imported on the first search).
+- metrics: Custom file that times loading, saving, changing and showing tasks (when metrics are on).
+- config: Custom file with app settings."""
 
 import json
-import os
+import threading
+from contextlib import contextmanager
+from functools import wraps
+from enum import IntEnum
 from emoji_library import emoji_complete, emoji_incomplete, emoji_interesting, emoji_high, emoji_medium, emoji_low
 from styling import *
 from utils import print_no_tasks
+from storage import open_task_storage, task_file, apply_op
+from task_io import read_records, write_records
+from columnar import ColumnarTaskStore, NO_PRIORITY
+from task_ids import new_task_id, TaskIdIndex
+import metrics
+import config
+
+# ========= Priority levels =========
+class Priority(IntEnum):
+    """The priority levels a PriorityTask can have. Lower number = more important, so they sort High first.
+    Purpose: Store priority as a small number instead of comparing strings.
+    Inheritance: Inherits from IntEnum.
+    Methods: label, from_label."""
+    HIGH = 1
+    MEDIUM = 2
+    LOW = 3
+
+    @property
+    def label(self) -> str:
+        """Returns: str: The priority as shown and saved, e.g. "High"."""
+        return self.name.capitalize()
+
+    @classmethod
+    def from_label(cls, label) -> "Priority":
+        """Find the priority for a label like "High" (a Priority is returned unchanged).
+        Parameters: label (str or Priority): The priority to look up.
+        Returns: Priority: The matching priority level.
+        Raises: ValueError: If the label isn't High, Medium or Low."""
+        if isinstance(label, cls):
+            return label
+        try:
+            return cls[str(label).upper()]
+        except KeyError:
+            raise ValueError(f"Unknown priority '{label}', pick High, Medium or Low") from None
+
+PRIORITY_EMOJI = {Priority.HIGH: emoji_high, Priority.MEDIUM: emoji_medium, Priority.LOW: emoji_low}
+PRIORITY_BY_LABEL = {level.label: level for level in Priority} # "High" -> Priority.HIGH
 
 # ========= Task class =========
 class Task:
     """Represents a single task with a title and completion status.
+    Uses __slots__ so each task only stores its own fields (no per-object dict), which keeps
+    memory low for very long task lists.
     Purpose: Create, complete, and manage tasks.
     Inheritance: Base class for PriorityTask.
-    Methods: __init__, mark_complete, mark_incomplete, __str__, title_upper, is_high_priority.
-    Variables: title (str), completed (bool)."""
+    Methods: __init__, mark_complete, mark_incomplete, __str__, title_upper, is_high_priority, to_dict.
+    Variables: title (str), completed (bool), id (str, never changes - saved with the task)."""
+    __slots__ = ("title", "completed", "id")
     
     # ===== Create new task =====
     def __init__(self, title: str) -> None:
-        """Initialize a new task with a title and set it as incomplete.
+        """Initialize a new task with a title and a new ID, and set it as incomplete.
         Parameters: title (str): The title of the task.
         Returns: None"""
         self.title = title
         self.completed = False
+        self.id = new_task_id()
     
     # ===== Task complete =====
     def mark_complete(self) -> None:
@@ -58,39 +113,135 @@ class Task:
         Returns: bool: Always False for base Task."""
         return False
 
+    # ===== Task as a saveable record =====
+    def to_dict(self) -> dict:
+        """Return the task as a plain dict record, ready to save as JSON.
+        Returns: dict: The task's title, completion status, type and ID."""
+        return {"title": self.title, "completed": self.completed, "type": self.__class__.__name__, "id": self.id}
+
 # ========= Task priority =========
 class PriorityTask(Task):
     """Represents a task with a priority level (High, Medium, Low).
     Purpose: Create and manage tasks with priority.
     Inheritance: Inherits from Task class.
-    Methods: __init__, __str__, is_high_priority.
-    Variables: priority (str)."""
+    Methods: __init__, __str__, is_high_priority, to_dict.
+    Variables: level (Priority), priority (str, "High"/"Medium"/"Low" view of level)."""
+    __slots__ = ("level",)
     
-    def __init__(self, title: str, priority: str) -> None:
+    def __init__(self, title: str, priority) -> None:
         """Initialize a new priority task with a title and priority level.
         Parameters: title (str): Title of the task.
-                    priority (str): Task priority level ("High", "Medium", "Low").
+                    priority (str or Priority): Task priority level ("High", "Medium", "Low").
         Returns: None"""
         super().__init__(title) # Call parent class constructor
-        self.priority: str = priority
+        self.level: Priority = Priority.from_label(priority)
+
+    @property
+    def priority(self) -> str:
+        """Returns: str: The priority label ("High", "Medium", "Low")."""
+        return self.level.label
+
+    @priority.setter
+    def priority(self, value) -> None:
+        """Set the priority from a label or Priority.
+        Parameters: value (str or Priority): The new priority level."""
+        self.level = Priority.from_label(value)
 
     def __str__(self) -> str:  # Priority level mapped as emoji
         """Return the task title with a priority emoji, emoji is based on priority level.
         Returns: str: Task title with priority emoji."""
-        if self.priority == "High":
-            prio_emoji = emoji_high
-        elif self.priority == "Medium":
-            prio_emoji = emoji_medium
-        elif self.priority == "Low":
-            prio_emoji = emoji_low
-        else:
-            prio_emoji = ""
-        return f"{prio_emoji} {self.title}" # Adds priority emoji to task title
+        return f"{PRIORITY_EMOJI[self.level]} {self.title}" # Adds priority emoji to task title
         
     def is_high_priority(self) -> bool:
         """Check if task is high priority.
         Returns: bool: True if priority is "High", else False."""
-        return self.priority == "High"
+        return self.level is Priority.HIGH
+
+    def to_dict(self) -> dict:
+        """Return the task as a plain dict record, including its priority.
+        Returns: dict: The task's title, completion status, type, ID and priority."""
+        task_info = super().to_dict()
+        task_info["priority"] = self.level.label
+        return task_info
+
+# ========= Record to task =========
+_new_task = object.__new__ # Makes an empty Task/PriorityTask without running __init__
+
+def saved_level(label) -> Priority:
+    """Return the Priority for a saved priority label, using Medium if it isn't one we know.
+    Parameters: label (str): The saved label, e.g. "High".
+    Returns: Priority: The matching priority level."""
+    level = PRIORITY_BY_LABEL.get(label) # Saved labels almost always match exactly
+    if level is None:
+        try:
+            level = Priority.from_label(label)
+        except ValueError:
+            level = Priority.MEDIUM # Unknown priority saved - treat as Medium
+    return level
+
+def task_from_dict(data: dict) -> Task:
+    """Create a Task or PriorityTask from a saved dict record.
+    Fills in the slots directly instead of calling __init__, since this runs once per task on every load.
+    Tasks saved before tasks had IDs get a new one (saved with them the next time the list is saved).
+    Parameters: data (dict): The saved record, as made by Task.to_dict().
+    Returns: Task or PriorityTask: The rebuilt task object."""
+    if data.get("type") == "PriorityTask":
+        task = _new_task(PriorityTask)
+        task.level = saved_level(data.get("priority", "Medium"))
+    else:
+        task = _new_task(Task)
+    task.title = data["title"]
+    task.completed = data["completed"]
+    task.id = data.get("id") or new_task_id()
+    return task
+
+def fill_ids(records, new_ids: list):
+    """Pass on saved records, giving any saved before tasks had IDs a new one.
+    Parameters: records (iterable of dict): The saved task records.
+                new_ids (list): Each new ID is added to this, so the caller knows the IDs need saving.
+    Yields: dict: Each record, with an "id"."""
+    for data in records:
+        if not data.get("id"):
+            data["id"] = new_task_id()
+            new_ids.append(data["id"])
+        yield data
+
+def priority_code(data: dict) -> int:
+    """Return the priority code for a saved record (0 for a plain Task, else 1-3 like Priority).
+    Parameters: data (dict): The saved record, as made by Task.to_dict().
+    Returns: int: The priority code."""
+    if data.get("type") != "PriorityTask":
+        return NO_PRIORITY
+    return int(saved_level(data.get("priority", "Medium")))
+
+def task_from_columns(title: str, completed, code: int, task_id: str) -> Task:
+    """Create a Task or PriorityTask from the values stored in a ColumnarTaskStore.
+    Parameters: title (str): The task title.
+                completed (int or bool): 1/True if the task is done.
+                code (int): Priority code (0 for a plain Task).
+                task_id (str): The task's ID.
+    Returns: Task or PriorityTask: The rebuilt task object."""
+    if code == NO_PRIORITY:
+        task = _new_task(Task)
+    else:
+        task = _new_task(PriorityTask)
+        task.level = Priority(code)
+    task.title = title
+    task.completed = bool(completed)
+    task.id = task_id
+    return task
+
+# ========= Save lock =========
+def locked(method):
+    """Decorator that runs a TaskList method while holding its save lock, so a background flush can't merge or
+    save the list halfway through a change (or between the change and queuing it).
+    Parameters: method (function): The TaskList method.
+    Returns: function: The method, run with the lock held."""
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._save_lock:
+            return method(self, *args, **kwargs)
+    return wrapper
 
 # ========= TaskList class =========
 class TaskList:
@@ -98,54 +249,366 @@ class TaskList:
     completing, displaying, saving, and loading tasks.
     Purpose: Manage a user's task list.
     Composition: Contains multiple Task and PriorityTask objects.
-    Methods: __init__, add_task, delete_task, mark_complete, get_tasks, display_tasks, save_tasks, load_tasks
+    Methods: __init__, add_task, delete_task, mark_complete, complete_all, delete_completed, count_by_priority,
+        filter_tasks, add_tasks, complete_tasks, delete_tasks, check_task_numbers, position_of, complete_by_id, delete_by_id,
+        record_changes,
+        get_tasks, display_tasks, page_count, task_row, format_row, save_tasks, load_tasks, record_change, task_records,
+        iter_task_records, import_tasks, export_tasks, batch, flush, close, refresh, is_view, search, display_matches,
         is_valid_task_number, show_invalid_number_error.
-    Variables: username (str), tasks (Task), filename (str)."""
+    Variables: username (str), tasks (list of Task, ColumnarTaskStore, or a read-only MappedTasks until the first
+        change), filename (str),
+        storage (JSONTaskStorage, JournalTaskStorage, SQLiteTaskStorage or MemoryTaskStorage), columnar (bool),
+        page (int), flusher (DebouncedFlusher or None)."""
 
     # ===== Setup task list =====
-    def __init__(self, username: str) -> None:
+    def __init__(self, username: str, storage=None, columnar: bool = None, flush_interval: float = None) -> None:
         """Initialize a TaskList for a user, load any existing tasks.
         Parameters: username (str): The name of the user.
+                    storage (optional): Where tasks are saved. Defaults to the storage picked in config.py.
+                    columnar (bool, optional): Keep tasks in a ColumnarTaskStore instead of a list
+                        (default from config.COLUMNAR_TASKS).
+                    flush_interval (float, optional): Seconds to let changes settle before saving them together in
+                        the background. 0 saves every change straight away (default from config.FLUSH_INTERVAL).
         Returns: None"""
         self.username: str = username
-        self.tasks: list[Task] = []
-        self.filename: str = f"data/{username}_tasks.json"
+        self.columnar: bool = config.COLUMNAR_TASKS if columnar is None else columnar
+        self.tasks = self.new_task_container()
+        self.page: int = 1 # Page of the task table last shown
+        self._row_cache: list = [] # Formatted table rows, None where a task changed since it was shown
+        self.filename: str = task_file(username)
+        self.storage = storage if storage is not None else open_task_storage(username)
+        self._batch_depth: int = 0 # How many batch() blocks we're inside
+        self._pending_ops: list = [] # Changes waiting to be saved
+        self._full_save_pending: bool = False # True if the whole list needs saving (not just _pending_ops)
+        self._save_lock = threading.RLock()
+        self._etag = None # Version of the saved tasks this list was loaded from (see _write_ops)
+        self._search_index = None # search.TaskIndex, built on the first search and kept up to date after
+        self._id_index = None # TaskIdIndex, built on the first lookup by ID and kept up to date after
+        self._flush_interval: float = config.FLUSH_INTERVAL if flush_interval is None else flush_interval
+        self.flusher = None # DebouncedFlusher, made on the first change if there's a flush interval
         self.load_tasks()
+
+    # ===== Empty list or column store =====
+    def new_task_container(self):
+        """Return an empty container for tasks: a list, or a ColumnarTaskStore if columnar.
+        Returns: list or ColumnarTaskStore: The empty container."""
+        return ColumnarTaskStore(task_from_columns) if self.columnar else []
     
     # ===== Add new task =====
+    @locked
     def add_task(self, task: Task) -> None:
         """Add a new task to the task list and save to file.
         Parameters: task (Task): The task to add.
         Returns: None"""
+        self._writable()
         self.tasks.append(task)
-        self.save_tasks()
+        self._row_cache.append(None)
+        self.record_change({"op": "add", "task": task.to_dict()})
         clear_screen()
         print_success(f"Nice cache! {task.title} was added to your tasks!")
 
     # ===== Delete task by index =====
+    @locked
     def delete_task(self, index: int) -> None:
         """Delete a task from the task list by its index and save to file.
         Parameters: index (int): The index of the task to delete.
         Returns: None"""
         if self.is_valid_task_number(index):
+            self._writable()
             removed_task = self.tasks.pop(index)
-            self.save_tasks()
+            if index < len(self._row_cache):
+                self._row_cache.pop(index)
+            self.record_change({"op": "delete", "index": index, "id": removed_task.id, "title": removed_task.title})
         else:
             self.show_invalid_number_error()
             return None
     
     # ===== Complete task by index =====
+    @locked
     def mark_complete(self, index: int) -> None:
         """Mark a task as complete by its index and save to file.
         Parameters: index (int): The index of the task to mark as complete.
         Returns: None"""
         if self.is_valid_task_number(index):
-            self.tasks[index].mark_complete()
-            self.save_tasks()
-            print_success(f"Great job! {self.tasks[index].title} is now complete!")
+            self._writable()
+            task = self.tasks[index]
+            task.mark_complete()
+            self.tasks[index] = task # Write back (needed when tasks are stored as columns)
+            if index < len(self._row_cache):
+                self._row_cache[index] = None # Format this row again next time
+            self.record_change({"op": "complete", "index": index, "id": task.id, "title": task.title})
+            print_success(f"Great job! {task.title} is now complete!")
         else:
             self.show_invalid_number_error()
 
+    # ===== Bulk changes =====
+    @locked
+    def complete_all(self, priority: str = None) -> int:
+        """Mark every task, or every task with one priority, as complete in a single pass and one save.
+        Parameters: priority (str or Priority, optional): Only complete tasks with this priority.
+        Returns: int: Number of tasks that were newly completed."""
+        level = Priority.from_label(priority) if priority is not None else None
+        self._writable()
+        if isinstance(self.tasks, ColumnarTaskStore):
+            changed = self.tasks.complete_where(None if level is None else int(level))
+        else:
+            changed = 0
+            for task in self.tasks:
+                if not task.completed and (level is None or getattr(task, "level", None) is level):
+                    task.completed = True
+                    changed += 1
+        if changed:
+            self._row_cache = []
+            self.record_change({"op": "complete_all", "priority": None if level is None else level.label})
+        return changed
+
+    @locked
+    def delete_completed(self) -> int:
+        """Delete every completed task in a single pass and one save.
+        Returns: int: Number of tasks deleted."""
+        self._writable()
+        if isinstance(self.tasks, ColumnarTaskStore):
+            removed = self.tasks.delete_completed()
+        else:
+            before = len(self.tasks)
+            self.tasks = [task for task in self.tasks if not task.completed]
+            removed = before - len(self.tasks)
+        if removed:
+            self._row_cache = []
+            self.record_change({"op": "delete_completed"})
+        return removed
+
+    # ===== Batches of changes (no messages, one save) =====
+    @locked
+    def add_tasks(self, tasks) -> int:
+        """Add many tasks at once and save once at the end. Prints nothing, for scripts.
+        Parameters: tasks (iterable of Task): The tasks to add.
+        Returns: int: Number of tasks added."""
+        self._writable()
+        ops = []
+        for task in tasks:
+            self.tasks.append(task)
+            ops.append({"op": "add", "task": task.to_dict()})
+        self._row_cache = []
+        self.record_changes(ops)
+        return len(ops)
+
+    def check_task_numbers(self, indices) -> None:
+        """Make sure every index is a valid task, before anything is changed.
+        Parameters: indices (iterable of int): The indexes to check.
+        Raises: IndexError: Listing the task numbers (1-based) that don't exist."""
+        invalid = [index + 1 for index in indices if not self.is_valid_task_number(index)]
+        if invalid:
+            raise IndexError(f"No task number {', '.join(map(str, invalid))} (there are {len(self.tasks)} tasks)")
+
+    @locked
+    def complete_tasks(self, indices) -> int:
+        """Mark many tasks complete by index and save once. Nothing changes if any index is invalid.
+        Parameters: indices (iterable of int): The indexes of the tasks to complete.
+        Returns: int: Number of tasks that were newly completed.
+        Raises: IndexError: If any index isn't a task."""
+        indices = sorted(set(indices))
+        self.check_task_numbers(indices)
+        self._writable()
+        ops = []
+        for index in indices:
+            task = self.tasks[index]
+            if not task.completed:
+                task.mark_complete()
+                self.tasks[index] = task # Write back (needed when tasks are stored as columns)
+                ops.append({"op": "complete", "index": index, "id": task.id, "title": task.title})
+        self._row_cache = []
+        self.record_changes(ops)
+        return len(ops)
+
+    @locked
+    def delete_tasks(self, indices) -> int:
+        """Delete many tasks by index and save once. Nothing changes if any index is invalid.
+        Parameters: indices (iterable of int): The indexes of the tasks to delete.
+        Returns: int: Number of tasks deleted.
+        Raises: IndexError: If any index isn't a task."""
+        indices = sorted(set(indices), reverse=True) # Delete from the end so earlier indexes don't move
+        self.check_task_numbers(indices)
+        self._writable()
+        ops = []
+        for index in indices:
+            task = self.tasks[index]
+            ops.append({"op": "delete", "index": index, "id": task.id, "title": task.title})
+        if isinstance(self.tasks, ColumnarTaskStore):
+            for index in indices:
+                self.tasks.pop(index)
+        else:
+            removing = set(indices)
+            self.tasks = [task for i, task in enumerate(self.tasks) if i not in removing]
+        self._row_cache = []
+        self.record_changes(ops)
+        return len(ops)
+
+    # ===== Changes by task ID =====
+    def position_of(self, task_id: str) -> int:
+        """Find a task's current position from its ID. The first lookup builds an index of every ID; after that
+        it's kept up to date as tasks are added and deleted, so lookups don't look through the list.
+        Parameters: task_id (str): The task's ID.
+        Returns: int: The task's index, or None if no task has this ID."""
+        if self._id_index is None:
+            self._id_index = TaskIdIndex(self._iter_ids())
+        return self._id_index.position(task_id)
+
+    def _index_of(self, task_id: str) -> int:
+        """Returns: int: The index of the task with this ID.
+        Raises: KeyError: If no task has this ID."""
+        index = self.position_of(task_id)
+        if index is None:
+            raise KeyError(f"No task with ID {task_id}")
+        return index
+
+    @locked
+    def complete_by_id(self, task_id: str) -> bool:
+        """Mark the task with this ID complete and save. Prints nothing, for scripts and the API.
+        Unlike a task number, an ID still means the same task after other tasks are added or deleted
+        (even by another session), so it's the safe way to change a task from another program.
+        Parameters: task_id (str): The task's ID.
+        Returns: bool: True if the task was newly completed, False if it was already complete.
+        Raises: KeyError: If no task has this ID."""
+        index = self._index_of(task_id)
+        self._writable()
+        task = self.tasks[index]
+        if task.completed:
+            return False
+        task.mark_complete()
+        self.tasks[index] = task # Write back (needed when tasks are stored as columns)
+        if index < len(self._row_cache):
+            self._row_cache[index] = None
+        self.record_change({"op": "complete", "index": index, "id": task_id, "title": task.title})
+        return True
+
+    @locked
+    def delete_by_id(self, task_id: str) -> Task:
+        """Delete the task with this ID and save. Prints nothing, for scripts and the API.
+        The ID index finds the task without looking through the list, but taking it out of the list still moves
+        every task after it along by one, so this is O(n) like delete_task. That's one memmove of pointers (about
+        0.4 ms for the middle of a 1,000,000 task list, see tasks.delete_by_id in benchmarks/suite.py), far less
+        than saving the change, so the list isn't tombstoned.
+        Parameters: task_id (str): The task's ID.
+        Returns: Task: The deleted task.
+        Raises: KeyError: If no task has this ID."""
+        index = self._index_of(task_id)
+        self._writable()
+        task = self.tasks.pop(index)
+        if index < len(self._row_cache):
+            self._row_cache.pop(index)
+        self.record_change({"op": "delete", "index": index, "id": task_id, "title": task.title})
+        return task
+
+    def _iter_ids(self):
+        """Returns: iterator: Every task's ID, in list order (without building Task objects where it can)."""
+        if isinstance(self.tasks, ColumnarTaskStore) or self.is_view():
+            return self.tasks.iter_ids()
+        return (task.id for task in self.tasks)
+
+    def _update_id_index(self, ops: list) -> None:
+        """Apply changes to the ID index (if it's been built). Deleted tasks leave tombstones in it; once there are
+        enough of those, or after delete_completed, it's dropped and rebuilt (compacted) on the next lookup.
+        Parameters: ops (list[dict]): The changes just made, in order.
+        Returns: None"""
+        index = self._id_index
+        if index is None:
+            return
+        for op in ops:
+            if op["op"] == "add":
+                index.append(op["task"]["id"])
+            elif op["op"] == "delete":
+                index.remove(op["id"])
+            elif op["op"] == "delete_completed":
+                self._id_index = None
+                return
+        if index.needs_compacting():
+            self._id_index = None
+
+    def count_by_priority(self) -> dict:
+        """Count the tasks at each priority level in a single pass (with SQLite, from its priority index).
+        Returns: dict: Priority.HIGH/MEDIUM/LOW (and None for tasks without a priority) -> number of tasks."""
+        if self._storage_queries():
+            counts = dict.fromkeys([*Priority, None], 0)
+            for label, count in self.storage.count_by_priority().items():
+                counts[None if label is None else saved_level(label)] += count
+            return counts
+        if isinstance(self.tasks, ColumnarTaskStore) or self.is_view():
+            codes = self.tasks.counts_by_priority()
+            counts = {level: codes[int(level)] for level in Priority}
+            counts[None] = codes[NO_PRIORITY]
+            return counts
+        counts = dict.fromkeys([*Priority, None], 0)
+        for task in self.tasks:
+            counts[getattr(task, "level", None)] += 1
+        return counts
+
+    def filter_tasks(self, completed: bool = None, priority=None) -> list[dict]:
+        """Find the tasks that are (or aren't) done and/or have one priority, keeping their task numbers.
+        With SQLite the database does the filtering (see SQLiteTaskStorage.query); otherwise it's one pass over the list.
+        Parameters: completed (bool, optional): Only completed (True) or not completed (False) tasks.
+                    priority (str or Priority, optional): Only tasks with this priority.
+        Returns: list[dict]: The matching tasks as saveable records, each with its task number (from 1) as "number".
+        Raises: ValueError: If the priority isn't High, Medium or Low."""
+        label = None if priority is None else Priority.from_label(priority).label
+        if self._storage_queries():
+            return self.storage.query(completed, label, numbered=True)
+        matches = []
+        for number, record in enumerate(self.iter_task_records(), 1):
+            if completed is not None and record["completed"] != completed:
+                continue
+            if label is not None and record.get("priority") != label:
+                continue
+            matches.append(dict(record, number=number))
+        return matches
+
+    def _storage_queries(self) -> bool:
+        """Check whether the storage can filter and count the tasks itself (SQLite, using its indexes). Anything
+        still queued is saved first, so the database has every change; inside batch() the list is used instead.
+        Returns: bool: True if filtering and counting should be left to the storage."""
+        if not hasattr(self.storage, "query") or self._batch_depth > 0:
+            return False
+        return self.flush()
+
+    # ===== Search =====
+    def search(self, text: str = None, completed: bool = None, priority=None, substring: bool = False,
+               by_priority: bool = False) -> list[int]:
+        """Find tasks by words in their title, whether they're done and their priority. The first search builds
+        an index of every title; after that the index is kept up to date, so searches don't look at every task.
+        Parameters: text (str, optional): Words the title must have, e.g. "gas bill" (any order, any case).
+                    completed (bool, optional): Only completed (True) or not completed (False) tasks.
+                    priority (str, Priority or list, optional): Only tasks with this priority (or one of these).
+                    substring (bool): Match parts of words too, e.g. "bill" finds "bills".
+                    by_priority (bool): Sort High first, then Medium, Low and tasks without a priority.
+        Returns: list[int]: Indexes of the matching tasks, in list order (or priority order).
+        Raises: ValueError: If a priority isn't High, Medium or Low."""
+        if priority is not None:
+            levels = priority if isinstance(priority, (list, tuple, set)) else [priority]
+            priority = [Priority.from_label(level).label for level in levels]
+        if self._search_index is None:
+            from search import TaskIndex
+            self._search_index = TaskIndex(self.iter_task_records())
+        return self._search_index.find(text, completed, priority, substring, by_priority)
+
+    def _update_search_index(self, ops: list) -> None:
+        """Apply changes to the search index (if it's been built), so it doesn't need building again.
+        Bulk changes (complete_all, delete_completed) drop it instead; it's rebuilt on the next search.
+        Parameters: ops (list[dict]): The changes just made, in order.
+        Returns: None"""
+        index = self._search_index
+        if index is None:
+            return
+        for op in ops:
+            if op["op"] == "add":
+                index.add(op["task"])
+            elif op["op"] == "complete":
+                index.set_completed(op["index"])
+            elif op["op"] == "delete":
+                index.remove(op["index"])
+            else:
+                self._search_index = None
+                return
+
     # ===== Get/return task list to user =====
     def get_tasks(self) -> list[Task]:
         """Return the list of tasks for this user.
@@ -153,75 +616,361 @@ class TaskList:
         return self.tasks
     
     # ===== Display tasks =====
-    def display_tasks(self) -> None:
-        """Display the user's tasks in a formatted table with completion status,
-        uppercase for high priority tasks, and colour.
+    @metrics.timed("tasks.display")
+    def display_tasks(self, page: int = None, page_size: int = None) -> None:
+        """Display one page of the user's tasks in a formatted table with completion status,
+        uppercase for high priority tasks, and colour. Only the tasks on that page are formatted.
+        Parameters: page (int, optional): Page number to show, starting at 1 (default: the last page shown).
+                    page_size (int, optional): Tasks per page (default from config.PAGE_SIZE).
         Returns: None"""
         if not self.tasks:
             print_no_tasks()
             return
 
-        table = create_task_table(self.username)
+        page_size = page_size or config.PAGE_SIZE
+        pages = self.page_count(page_size)
+        self.page = min(max(page or self.page, 1), pages) # Keep page within 1..pages
+        start = (self.page - 1) * page_size
+        end = min(start + page_size, len(self.tasks))
 
-        # TDD testing implementation code - makes high priority tasks bold, red and uppercase
-        for i, task in enumerate(self.tasks, 1):
-            status = emoji_complete if task.completed else emoji_incomplete
-            # High priority PriorityTask: uppercase and red, keep original emoji
-            if isinstance(task, PriorityTask) and task.is_high_priority():
-                base = task.__str__()
-                prio_emoji = base.replace(task.title, '').strip()
-                display_title = f"{prio_emoji} {task.title_upper()}"
-                display_title = red_text(display_title)
-            elif isinstance(task, PriorityTask):
-                display_title = task.__str__()
-            else:
-                display_title = str(task)
-            table.add_row(str(i), display_title, status)
+        title = f"{self.username}'s Tasks" if pages == 1 else f"{self.username}'s Tasks (page {self.page} of {pages})"
+        table = create_task_table(self.username, title)
+        for i in range(start, end):
+            display_title, status = self.task_row(i)
+            table.add_row(str(i + 1), display_title, status)
+
+        print_table(table)
 
+    # ===== Display search results =====
+    def display_matches(self, indices: list, title: str = None, limit: int = None) -> None:
+        """Display some of the tasks (e.g. search results) in the task table, keeping their task numbers.
+        Parameters: indices (list[int]): Indexes of the tasks to show, in the order to show them.
+                    title (str, optional): Table title (default "{username}'s Tasks").
+                    limit (int, optional): Most rows to show (default from config.PAGE_SIZE).
+        Returns: None"""
+        limit = limit or config.PAGE_SIZE
+        table = create_task_table(self.username, title)
+        for i in indices[:limit]:
+            display_title, status = self.task_row(i)
+            table.add_row(str(i + 1), display_title, status)
         print_table(table)
+        if len(indices) > limit:
+            print_info(f"...and {len(indices) - limit} more. Add more words to narrow it down!")
+
+    # ===== Number of pages =====
+    def page_count(self, page_size: int = None) -> int:
+        """Return how many pages the task list takes up.
+        Parameters: page_size (int, optional): Tasks per page (default from config.PAGE_SIZE).
+        Returns: int: Number of pages (at least 1)."""
+        page_size = page_size or config.PAGE_SIZE
+        return max(1, -(-len(self.tasks) // page_size)) # Round up
+
+    # ===== Formatted table row, cached =====
+    def task_row(self, index: int) -> tuple:
+        """Return the formatted (title, status) for the task at index. Rows are cached and only
+        formatted again after that task changes.
+        Parameters: index (int): The index of the task.
+        Returns: tuple: (display title, done/not done emoji)."""
+        if len(self._row_cache) != len(self.tasks): # Tasks were replaced - start the cache again
+            self._row_cache = [None] * len(self.tasks)
+        row = self._row_cache[index]
+        if row is None:
+            row = self._row_cache[index] = self.format_row(self.tasks[index])
+        return row
+
+    def format_row(self, task: Task) -> tuple:
+        """Format a task for the task table. Square brackets in the title are escaped, so rich shows them as typed.
+        Parameters: task (Task): The task to format.
+        Returns: tuple: (display title, done/not done emoji)."""
+        status = emoji_complete if task.completed else emoji_incomplete
+        # TDD testing implementation code - makes high priority tasks bold, red and uppercase
+        # High priority PriorityTask: uppercase and red, keep original emoji
+        if isinstance(task, PriorityTask) and task.is_high_priority():
+            base = task.__str__()
+            prio_emoji = base.replace(task.title, '').strip()
+            display_title = f"{prio_emoji} {escape_markup(task.title_upper())}"
+            display_title = red_text(display_title)
+        elif isinstance(task, PriorityTask):
+            display_title = escape_markup(task.__str__())
+        else:
+            display_title = escape_markup(str(task))
+        return display_title, status
     
     # ===== Save tasks to users file =====
-    def save_tasks(self) -> None:
-        """Save the current list of tasks to a JSON file for persistent storage.
+    @metrics.timed("tasks.save")
+    def save_tasks(self) -> bool:
+        """Save the full list of tasks using this list's storage (compacts the journal if using one).
+        This overwrites whatever is saved, even if another session changed it - use the add/complete/delete
+        methods to have changes merged instead.
+        Inside batch(), or with a background flusher, the save waits until the batch ends or the changes settle.
+        Returns: bool: True if the tasks were saved (or queued to be saved), False if saving failed."""
+        with self._save_lock:
+            self._full_save_pending = True
+            self._pending_ops = [] # The full save includes them
+        if self._deferring():
+            self._schedule_flush()
+            return True
+        return self.flush()
+
+    def _write_all(self) -> bool:
+        """Write every task to storage now.
+        Returns: bool: True if the tasks were saved, False if saving failed."""
+        try:
+            with self._save_lock, self.storage.lock():
+                self.storage.save(self.iter_task_records()) # Written one record at a time
+                self._etag = self.storage.etag()
+            return True
+        except Exception as e:
+            print_error(f"\nThis is awkward {emoji_interesting}. JaSON couldn't save tasks because {e}")
+            return False
+
+    # ===== Save a single change =====
+    def record_change(self, op: dict) -> None:
+        """Save one add/complete/delete change. Journal storage appends just this change,
+        JSON storage rewrites the whole file. Inside batch(), or with a background flusher, the change is queued.
+        Parameters: op (dict): The change, e.g. {"op": "delete", "index": 2, "title": "Homework"}.
         Returns: None"""
-        os.makedirs(os.path.dirname(self.filename), exist_ok=True)
-        task_data = []
-        for task in self.tasks:
-            task_info = {
-                "title": task.title,
-                "completed": task.completed,
-                "type": task.__class__.__name__
-            }
-            if isinstance(task, PriorityTask):
-                task_info["priority"] = task.priority
-            task_data.append(task_info)
+        self.record_changes([op])
+
+    @metrics.timed("tasks.record")
+    def record_changes(self, ops: list) -> None:
+        """Save several changes with one write (or queue them, like record_change).
+        Parameters: ops (list[dict]): The changes, in the order they were made.
+        Returns: None"""
+        if not ops:
+            return
+        self._update_search_index(ops)
+        self._update_id_index(ops)
+        with self._save_lock: # Queued first, so they're saved after any changes an earlier flush couldn't save
+            if not self._full_save_pending:
+                self._pending_ops.extend(ops)
+        if self._deferring():
+            self._schedule_flush()
+            return
+        self.flush()
+
+    def _write_ops(self, ops: list) -> bool:
+        """Save changes while holding the storage's lock. If another process saved since this list was loaded
+        (its etag changed), their version is loaded first and these changes are redone on top, so neither is lost.
+        Parameters: ops (list[dict]): The changes, in order.
+        Returns: bool: True if the changes were saved, False if saving failed."""
         try:
-            with open(self.filename, 'w') as file:
-                json.dump(task_data, file, indent=2)
+            with self._save_lock, self.storage.lock():
+                if self.storage.etag() != self._etag:
+                    self._merge(ops)
+                if len(ops) == 1:
+                    self.storage.record(ops[0], self.task_records)
+                else:
+                    self.storage.record_many(ops, self.task_records)
+                self._etag = self.storage.etag()
+            return True
         except Exception as e:
             print_error(f"\nThis is awkward {emoji_interesting}. JaSON couldn't save tasks because {e}")
+            return False
+
+    def _merge(self, ops: list) -> None:
+        """Another session saved since this list was loaded: load their version and redo these changes on it.
+        Changes find their task by title if it moved (see storage.find_op_index).
+        Parameters: ops (list[dict]): This session's unsaved changes, in order.
+        Returns: None"""
+        records = self.storage.load()
+        for op in ops:
+            apply_op(records, op)
+        self._fill_tasks(records)
+        self._row_cache = []
+
+    # ===== Group changes into one save =====
+    @contextmanager
+    def batch(self):
+        """Group changes so they are saved together once, when the with block ends (even if it ends with an error).
+        Batches can be nested; only the outermost one saves.
+            with task_list.batch():
+                for title in titles:
+                    task_list.add_task(Task(title))
+        Yields: TaskList: This task list."""
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                flusher = self.flusher
+                if flusher is not None:
+                    flusher.flush_now()
+                else:
+                    self.flush()
+
+    def _deferring(self) -> bool:
+        """Returns: bool: True if changes should be queued instead of saved straight away."""
+        return self._batch_depth > 0 or self._flush_interval > 0
+
+    def _schedule_flush(self) -> None:
+        """Start (or restart) the background flusher's timer, unless a batch will flush at its end.
+        The flusher is made here, so a list that was closed (e.g. and then reused by the registry) gets a new one.
+        Returns: None"""
+        if self._batch_depth > 0 or self._flush_interval <= 0:
+            return
+        with self._save_lock:
+            if self.flusher is None:
+                from flusher import DebouncedFlusher
+                self.flusher = DebouncedFlusher(self.flush, self._flush_interval)
+            flusher = self.flusher
+        flusher.touch()
+
+    def flush(self) -> bool:
+        """Save every queued change now: one storage.record_many() for queued changes, or one full save.
+        If saving fails the changes stay queued, so the next flush (or close()) tries them again.
+        Returns: bool: True if everything was saved (or nothing was waiting), False if saving failed."""
+        with self._save_lock:
+            ops, full = self._pending_ops, self._full_save_pending
+            self._pending_ops, self._full_save_pending = [], False
+            if full:
+                saved = self._write_all()
+            else:
+                saved = not ops or self._write_ops(ops)
+            if not saved: # Keep them for next time
+                self._pending_ops, self._full_save_pending = ops, full
+            return saved
+
+    def close(self) -> bool:
+        """Save anything still waiting and stop the background flusher (if there is one). The list can still be
+        used afterwards: the next change starts a new flusher.
+        Returns: bool: True if everything was saved, False if some changes couldn't be (they stay queued)."""
+        with self._save_lock:
+            flusher, self.flusher = self.flusher, None
+        if flusher is not None:
+            return flusher.close()
+        return self.flush()
+
+    # ===== Tasks as saveable records =====
+    def task_records(self) -> list[dict]:
+        """Return every task as a plain dict record, ready to save.
+        Returns: list[dict]: One record per task, in list order."""
+        return list(self.iter_task_records())
+
+    def iter_task_records(self):
+        """Yield every task as a plain dict record one at a time, so saving doesn't build a second full list.
+        Yields: dict: One record per task, in list order."""
+        if isinstance(self.tasks, ColumnarTaskStore) or self.is_view():
+            return self.tasks.iter_records(lambda code: Priority(code).label)
+        return (task.to_dict() for task in self.tasks)
+
+    # ===== Import and export task files =====
+    def import_tasks(self, file, fmt: str = "json") -> int:
+        """Add every task in a JSON, JSON Lines or CSV file, reading one record at a time, then save once.
+        Imported tasks get new IDs, so importing a list's own export can't give two tasks the same ID.
+        Parameters: file (file): An open text file.
+                    fmt (str): "json", "jsonl" or "csv".
+        Returns: int: Number of tasks added."""
+        return self.add_tasks(task_from_dict(dict(record, id=None)) for record in read_records(file, fmt))
+
+    def export_tasks(self, file, fmt: str = "json") -> int:
+        """Write every task to a JSON, JSON Lines or CSV file, one record at a time.
+        Parameters: file (file): An open text file.
+                    fmt (str): "json", "jsonl" or "csv".
+        Returns: int: Number of tasks written."""
+        return write_records(self.iter_task_records(), file, fmt)
+
+    # ===== Pick up changes saved by another session =====
+    def refresh(self) -> bool:
+        """Reload the tasks if another session (or process) saved since they were loaded, e.g. before a
+        long-running server answers a request. Does nothing while this list has changes waiting to be saved -
+        those are merged when they're saved instead.
+        Returns: bool: True if the tasks were reloaded."""
+        with self._save_lock:
+            if self._pending_ops or self._full_save_pending or self.storage.etag() == self._etag:
+                return False
+            self.load_tasks()
+            return True
 
     # ===== Load tasks from users file =====
+    @metrics.timed("tasks.load")
     def load_tasks(self) -> None:
-        """Load tasks from a JSON file (if it exists). Otheriwse, start with empty list.
+        """Load tasks from this list's storage (if any are saved). Otheriwse, start with empty list.
         Returns: None
         """
+        self._row_cache = []
+        self._search_index = None
+        self._id_index = None
+        if self.is_view(): # Loading again (e.g. refresh): unmap the old view, nothing else uses it
+            self._close_view(self.tasks)
+            self.tasks = self.new_task_container()
+        with self.storage.lock(): # Wait for any save in progress in another process
+            if self._load_records():
+                try:
+                    self.storage.save(self.iter_task_records()) # Save the new IDs, so they stay the same
+                except OSError:
+                    pass # Can't save here (e.g. read-only data folder) - they're saved with the next change
+            self._etag = self.storage.etag()
+
+    def _load_records(self) -> bool:
+        """Fill the list from storage, falling back to a backup (or an empty list) if the file is damaged.
+        Returns: bool: True if some tasks were saved before tasks had IDs and were given new ones."""
         try:
-            with open(self.filename, 'r') as file:
-                task_data = json.load(file)
-            self.tasks = []
-            for data in task_data:
-                if data.get("type") == "PriorityTask":
-                    task = PriorityTask(data["title"], data.get("priority", "Medium"))
-                else:
-                    task = Task(data["title"])
-                task.completed = data["completed"]
-                self.tasks.append(task)
-        except (FileNotFoundError, json.JSONDecodeError):
-            self.tasks = []  # No tasks file yet or file is empty/corrupted - start new list
+            view = getattr(self.storage, "view", None)
+            tasks = view(task_from_columns) if view is not None else None # Read-only until the first change
+            if tasks is not None:
+                self.tasks = tasks # The view's storage saves new IDs itself (see MappedTaskStorage.view)
+                return False
+            return self._fill_tasks(self.storage.iter_records()) # Decoded one record at a time
+        except json.JSONDecodeError:
+            try:
+                new_ids = self._fill_tasks(self.storage.load()) # Falls back to the newest good backup
+                print_error(f"\nPhew {emoji_interesting}. Your tasks file was damaged, so JaSON restored your last backup.")
+                return new_ids
+            except json.JSONDecodeError as e:
+                print_error(f"\nOh no! JaSON couldn't read your tasks: {e}. Starting a new list.")
+                self.tasks = self.new_task_container()
         except Exception:
             print_error("\nOh no! JaSON says... I don't like that one, start again!")
-            self.tasks = []
+            self.tasks = self.new_task_container()
+        return False
+
+    def is_view(self) -> bool:
+        """Returns: bool: True if the tasks are still a read-only view of the saved file (a MappedTasks from
+        "mapped" storage, see mapped.py), which is only decoded a task at a time as it's shown."""
+        return getattr(self.tasks, "read_only", False)
+
+    def _writable(self) -> None:
+        """Before the first change to a read-only view, decode it into a normal list
+        (or a ColumnarTaskStore if columnar). Does nothing if the tasks can already be changed.
+        Returns: None"""
+        if not self.is_view():
+            return
+        view, self.tasks = self.tasks, self.new_task_container()
+        if self.columnar:
+            for values in view.iter_values():
+                self.tasks.append_values(*values)
+        else:
+            self.tasks = [task_from_columns(*values) for values in view.iter_values()]
+        self._close_view(view)
+
+    @staticmethod
+    def _close_view(view) -> None:
+        """Unmap a read-only view that's no longer used, so its mmap and file handle are freed now instead of
+        whenever it's garbage collected.
+        Parameters: view (MappedTasks): The view.
+        Returns: None"""
+        close = getattr(view, "close", None)
+        if close is not None:
+            close()
+
+    def _fill_tasks(self, records) -> bool:
+        """Replace the tasks with ones built from saved records.
+        Parameters: records (iterable of dict): The saved task records.
+        Returns: bool: True if some records had no ID and were given new ones (see fill_ids)."""
+        new_ids = []
+        records = fill_ids(records, new_ids)
+        if self.columnar:
+            tasks = self.new_task_container()
+            for data in records:
+                tasks.append_values(data["title"], data["completed"], priority_code(data), data["id"])
+        else:
+            tasks = [task_from_dict(data) for data in records]
+        self.tasks = tasks
+        self._search_index = None
+        self._id_index = None
+        return bool(new_ids)
 
     # ========== Helper methods =========
     
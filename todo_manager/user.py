@@ -1,103 +1,124 @@
 """user.py handles user management (signup, login) securely.
 Imports:
-- json: Save and load user data (like usernames and passwords) as text files.
 - os: Helps with file and folder handling (making sure user files are saved in the right place).
-- getpass: Securely get user passwords without showing them on screen.
 - emoji_library: Custom file that holds emoji icons for user actions (like login success, errors).
 - styling: Custom file for styling the terminal (colours, clearing the screen).
-- bcrypt: Securely hash and check passwords (so we don't store plain text passwords)."""
+- hashing: Custom file that hashes and checks passwords with bcrypt (with async versions for servers).
+- config: Custom file with app settings (where data is saved).
+- frame: Custom file that asks questions (passwords without showing them on screen), showing the whole screen first.
+- storage: Custom file that saves and loads user accounts (JSON file or SQLite database)."""
 
-import json
 import os
-from getpass import getpass
 from emoji_library import emoji_person, emoji_add, emoji_cross, emoji_lock, emoji_interesting, emoji_smile
 from styling import print_error, print_success, clear_screen
-import bcrypt
+import config
+from frame import ask, ask_secret
+from storage import open_user_storage
+from hashing import default_hasher
 
 # ========= User class =========
 class User:
     """Handles user signup and login. Tracks currently logged-in user. 
     Purpose: Manage user accounts securely.
-    Methods: __init__, load_users, save_users, register_user, login_user,
-        get_current_user, hash_password, check_password.
-    Variables: users_file (str), logged_in_user (str)."""
+    Methods: __init__, load_users, save_users, find_user, save_user, register_user, login_user,
+        verify_login, verify_login_async, rehash_if_needed, get_current_user,
+        hash_password, check_password, hash_password_async, check_password_async.
+    Variables: users_file (str), storage (JSONUserStorage, ShardedUserStorage or SQLiteUserStorage),
+        hasher (PasswordHasher), logged_in_user (str)."""
 
     # ========== Create user and set up file location ==========
-    def __init__(self, users_file: str = "data/users.json"):
+    def __init__(self, users_file: str = os.path.join(config.DATA_DIR, "users.json"), storage=None, hasher=None):
         """Initialize user object and set up file location for user data.
         Parameters: users_file (str): Path to the JSON file storing user data.
+                    storage (optional): Where users are saved. Defaults to the storage picked in config.py.
+                    hasher (PasswordHasher, optional): Hashes passwords. Defaults to the shared hasher.
         Returns: None."""
         self.users_file = users_file
+        self.storage = storage if storage is not None else open_user_storage(users_file)
+        self.hasher = hasher if hasher is not None else default_hasher
         self.logged_in_user = None
 
-    # ========== Load user from json file ==========
+    # ========== Load users from storage ==========
     def load_users(self) -> dict:
-        """Load users from JSON file. If file doesn't exist, return empty dict.
+        """Load every user from storage. If there are none yet, return empty dict.
         Returns: dict: Dictionary of users with usernames as keys and hashed passwords (bytes) as values."""
-        if not os.path.exists(self.users_file):
-            return {}
         try:
-            with open(self.users_file, "r") as f:
-                data = json.load(f) # Convert bytes back to proper format for bcrypt
-                for username, user_data in data.items():
-                    if isinstance(user_data["password"], str): # Convert string back to bytes for bcrypt
-                        user_data["password"] = user_data["password"].encode('latin-1')
-                return data
+            return self.storage.load()
         except Exception as e:
             print_error(f"\nError loading users: {e}")
             return {}
     
-    # ========== Save user to json file ==========
+    # ========== Save users to storage ==========
     def save_users(self, users: dict) -> None:
-        """Save users to JSON file.
+        """Save every user to storage.
         Parameters: users (dict): Dictionary of users with usernames as keys and hashed passwords (bytes) as values.
         Returns: None."""
-        os.makedirs(os.path.dirname(self.users_file), exist_ok=True)
-        
         try:
-            users_for_json = {} # Convert bytes to string for JSON storage
-            for username, user_data in users.items():
-                users_for_json[username] = {
-                    "password": user_data["password"].decode('latin-1')
-                }
-            with open(self.users_file, "w") as f:
-                json.dump(users_for_json, f, indent=2)
+            self.storage.save(users)
+            clear_screen()
+            print_success(f"\nNice cache! Your account has been saved.")
+        except Exception as e:
+            print_error(f"\nUgh, JaSON didn't like that one {emoji_interesting}. Error: {e}\nPlease try again.")
+
+    # ========== Look up one user ==========
+    def find_user(self, username: str) -> dict:
+        """Look up a single user in storage (an index lookup with SQLite).
+        Parameters: username (str): The username to find.
+        Returns: dict: {"password": bytes}, or None if the user doesn't exist."""
+        try:
+            return self.storage.get(username)
+        except Exception as e:
+            print_error(f"\nError loading users: {e}")
+            return None
+
+    # ========== Save one new user ==========
+    def save_user(self, username: str, user_data: dict) -> bool:
+        """Save a single new user to storage, unless someone else has just taken the username.
+        Parameters: username (str): The new username.
+                    user_data (dict): {"password": bytes}.
+        Returns: bool: True if the account was saved, False if the username was taken (or saving failed)."""
+        try:
+            if not self.storage.create(username, user_data):
+                print_error(f"\nToo slow {emoji_interesting}! Someone just took that username. Please pick another one!")
+                return False
             clear_screen()
             print_success(f"\nNice cache! Your account has been saved.")
+            return True
         except Exception as e:
             print_error(f"\nUgh, JaSON didn't like that one {emoji_interesting}. Error: {e}\nPlease try again.")
+            return False
 
     # ========== Sign up/create new user account ==========
     def register_user(self) -> str:
         """Create a new user with username and password.
         Returns: str: The username of the newly registered user."""
-        users = self.load_users()
         print_success(f"\nYay! {emoji_smile} Let's create your TO DO. account!")
 
-        while True:
-            username = input(f"\n{emoji_person} Choose your username: ").strip()
-            if not username:
-                print_error(f"\nPlease enter a valid username!")
-                continue
-            if username in users:
-                print_error(f"\nThat username's already taken. Please try again!")
-                continue
-            break
+        saved = False
+        while not saved: # Only False again if someone else signs up with the same username first
+            while True:
+                username = ask(f"\n{emoji_person} Choose your username: ").strip()
+                if not username:
+                    print_error(f"\nPlease enter a valid username!")
+                    continue
+                if self.find_user(username) is not None:
+                    print_error(f"\nThat username's already taken. Please try again!")
+                    continue
+                break
 
-        while True:
-            password = getpass(f"\n{emoji_add} Please enter your password (5+ characters): ").strip()
-            if len(password) < 5:
-                print_error(f"\nThat password's too short. Give me a longer one!")
-                continue
-            password_confirm = getpass(f"\n{emoji_add} Second time's a charm! Please re-enter your password: ").strip()
-            if password != password_confirm:
-                print_error(f"\nHmm {emoji_interesting} your passwords don't match. Want to try again?")
-                continue
-            break
+            while True:
+                password = ask_secret(f"\n{emoji_add} Please enter your password (5+ characters): ").strip()
+                if len(password) < 5:
+                    print_error(f"\nThat password's too short. Give me a longer one!")
+                    continue
+                password_confirm = ask_secret(f"\n{emoji_add} Second time's a charm! Please re-enter your password: ").strip()
+                if password != password_confirm:
+                    print_error(f"\nHmm {emoji_interesting} your passwords don't match. Want to try again?")
+                    continue
+                break
 
-        hashed_password = self.hash_password(password)  # Secure password hashing
-        users[username] = {"password": hashed_password}
-        self.save_users(users)
+            hashed_password = self.hash_password(password)  # Secure password hashing
+            saved = self.save_user(username, {"password": hashed_password})
         self.logged_in_user = username
         print()
         return username
@@ -106,17 +127,16 @@ class User:
     def login_user(self) -> str:
         """Log in an existing user by verifying username and password.
         Returns: str: Username of the logged-in user, or None if login failed."""
-        users = self.load_users()
         print_success(f"\n {emoji_smile} Please enter your login details:")
 
         attempts = 0
         while attempts < 3:
-            username = input(f"\n{emoji_person} Username: ").strip()
+            username = ask(f"\n{emoji_person} Username: ").strip()
             if not username:
                 print_error(f"\n{emoji_cross} Please enter a valid username.")
                 continue
-            password = getpass(f"\n{emoji_lock} Password: ").strip()
-            if username in users and self.check_password(password, users[username]["password"]): # Secure password verification
+            password = ask_secret(f"\n{emoji_lock} Password: ").strip()
+            if self.verify_login(username, password): # Secure password verification
                 self.logged_in_user = username
                 return username
             else:
@@ -127,6 +147,50 @@ class User:
         print_error(f"\nUmm, this is awkward {emoji_interesting} Did you forget your details?\nLet's go back to the main menu.")
         return None
                 
+    # ========== Check username & password ==========
+    def verify_login(self, username: str, password: str) -> bool:
+        """Check a username and password, updating the stored hash if its bcrypt cost is out of date.
+        Parameters: username (str): The username to check.
+                    password (str): The plain text password to check.
+        Returns: bool: True if the user exists and the password matches, else False."""
+        user_data = self.find_user(username)
+        if user_data is None or not self.check_password(password, user_data["password"]):
+            return False
+        self.rehash_if_needed(username, password, user_data["password"])
+        return True
+
+    async def verify_login_async(self, username: str, password: str) -> bool:
+        """Same as verify_login(), but bcrypt runs in the hasher's worker pool and reading or saving the user
+        (file locks, fsync) runs in the event loop's worker threads, so an event loop isn't blocked.
+        Parameters: username (str): The username to check.
+                    password (str): The plain text password to check.
+        Returns: bool: True if the user exists and the password matches, else False."""
+        import asyncio # Only needed by servers, so the terminal app doesn't load it at startup
+        loop = asyncio.get_running_loop()
+        user_data = await loop.run_in_executor(None, self.find_user, username)
+        if user_data is None or not await self.check_password_async(password, user_data["password"]):
+            return False
+        if self.hasher.needs_rehash(user_data["password"]):
+            try:
+                hashed = await self.hash_password_async(password)
+                await loop.run_in_executor(None, self.storage.add, username, {"password": hashed})
+            except Exception as e:
+                print_error(f"\nError updating your password hash: {e}")
+        return True
+
+    # ========== Update old password hashes ==========
+    def rehash_if_needed(self, username: str, password: str, hashed: bytes) -> None:
+        """After a successful login, hash the password again if it was stored with a different bcrypt cost.
+        Parameters: username (str): The user who just logged in.
+                    password (str): Their (correct) plain text password.
+                    hashed (bytes): The hash currently stored for them.
+        Returns: None."""
+        if self.hasher.needs_rehash(hashed):
+            try:
+                self.storage.add(username, {"password": self.hash_password(password)})
+            except Exception as e:
+                print_error(f"\nError updating your password hash: {e}")
+
     # ========== Get current user ==========
     def get_current_user(self) -> str:
         """Return the currently logged-in user.
@@ -138,15 +202,27 @@ class User:
         """Hash password using bcrypt for secure storage.
         Parameters: password (str): The plain text password to hash.
         Returns: bytes: The hashed password."""
-        salt = bcrypt.gensalt()
-        return bcrypt.hashpw(password.encode('utf-8'), salt)
+        return self.hasher.hash(password)
 
     def check_password(self, password: str, hashed: bytes) -> bool:
         """Check a plain text password against a hashed password.
         Parameters: password (str): The plain text password to check.
                     hashed (bytes): The hashed password to compare against.
         Returns: bool: True if the password matches the hash, else False."""
-        return bcrypt.checkpw(password.encode('utf-8'), hashed)
+        return self.hasher.check(password, hashed)
+
+    async def hash_password_async(self, password: str) -> bytes:
+        """Hash password in the hasher's worker pool, without blocking an event loop.
+        Parameters: password (str): The plain text password to hash.
+        Returns: bytes: The hashed password."""
+        return await self.hasher.hash_async(password)
+
+    async def check_password_async(self, password: str, hashed: bytes) -> bool:
+        """Check a password in the hasher's worker pool, without blocking an event loop.
+        Parameters: password (str): The plain text password to check.
+                    hashed (bytes): The hashed password to compare against.
+        Returns: bool: True if the password matches the hash, else False."""
+        return await self.hasher.check_async(password, hashed)
 
 # ========== Guest User - doesn't save tasks or login details ==========
 class GuestUser(User): # Inherits from User class
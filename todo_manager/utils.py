@@ -2,10 +2,14 @@
 Imports:
 - styling: Custom file for styling the terminal (colours, clearing the screen).
 - emoji_library: Custom file that holds emoji icons for user actions (like login success, errors
+- config: Custom file with app settings (tasks per page).
+- frame: Custom file that asks questions, showing the whole screen before each one in a single write.
 """
 
-from styling import print_info, clear_screen, print_error
-from emoji_library import emoji_interesting, emoji_cross
+from styling import print_info, clear_screen, print_error, escape_markup
+from emoji_library import emoji_interesting, emoji_cross, emoji_search
+import config
+from frame import ask
 
 # ========== print_no_tasks() =========
 def print_no_tasks() -> None:
@@ -23,7 +27,16 @@ def get_task_number(task_list, action):
         return None
     max_num = len(task_list.get_tasks())
     
-    user_input = input(f"\nWhich task do you want to {action}? (1-{max_num}): ").strip()
+    while True:
+        if task_list.page_count() > 1: # Long list - let the user flip pages before choosing
+            user_input = ask(f"\nWhich task do you want to {action}? (1-{max_num}, or n/p for next/previous page): ").strip()
+            if user_input.lower() in ("n", "p"):
+                clear_screen()
+                task_list.display_tasks(task_list.page + (1 if user_input.lower() == "n" else -1))
+                continue
+        else:
+            user_input = ask(f"\nWhich task do you want to {action}? (1-{max_num}): ").strip()
+        break
     try:
         index = int(user_input) - 1
         if 0 <= index < max_num:
@@ -34,6 +47,52 @@ def get_task_number(task_list, action):
         print_error(f"\n{emoji_interesting} That's not a number!")
     return None
     
+# ========== Browse tasks page by page =========
+def browse_tasks(task_list) -> None:
+    """Show the user's tasks one page at a time, letting them move between pages.
+    Parameters: task_list: The TaskList to show.
+    Returns: None."""
+    task_list.display_tasks()
+    while task_list.page_count() > 1:
+        pages = task_list.page_count()
+        choice = ask(f"\nPage {task_list.page} of {pages}. Enter n (next), p (previous), a page number, "
+                     f"#task number to jump to it, or press Enter to go back: ").strip().lower()
+        if not choice:
+            break
+        if choice == "n":
+            page = task_list.page + 1
+        elif choice == "p":
+            page = task_list.page - 1
+        elif choice.startswith("#") and choice[1:].isdigit(): # Jump to the page holding a task number
+            page = (int(choice[1:]) - 1) // config.PAGE_SIZE + 1
+        elif choice.isdigit():
+            page = int(choice)
+        else:
+            print_error(f"\n{emoji_interesting} That's not a page!")
+            continue
+        clear_screen()
+        task_list.display_tasks(page)
+
+# ========== Search tasks =========
+def search_tasks(task_list) -> None:
+    """Ask what to look for, then show the matching tasks (with their usual task numbers).
+    Parameters: task_list: The TaskList to search.
+    Returns: None."""
+    text = ask(f"\n{emoji_search} What are you looking for? (words in the task, or Enter for everything): ").strip()
+    show = ask("\nShow (a)ll, (t)o do or (d)one tasks? (Enter for all): ").strip().lower()
+    completed = {"t": False, "d": True}.get(show[:1])
+    priority = ask("\nOnly one priority? (1 High, 2 Medium, 3 Low, Enter for any): ").strip()
+    priority = {"1": "High", "2": "Medium", "3": "Low"}.get(priority)
+    by_priority = ask("\nMost important first? (y/n): ").strip().lower() == "y"
+
+    matches = task_list.search(text, completed, priority, substring=True, by_priority=by_priority)
+    clear_screen()
+    if not matches:
+        print_error(f"\n{emoji_interesting} Nothing matches that. Try fewer words?")
+        return
+    found = f"{len(matches)} task{'s' if len(matches) != 1 else ''} found"
+    task_list.display_matches(matches, f"{found} for '{escape_markup(text)}'" if text else found)
+
 # ========== Retry task actions (delete/complete) ==========
 def retry_task(task_list, action, action_func, after_success_msg=None, after_success_func=None):
     """Retry a task action (like delete or complete) until successful or user opts out.
@@ -55,7 +114,7 @@ def retry_task(task_list, action, action_func, after_success_msg=None, after_suc
                 after_success_func()
             break
         else:
-            again = input("\nTry again?\n\nPress 'y' to retry or enter anything else to return to the main menu: ").strip().lower()
+            again = ask("\nTry again?\n\nPress 'y' to retry or enter anything else to return to the main menu: ").strip().lower()
             if again == "y":
                 clear_screen()
             else: